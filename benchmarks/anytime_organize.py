@@ -0,0 +1,51 @@
+"""Time-budgeted organize: quality reached for each budget, and how well the budget is kept.
+
+Organizes generated workloads with several time budgets and reports the
+time the call really took next to the budget, the weighted penalty and the
+broken whitelists of the result, the number of improving swaps, and the
+usual arrangement invariants. Budget "none" is organize without
+improvement. A budget too short for the whitelist grouping falls back to
+first-fit seating, so its penalty can be worse than "none"; seating
+everyone once is never cut short, so the call takes at least that long.
+
+Run from the repository root:
+
+    python -m benchmarks.anytime_organize
+"""
+import random
+import time
+
+from utils.workload import WorkloadGenerator, check_invariants
+
+
+WORKLOADS = [(2_000, 8), (20_000, 8), (100_000, 8)]
+BUDGETS_MS = [None, 500, 2_000, 8_000]
+
+
+def main() -> None:
+    for people, table_capacity in WORKLOADS:
+        generator = WorkloadGenerator(seed=1)
+        workload = generator.generate(people, table_capacity=table_capacity, whitelist_fraction=0.6,
+                                      random_blacklists=people // 2)
+        names = workload["names"]
+        # Whitelists that cannot all be satisfied by the first arrangement
+        workload["preferences"] += [(a, "whitelist", b) for a, b in zip(names[::7], names[3::7])]
+        print(f"{people} people, {len(workload['preferences'])} preferences")
+        for budget_ms in BUDGETS_MS:
+            openspace = generator.build(workload)
+            random.seed(0)
+            start = time.perf_counter()
+            stats = openspace.organize(names, budget_ms=budget_ms)
+            elapsed = time.perf_counter() - start
+            problems = check_invariants(openspace, names)
+            score = openspace.get_score()
+            status = "ok  " if not problems else "FAIL"
+            budget = "none" if budget_ms is None else f"{budget_ms / 1000:g}s"
+            print(f"  {status} budget {budget:>5}  took {elapsed:6.2f}s  penalty {score['penalty']:9.1f}"
+                  f"  whitelists broken {stats['whitelist_violated']:>6}  swaps {stats.get('swaps', 0):>6}")
+            for problem in problems:
+                print(f"     - {problem}")
+
+
+if __name__ == "__main__":
+    main()
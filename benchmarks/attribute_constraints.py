@@ -0,0 +1,81 @@
+"""Table composition rules: organize with per-table attribute limits.
+
+Generates workloads whose roster has a team and a role per person, then
+organizes them without rules and with "at most 2 per table from the same
+team" and "at least 1 senior per table". Reports the organize time, the
+tables that break a rule, the largest team count at one table and the
+whitelist satisfaction, next to the usual arrangement invariants.
+
+Run from the repository root:
+
+    python -m benchmarks.attribute_constraints
+"""
+import random
+import time
+
+from utils.attributes import AttributeConstraint
+from utils.workload import WorkloadGenerator, check_invariants
+
+
+WORKLOADS = [(2_000, 8), (20_000, 8), (100_000, 8)]
+TEAM_SIZE = 40
+SENIOR_EVERY = 6
+RULES = [AttributeConstraint("team", max_per_table=2), AttributeConstraint("role", "senior", min_per_table=1)]
+
+
+def largest_team(openspace) -> int:
+    """Most people of one team at a single table."""
+    largest = 0
+    for table in openspace.tables:
+        counts = {}
+        for seat in table.seats:
+            if not seat.free:
+                team = openspace.attributes.get(seat.occupant, "team")
+                counts[team] = counts.get(team, 0) + 1
+        largest = max(largest, *counts.values(), 0)
+    return largest
+
+
+def main() -> None:
+    for people, table_capacity in WORKLOADS:
+        generator = WorkloadGenerator(seed=1)
+        workload = generator.generate(people, table_capacity=table_capacity, whitelist_fraction=0.3,
+                                      random_blacklists=people // 4)
+        names = workload["names"]
+        # Teams are spread over the roster, so whitelist clusters mix teams
+        rng = random.Random(2)
+        teams = [f"team {i // TEAM_SIZE}" for i in range(people)]
+        rng.shuffle(teams)
+        for use_rules in (False, True):
+            openspace = generator.build(workload)
+            openspace.attributes.update_rows(
+                ["team", "role"],
+                ((name, [team, "senior" if i % SENIOR_EVERY == 0 else "engineer"])
+                 for i, (name, team) in enumerate(zip(names, teams))))
+            for rule in RULES:
+                openspace.add_constraint(rule)
+            if not use_rules:
+                # Keep the counters (for the report) but let organize ignore the rules
+                rules, openspace.constraints = openspace.constraints, []
+            random.seed(0)
+            start = time.perf_counter()
+            openspace.organize(names)
+            elapsed = time.perf_counter() - start
+            problems = check_invariants(openspace, names)
+            if not use_rules:
+                openspace.constraints = rules
+                openspace._recount_attributes()
+            openspace.verify_statistics()
+            violations = openspace.get_constraint_violations()
+            stats = openspace.get_preference_stats()
+            status = "ok  " if not problems else "FAIL"
+            print(f"{status} {people:>7} people  rules {'on ' if use_rules else 'off'}  {elapsed:6.2f}s"
+                  f"  tables breaking a rule {len(violations):>5}  largest team at a table {largest_team(openspace)}"
+                  f"  whitelists satisfied {stats['whitelist_satisfied']:>6} of "
+                  f"{stats['whitelist_satisfied'] + stats['whitelist_violated']}  unseated {len(openspace.unseated)}")
+            for problem in problems:
+                print(f"     - {problem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput of per-item changes versus one SeatingBatch, for a 10k-item batch.
+
+Run from the repository root:
+
+    python -m benchmarks.batch_throughput
+"""
+import os
+import random
+import tempfile
+import time
+
+from utils.batch import SeatingBatch
+from utils.openspace import Openspace
+
+
+BATCH_SIZE = 10_000
+SAVED_SAMPLE = 100
+TABLE_CAPACITY = 4
+
+
+def build_room(names: list[str]) -> Openspace:
+    """Room with 5000 people seated and room for the batch."""
+    openspace = Openspace((len(names) + BATCH_SIZE) // TABLE_CAPACITY + 10, TABLE_CAPACITY)
+    openspace.organize(names)
+    return openspace
+
+
+def main() -> None:
+    rng = random.Random(0)
+    names = [f"Colleague {i}" for i in range(5_000)]
+    new_hires = [f"New hire {i}" for i in range(BATCH_SIZE)]
+    rows = [(rng.choice(new_hires), rng.choice(("whitelist", "blacklist")), rng.choice(names))
+            for _ in range(BATCH_SIZE)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        state_file = os.path.join(directory, "state.json")
+
+        # Per-item methods, without saving
+        openspace = build_room(names)
+        start = time.perf_counter()
+        for name in new_hires:
+            openspace.add_colleague(name)
+        for person, preference_type, target in rows:
+            openspace.set_preference(person, preference_type, target)
+        per_item = time.perf_counter() - start
+
+        # Per-item methods, saving after each one like the menu does (sampled)
+        openspace = build_room(names)
+        start = time.perf_counter()
+        for name in new_hires[:SAVED_SAMPLE]:
+            openspace.add_colleague(name)
+            openspace.store(state_file)
+        per_item_saved = (time.perf_counter() - start) / SAVED_SAMPLE * 2 * BATCH_SIZE
+
+        # One batch, one save
+        openspace = build_room(names)
+        start = time.perf_counter()
+        with SeatingBatch(openspace, state_file) as batch:
+            batch.add_colleagues(new_hires)
+            batch.set_preferences(rows)
+        batched = time.perf_counter() - start
+
+    items = 2 * BATCH_SIZE
+    print(f"{items} items ({BATCH_SIZE} colleagues + {BATCH_SIZE} preferences)")
+    print(f"  per-item, no save:           {per_item:8.2f}s  {items / per_item:10.0f} items/s")
+    print(f"  per-item, save each (est.):  {per_item_saved:8.2f}s  {items / per_item_saved:10.0f} items/s")
+    print(f"  one batch, one save:         {batched:8.2f}s  {items / batched:10.0f} items/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Stress test of ThreadSafeOpenspace with many threads claiming and releasing seats.
+
+Every thread claims its own share of the roster, plus a set of names that all
+threads try to claim at once (only one claim of each may succeed). Half of the
+threads also release some of their people again. Tables are added while the
+claims run. Afterwards the room is checked for lost updates and duplicate
+seats, and the throughput is reported for each thread count.
+
+Run from the repository root:
+
+    python -m benchmarks.concurrent_claims
+"""
+import random
+import sys
+import threading
+import time
+
+from utils.openspace import Openspace
+from utils.thread_safe import ThreadSafeOpenspace
+from utils.workload import check_invariants
+
+
+PEOPLE_PER_THREAD = 5_000
+CONTESTED = 500
+TABLE_CAPACITY = 4
+BLACKLIST_EDGES = 5_000
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+
+
+def run(thread_count: int) -> bool:
+    rng = random.Random(thread_count)
+    own = [[f"T{thread} P{i}" for i in range(PEOPLE_PER_THREAD)] for thread in range(thread_count)]
+    contested = [f"Contested {i}" for i in range(CONTESTED)]
+    everyone = [name for names in own for name in names] + contested
+    # A little slack; the extra tables added during the run make room for the rest
+    openspace = Openspace(len(everyone) // TABLE_CAPACITY, TABLE_CAPACITY)
+    for _ in range(BLACKLIST_EDGES):
+        person, target = rng.sample(everyone, 2)
+        openspace.set_preference(person, "blacklist", target)
+    room = ThreadSafeOpenspace(openspace)
+
+    results = [[] for _ in range(thread_count)]
+    released = [[] for _ in range(thread_count)]
+    start_barrier = threading.Barrier(thread_count + 1)
+
+    def worker(thread: int) -> None:
+        names = own[thread] + contested
+        own_names = set(own[thread])
+        random.Random(thread).shuffle(names)
+        start_barrier.wait()
+        for i, name in enumerate(names):
+            results[thread].append((name, room.add_colleague(name)))
+            if thread % 2 and i % 10 == 0 and name in own_names:
+                if room.release_seat(name) is not None:
+                    released[thread].append(name)
+
+    def add_tables() -> None:
+        start_barrier.wait()
+        for _ in range(len(everyone) // (10 * TABLE_CAPACITY)):
+            room.add_table()
+            time.sleep(0)
+
+    threads = [threading.Thread(target=worker, args=(thread,)) for thread in range(thread_count)]
+    threads.append(threading.Thread(target=add_tables))
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    problems = []
+    seated_claims = {}
+    for thread_results in results:
+        for name, result in thread_results:
+            if result["status"] == "seated":
+                seated_claims[name] = seated_claims.get(name, 0) + 1
+    twice = [name for name, count in seated_claims.items() if count > 1]
+    if twice:
+        problems.append(f"{len(twice)} people were seated by two threads")
+    released_names = {name for names in released for name in names}
+    expected = set(seated_claims) - released_names
+    if set(openspace._person_tables) != expected:
+        problems.append(f"{len(expected ^ set(openspace._person_tables))} seat claims were lost")
+
+    # Released people are gone from the room; everyone else must be accounted for
+    problems += check_invariants(openspace, [name for name in everyone if name not in released_names])
+
+    operations = sum(len(thread_results) for thread_results in results)
+    status = "ok  " if not problems else "FAIL"
+    print(f"{status} {thread_count:>2} threads  {operations:>7} claims in {elapsed:5.2f}s"
+          f"  {operations / elapsed:>9,.0f} claims/s  seated {openspace.get_seated_count()}"
+          f"  unseated {len(openspace.unseated)}")
+    for problem in problems:
+        print(f"     - {problem}")
+    return not problems
+
+
+def main() -> None:
+    results = [run(thread_count) for thread_count in THREAD_COUNTS]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Streaming exports: peak memory of writing the arrangement, by room size.
+
+Seats generated rooms, then measures with tracemalloc how much memory each
+export allocates on top of the room itself: the JSON state file and seating
+CSV written the old way (everything built in memory first, then dumped)
+against the streaming writers, the state file saved together with a history
+version, and the exporter formats. A streaming export should stay flat as
+the room grows. The history keeps a short digest per table and preference
+list between saves and replaces them in place; tracemalloc counts the new
+digests but not the old ones they free, which were allocated before tracing.
+
+Run from the repository root:
+
+    python -m benchmarks.export_memory
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from utils.export import ArrangementExporter
+from utils.file_utils import FileUtils
+from utils.history import StateHistory
+from utils.openspace import Openspace
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+TABLE_CAPACITY = 8
+
+
+def room(people: int) -> Openspace:
+    """A full room with a whitelist and a blacklist entry for every tenth person."""
+    number_of_tables = -(-people // TABLE_CAPACITY)
+    openspace = Openspace(number_of_tables, TABLE_CAPACITY)
+    names = [f"Colleague {i}" for i in range(people)]
+    for i, name in enumerate(names):
+        openspace.tables[i // TABLE_CAPACITY].set_seat(i % TABLE_CAPACITY, name)
+    for i in range(0, people - 1, 10):
+        openspace.preferences.add(names[i], "whitelist", names[i + 1])
+        openspace.preferences.add(names[i + 1], "blacklist", names[(i * 7919) % people])
+    openspace._rebuild_tracking()
+    return openspace
+
+
+def measure(export) -> tuple[float, float]:
+    """Peak memory (MB) allocated while running export, and its time in seconds.
+
+    The time comes from a separate run, as tracing slows allocations down."""
+    start = time.perf_counter()
+    export()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed
+
+
+def in_memory_state(openspace: Openspace, filename: str) -> None:
+    state = {"version": 1, **openspace.get_state()}
+    FileUtils.write_atomic(filename, lambda file: json.dump(state, file, indent=2, ensure_ascii=False))
+
+
+def in_memory_csv(openspace: Openspace, filename: str) -> None:
+    FileUtils.store_seating(filename, list(openspace.iter_seating_rows()))
+
+
+def state_with_history(openspace: Openspace, history: StateHistory, filename: str) -> None:
+    openspace.history = history
+    try:
+        openspace.store(filename, force=True)
+    finally:
+        openspace.history = None
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    try:
+        for people in SIZES:
+            openspace = room(people)
+            exporter = ArrangementExporter(openspace)
+            path = lambda name: os.path.join(directory, name)
+            history = StateHistory(path(f"history-{people}"))
+            exports = [
+                ("state JSON, built in memory", lambda: in_memory_state(openspace, path("old.json"))),
+                ("state JSON, streamed", lambda: openspace.store(path("new.json"), force=True)),
+                ("state JSON + history, streamed", lambda: state_with_history(openspace, history, path("hist.json"))),
+                ("seating CSV, built in memory", lambda: in_memory_csv(openspace, path("old.csv"))),
+                ("seating CSV, streamed", lambda: exporter.to_csv(path("new.csv"))),
+                ("seating CSV.gz, streamed", lambda: exporter.to_csv(path("new.csv.gz"))),
+                ("JSON Lines, streamed", lambda: exporter.to_jsonl(path("new.jsonl"))),
+            ]
+            print(f"{people} people, {openspace.number_of_tables} tables")
+            for label, export in exports:
+                peak, elapsed = measure(export)
+                print(f"  {label:<30} peak {peak:8.2f} MB  {elapsed:6.2f}s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Name index: build time and query latency on a large roster.
+
+Builds a NameIndex over generated names with accents, then times exact
+(accent- and case-folded) lookups, prefix lookups and typo suggestions, and
+checks that each query finds the name it was made from.
+
+Run from the repository root:
+
+    python -m benchmarks.name_search            # 1,000,000 names
+    python -m benchmarks.name_search 100000     # another roster size
+"""
+import random
+import sys
+import time
+
+from utils.name_index import NameIndex, fold
+
+
+FIRST_NAMES = ["Frédéric", "Zoë", "Łukasz", "Søren", "José", "Chloé", "Björn", "Émile", "Inès", "Anna",
+               "Mohamed", "Yuki", "Olga", "Pierre", "Aleksei", "Brigitta", "Astha", "Noah", "Amine", "Lea"]
+SYLLABLES = ["ba", "ker", "mü", "lin", "do", "vé", "ran", "sen", "gar", "cía", "no", "wak", "ros", "si",
+             "van", "berg", "ny", "lef", "èv", "re", "jen", "kow", "al", "ski", "tor", "ma", "hi", "ro"]
+QUERIES = 1_000
+
+
+def roster(size: int, rng: random.Random) -> list[str]:
+    names = set()
+    while len(names) < size:
+        last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(FIRST_NAMES)} {last}")
+    return sorted(names)
+
+
+def typo(name: str, rng: random.Random) -> str:
+    """The name with one letter of the last name changed."""
+    first, last = name.split(" ", 1)
+    position = rng.randrange(1, len(last))
+    return f"{first} {last[:position]}{rng.choice('aeiourst')}{last[position + 1:]}"
+
+
+def timed(label: str, queries: list[str], search, expected: list[str]) -> None:
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    elapsed = (time.perf_counter() - start) / len(queries)
+    found = sum(name in result for name, result in zip(expected, results))
+    print(f"  {label:<22} {elapsed * 1000:7.3f} ms per query  found {found}/{len(queries)}")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    names = roster(size, rng)
+
+    start = time.perf_counter()
+    index = NameIndex(names)
+    index.prefix("a")  # merges the buffered names
+    print(f"{len(index)} names indexed in {time.perf_counter() - start:.2f}s")
+
+    sample = rng.sample(names, QUERIES)
+    timed("folded exact lookup", [fold(name).upper() for name in sample], index.lookup, sample)
+    timed("autocomplete", [name[:name.index(" ") + 6] for name in sample],
+          lambda query: index.prefix(query, 100), sample)
+    timed("typo suggestion", [typo(name, rng) for name in sample], index.suggest, sample)
+
+
+if __name__ == "__main__":
+    main()
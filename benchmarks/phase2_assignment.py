@@ -0,0 +1,118 @@
+"""Phase 2 of organize() on a 50k-person roster with blacklists.
+
+Reports the organize time, how far the tables end up from the
+calculate_table_distribution targets, and how many people stay unseated.
+Then checks small random rooms whose exact targets are feasible (found by
+backtracking) and counts those organize misses, next to a room that the
+augmenting search must get right for every seed.
+
+Run from the repository root:
+
+    python -m benchmarks.phase2_assignment
+"""
+import random
+import time
+
+from utils.openspace import Openspace
+
+
+NUMBER_OF_PEOPLE = 50_000
+TABLE_CAPACITY = 8
+NUMBER_OF_TABLES = 6_500
+HUBS = 1_000
+HUB_DEGREE = 1_000
+WHITELIST_PAIRS = 10_000
+
+
+SMALL_ROOMS = 1_000
+# 4 tables of 4, 10 people: targets [4, 3, 3, 0] are feasible but need an augmenting path
+REGRESSION_BLACKLISTS = [(0, 3), (0, 7), (0, 8), (0, 9), (1, 8), (1, 9), (2, 9), (3, 1), (4, 3), (5, 1),
+                         (6, 5), (7, 0), (7, 3), (8, 1), (8, 4), (8, 7), (9, 1), (9, 3)]
+
+
+def feasible(people: int, targets: list[int], conflicts: set) -> bool:
+    """Whether people 0..people-1 fit the exact table targets without a conflict (backtracking)."""
+    tables = [[] for _ in targets]
+
+    def place(person: int) -> bool:
+        if person == people:
+            return True
+        for table, target in zip(tables, targets):
+            if len(table) < target and not any((person, other) in conflicts for other in table):
+                table.append(person)
+                if place(person + 1):
+                    return True
+                table.pop()
+        return False
+
+    return place(0)
+
+
+def misses_targets(number_of_tables: int, table_capacity: int, people: int, blacklists, seed: int) -> bool:
+    """Organize a room and tell whether its tables miss the calculate_table_distribution targets."""
+    openspace = Openspace(number_of_tables, table_capacity)
+    for person, target in blacklists:
+        openspace.set_preference(f"p{person}", "blacklist", f"p{target}")
+    random.seed(seed)
+    openspace.organize([f"p{i}" for i in range(people)])
+    targets = openspace.calculate_table_distribution(people)
+    occupancy = sorted((table.occupied for table in openspace.tables), reverse=True)
+    return occupancy != sorted(targets, reverse=True) or bool(openspace.unseated)
+
+
+def check_small_rooms() -> None:
+    regression = sum(misses_targets(4, 4, 10, REGRESSION_BLACKLISTS, seed) for seed in range(200))
+    print(f"  regression room, seeds missing targets: {regression}/200")
+
+    rng = random.Random(5)
+    checked = missed = 0
+    for room in range(SMALL_ROOMS):
+        number_of_tables, table_capacity = rng.randint(2, 5), rng.randint(2, 5)
+        people = rng.randint(2, number_of_tables * table_capacity)
+        blacklists = {tuple(rng.sample(range(people), 2)) for _ in range(rng.randint(0, 2 * people))}
+        conflicts = blacklists | {(b, a) for a, b in blacklists}
+        targets = Openspace(number_of_tables, table_capacity).calculate_table_distribution(people)
+        if not feasible(people, targets, conflicts):
+            continue
+        checked += 1
+        missed += misses_targets(number_of_tables, table_capacity, people, blacklists, room)
+    print(f"  small rooms with feasible targets missed: {missed}/{checked}")
+
+
+def main() -> None:
+    rng = random.Random(0)
+    names = [f"Colleague {i}" for i in range(NUMBER_OF_PEOPLE)]
+    openspace = Openspace(NUMBER_OF_TABLES, TABLE_CAPACITY)
+    # A few people who avoid many others make greedy placement miss targets
+    for hub in rng.sample(names, HUBS):
+        for target in rng.sample(names, HUB_DEGREE):
+            if target != hub:
+                openspace.set_preference(hub, "blacklist", target)
+
+    # Pairs who want to sit together are seated first, in Phase 1
+    for _ in range(WHITELIST_PAIRS):
+        person, target = rng.sample(names, 2)
+        openspace.set_preference(person, "whitelist", target)
+
+    random.seed(0)
+    start = time.perf_counter()
+    openspace.organize(names)
+    elapsed = time.perf_counter() - start
+
+    targets = openspace.calculate_table_distribution(NUMBER_OF_PEOPLE)
+    occupancy = sorted((table.occupied for table in openspace.tables), reverse=True)
+    off_target = sum(abs(actual - target) for actual, target in zip(occupancy, targets)) // 2
+    stats = openspace.get_preference_stats()
+    print(f"{NUMBER_OF_PEOPLE} people, {NUMBER_OF_TABLES} tables of {TABLE_CAPACITY}, "
+          f"{openspace.preferences.edge_count('blacklist')} blacklist edges")
+    print(f"  organize time:           {elapsed:.2f}s")
+    print(f"  people off target:       {off_target}")
+    print(f"  people alone:            {openspace.get_people_alone_count()}")
+    print(f"  unseated:                {len(openspace.unseated)}")
+    print(f"  blacklist violations:    {stats['blacklist_violated']}")
+    print(f"  whitelist satisfied:     {stats['whitelist_satisfied']}/{WHITELIST_PAIRS}")
+    check_small_rooms()
+
+
+if __name__ == "__main__":
+    main()
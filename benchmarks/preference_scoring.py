@@ -0,0 +1,74 @@
+"""Weighted preference scoring: whole arrangements and single moves.
+
+Organizes generated workloads with weighted, partly hard preferences, then
+times scoring the arrangement with PreferenceScorer (one pass over the
+edge arrays) against walking the preference dicts, checks that both count
+the same, and times scoring a swap from the two people's own edges.
+
+Run from the repository root:
+
+    python -m benchmarks.preference_scoring
+"""
+import random
+import time
+
+from utils.workload import WorkloadGenerator
+
+
+WORKLOADS = [(1_000, 0.5, 500), (10_000, 0.5, 20_000), (100_000, 0.6, 200_000)]
+REPEATS = 20
+SWAPS = 10_000
+
+
+def main() -> None:
+    for people, whitelist_fraction, blacklists in WORKLOADS:
+        generator = WorkloadGenerator(seed=2)
+        workload = generator.generate(people, table_capacity=6, whitelist_fraction=whitelist_fraction,
+                                      random_blacklists=blacklists)
+        rng = random.Random(0)
+        # Give a fifth of the preferences a strength, some of them hard
+        workload["preferences"] = [
+            row + (rng.choice(["strong", "mild", 2.5]), rng.choice(["hard", "soft"])) if rng.random() < 0.2 else row
+            for row in workload["preferences"]
+        ]
+        openspace = generator.build(workload)
+        random.seed(0)
+        openspace.organize(workload["names"])
+
+        start = time.perf_counter()
+        scorer = openspace.get_scorer()
+        tables = scorer.table_array(openspace._person_tables)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            scorer.penalty(tables)
+        score_time = (time.perf_counter() - start) / REPEATS
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            stats = openspace._calculate_preference_stats()
+        walk_time = (time.perf_counter() - start) / REPEATS
+
+        evaluation = scorer.evaluate(tables)
+        same = all(evaluation[key] == value for key, value in stats.items())
+
+        seated = [person_id for person_id in range(scorer.size) if tables[person_id] >= 0]
+        pairs = [rng.sample(seated, 2) for _ in range(SWAPS)]
+        start = time.perf_counter()
+        for a, b in pairs:
+            before = scorer.person_penalty(tables, a) + scorer.person_penalty(tables, b)
+            tables[a], tables[b] = tables[b], tables[a]
+            after = scorer.person_penalty(tables, a) + scorer.person_penalty(tables, b)
+            tables[a], tables[b] = tables[b], tables[a]
+        swap_time = (time.perf_counter() - start) / SWAPS
+
+        edges = openspace.preferences.edge_count()
+        print(f"{'ok  ' if same else 'FAIL'} {people:>7} people {edges:>7} edges  build {build_time * 1000:7.1f} ms"
+              f"  score {score_time * 1000:7.2f} ms ({score_time / max(1, edges) * 1e9:4.0f} ns/edge)"
+              f"  dict walk {walk_time * 1000:7.2f} ms  swap delta {swap_time * 1e6:5.1f} us"
+              f"  penalty {evaluation['penalty']:.1f} ({evaluation['hard_violated']} hard broken)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Scale checks for organize() on generated workloads.
+
+Each scenario is generated deterministically, organized, and checked with
+utils.workload.check_invariants. Its organize time must stay within the
+scenario's budget. Prints one line per scenario and exits with status 1 if
+any check fails.
+
+Run from the repository root:
+
+    python -m benchmarks.scale_properties          # every scenario
+    python -m benchmarks.scale_properties small    # only scenarios whose name contains "small"
+"""
+import random
+import sys
+import time
+
+from utils.workload import WorkloadGenerator, check_invariants, people_off_target
+
+
+# name, generate() arguments, organize time budget in seconds, allowed people off target
+SCENARIOS = [
+    ("small, no preferences", dict(people=25, table_capacity=4, slack=1.0, whitelist_fraction=0.0), 0.1, 0),
+    ("small, crowded", dict(people=30, table_capacity=4, slack=0.8, random_blacklists=20), 0.1, None),
+    ("10k, blacklists only", dict(people=10_000, whitelist_fraction=0.0, random_blacklists=20_000), 2.0, 0),
+    ("10k, mixed", dict(people=10_000, random_blacklists=20_000, hubs=50, hub_degree=500,
+                        clique_size=5, cliques=200), 3.0, None),
+    ("50k, adversarial", dict(people=50_000, table_capacity=8, whitelist_fraction=0.0, hubs=1_000,
+                              hub_degree=1_000), 10.0, 0),
+    ("100k, long whitelist chain", dict(people=100_000, table_capacity=8, whitelist_fraction=0.0), 10.0, None),
+    ("100k, mixed", dict(people=100_000, table_capacity=8, whitelist_fraction=0.3, random_blacklists=200_000,
+                         hubs=200, hub_degree=2_000, clique_size=9, cliques=500), 20.0, None),
+]
+
+
+def run_scenario(name: str, arguments: dict, budget: float, allowed_off_target: int | None) -> bool:
+    generator = WorkloadGenerator(seed=0)
+    workload = generator.generate(**arguments)
+    if name.endswith("long whitelist chain"):
+        # One whitelist component spanning the whole roster
+        names = workload["names"]
+        workload["preferences"] += [(a, "whitelist", b) for a, b in zip(names, names[1:])]
+    openspace = generator.build(workload)
+
+    random.seed(0)
+    start = time.perf_counter()
+    openspace.organize(workload["names"])
+    elapsed = time.perf_counter() - start
+
+    problems = check_invariants(openspace, workload["names"])
+    if elapsed > budget:
+        problems.append(f"organize took {elapsed:.2f}s, budget {budget:.2f}s")
+    off_target = people_off_target(openspace, len(workload["names"]))
+    if allowed_off_target is not None and off_target > allowed_off_target:
+        problems.append(f"{off_target} people off the distribution target")
+
+    status = "ok  " if not problems else "FAIL"
+    print(f"{status} {name:<28} {len(workload['names']):>7} people  {len(workload['preferences']):>8} preferences"
+          f"  {elapsed:6.2f}s  off target {off_target:>4}  unseated {len(openspace.unseated)}")
+    for problem in problems:
+        print(f"     - {problem}")
+    return not problems
+
+
+def main() -> None:
+    selected = sys.argv[1] if len(sys.argv) > 1 else ""
+    results = [run_scenario(*scenario) for scenario in SCENARIOS if selected in scenario[0]]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Memory and allocation benchmark for Seat/Table on a 100k-seat room.
+
+Run from the repository root:
+
+    python -m benchmarks.seat_memory
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils import table as table_module
+from utils.openspace import Openspace
+
+
+NUMBER_OF_TABLES = 25_000
+TABLE_CAPACITY = 4
+NUMBER_OF_PEOPLE = 90_000
+
+
+def count_seat_allocations(action) -> int:
+    """Run an action and count how many Seat objects it creates."""
+    created = 0
+    original_init = table_module.Seat.__init__
+
+    def counting_init(seat) -> None:
+        nonlocal created
+        created += 1
+        original_init(seat)
+
+    table_module.Seat.__init__ = counting_init
+    try:
+        action()
+    finally:
+        table_module.Seat.__init__ = original_init
+    return created
+
+
+def main() -> None:
+    seats = NUMBER_OF_TABLES * TABLE_CAPACITY
+    names = [f"Colleague {i}" for i in range(NUMBER_OF_PEOPLE)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tables = [table_module.Table(TABLE_CAPACITY) for _ in range(NUMBER_OF_TABLES)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tables
+    print(f"Room of {seats} seats")
+    print(f"  bytes per seat (Seat + share of Table): {(after - before) / seats:.1f}")
+
+    openspace = Openspace(NUMBER_OF_TABLES, TABLE_CAPACITY)
+    openspace.organize(names)
+
+    start = time.perf_counter()
+    allocations = count_seat_allocations(lambda: openspace.organize(names))
+    elapsed = time.perf_counter() - start
+    print(f"  Seat objects allocated per organize: {allocations}")
+    print(f"  organize time: {elapsed:.2f}s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        state_file = os.path.join(directory, "state.json")
+        openspace.store_complete_state(state_file)
+        allocations = count_seat_allocations(lambda: openspace.load_complete_state(state_file))
+    print(f"  Seat objects allocated per load_complete_state: {allocations}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Floor layout: KD-tree neighbor queries and proximity-aware organize.
+
+Compares nearest-table queries through the KD-tree with an all-pairs scan,
+then organizes generated workloads with and without a floor layout and
+reports how far apart split whitelists end up.
+
+Run from the repository root:
+
+    python -m benchmarks.table_layout
+"""
+import math
+import random
+import time
+
+from utils.spatial import TableLayout
+from utils.workload import WorkloadGenerator, check_invariants
+
+
+QUERY_SIZES = [1_000, 10_000, 100_000]
+QUERIES = 2_000
+WORKLOADS = [(2_000, 4), (20_000, 8)]
+
+
+def neighbor_queries() -> None:
+    print("nearest 4 tables")
+    for number_of_tables in QUERY_SIZES:
+        layout = TableLayout(columns=int(math.sqrt(number_of_tables)))
+        positions = layout.positions_for(number_of_tables)
+        tree = layout.tree(number_of_tables)
+        rng = random.Random(0)
+        tables = [rng.randrange(number_of_tables) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        for table_idx in tables:
+            tree.nearest(positions[table_idx], 5)
+        tree_time = (time.perf_counter() - start) / QUERIES
+
+        start = time.perf_counter()
+        for table_idx in tables[:20]:
+            x, y = positions[table_idx]
+            sorted(range(number_of_tables), key=lambda other: (positions[other][0] - x) ** 2 + (positions[other][1] - y) ** 2)[:5]
+        scan_time = (time.perf_counter() - start) / 20
+        print(f"  {number_of_tables:>7} tables  KD-tree {tree_time * 1e6:8.1f} us  all-pairs {scan_time * 1e6:10.1f} us")
+
+
+def proximity_organize() -> None:
+    print("organize with and without a floor layout")
+    for people, table_capacity in WORKLOADS:
+        generator = WorkloadGenerator(seed=1)
+        workload = generator.generate(people, table_capacity=table_capacity, whitelist_fraction=0.6,
+                                      random_blacklists=people // 2)
+        names = workload["names"]
+        # Whitelists that cannot all be satisfied at one table
+        workload["preferences"] += [(a, "whitelist", b) for a, b in zip(names[::7], names[3::7])]
+        layout = TableLayout(columns=int(math.sqrt(workload["number_of_tables"])) + 1)
+        for use_layout in (False, True):
+            openspace = generator.build(workload)
+            openspace.layout = layout if use_layout else None
+            random.seed(0)
+            start = time.perf_counter()
+            openspace.organize(names)
+            elapsed = time.perf_counter() - start
+            problems = check_invariants(openspace, names)
+            openspace.layout = layout
+            stats = openspace.get_proximity_stats()
+            status = "ok  " if not problems else "FAIL"
+            print(f"  {status} {people:>6} people  layout {'on ' if use_layout else 'off'}  {elapsed:5.2f}s"
+                  f"  split whitelists {stats['whitelist_split']:>5}  average distance {stats['whitelist_split_average']:6.2f}"
+                  f"  blacklists at neighboring tables {stats['blacklist_adjacent']:>3}")
+            for problem in problems:
+                print(f"     - {problem}")
+
+
+def main() -> None:
+    neighbor_queries()
+    proximity_organize()
+
+
+if __name__ == "__main__":
+    main()
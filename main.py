@@ -1,8 +1,19 @@
 from utils.openspace import Openspace
-from utils.table import Table
-from utils.file_utils import FileUtils
+from utils.file_utils import FileUtils, StateConflictError
+from utils.batch import SeatingBatch
+from utils.renderer import ArrangementRenderer
+from utils.reconcile import RosterReconciler
+from utils.watcher import RosterWatcher
+from utils.history import StateHistory
+from utils.spatial import TableLayout
+from utils.export import ArrangementExporter
+from utils.preferences import DEFAULT_HARD, parse_strength
+from utils.attributes import AttributeConstraint
 import sys
 import os
+import shutil
+import signal
+import time
 
 
 # ANSI color codes
@@ -39,6 +50,70 @@ def clear_terminal() -> None:
     os.system("cls" if os.name == "nt" else "clear")
 
 
+def save_state(openspace: Openspace, state_file: str) -> bool:
+    """
+    Save the state, asking what to do if another session saved it in the meantime.
+
+    :param openspace: The Openspace instance to save.
+    :param state_file: A str path to the state file.
+    :return: True if the state was saved, False if it was reloaded or left unsaved.
+    """
+    try:
+        openspace.store(state_file)
+        return True
+    except StateConflictError as error:
+        print(f"\n{Colors.RED}{error}.{Colors.RESET}")
+        print(f"{Colors.GREEN}r.{Colors.RESET} Reload the other session's state (your changes are lost)")
+        print(f"{Colors.GREEN}o.{Colors.RESET} Overwrite it with this session's state")
+        print(f"{Colors.GREEN}k.{Colors.RESET} Keep working without saving")
+        choice = input("\nEnter your choice (r/o/k): ").strip().lower()
+        if choice == "r":
+            openspace.load_from_file(state_file)
+            print(f"{Colors.YELLOW}Reloaded {state_file} (version {error.current_version}).{Colors.RESET}")
+        elif choice == "o":
+            openspace.store(state_file, force=True)
+            return True
+        else:
+            print(f"{Colors.YELLOW}Changes not saved.{Colors.RESET}")
+        return False
+
+
+def resolve_name(openspace: Openspace, typed: str, new_name_ok: bool = True) -> str | None:
+    """
+    Match a typed name against the known colleagues, ignoring accents and case.
+
+    A single match is used directly; otherwise close matches are offered as a
+    numbered list, so a typo does not create a second person.
+
+    :param openspace: The Openspace instance whose names are searched.
+    :param typed: The name as the user typed it.
+    :param new_name_ok: Whether a name nobody has yet may be used (after confirmation).
+    :return: The name to use, or None if the user cancelled.
+    """
+    index = openspace.get_name_index()
+    if typed in index:
+        return typed
+    matches = index.lookup(typed)
+    if len(matches) == 1:
+        print(f"{Colors.YELLOW}Using '{matches[0]}' for '{typed}'.{Colors.RESET}")
+        return matches[0]
+
+    candidates = index.search(typed)
+    if candidates:
+        print(f"\n'{typed}' is not a known colleague. Did you mean:")
+        for number, candidate in enumerate(candidates, 1):
+            print(f"  {Colors.GREEN}{number}.{Colors.RESET} {candidate}")
+        hint = f", or Enter to use '{typed}' as a new name" if new_name_ok else ", or Enter to cancel"
+        choice = input(f"Choose a number{hint}: ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(candidates):
+            return candidates[int(choice) - 1]
+        return typed if new_name_ok and not choice else None
+    if new_name_ok:
+        return typed
+    confirm = input(f"'{typed}' is not a known colleague. Use this name anyway? (y/n): ")
+    return typed if confirm.lower() == "y" else None
+
+
 def display_statistics_footer(openspace: Openspace) -> None:
     """
     Display statistics footer at the bottom of the screen.
@@ -61,6 +136,65 @@ def display_statistics_footer(openspace: Openspace) -> None:
     print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
 
 
+def display_violations(openspace: Openspace, stats: dict, page_size: int = 20) -> None:
+    """
+    Display the preferences broken by the current arrangement, one page at a time.
+
+    :param openspace: The Openspace instance containing the seating arrangement.
+    :param stats: The preference statistics returned by organize().
+    :param page_size: An int number of violations shown per page.
+    """
+    if stats["whitelist_violated"] == 0 and stats["blacklist_violated"] == 0:
+        return
+
+    print(f"\n{Colors.YELLOW}{'-' * 50}{Colors.RESET}")
+    print(f"{Colors.YELLOW}{Colors.BOLD}PREFERENCE VIOLATIONS:{Colors.RESET}")
+    print(f"{Colors.YELLOW}{'-' * 50}{Colors.RESET}")
+
+    for preference_type in ("whitelist", "blacklist"):
+        total = stats[f"{preference_type}_violated"]
+        if total == 0:
+            continue
+        print(f"\n{preference_type.capitalize()} violations ({total}):")
+        offset = 0
+        while offset < total:
+            page = openspace.get_violations(preference_type, offset=offset, limit=page_size)
+            if not page:
+                break
+            for violation in page:
+                if preference_type == "whitelist":
+                    print(f"  - {violation['person']} wants to sit with {violation['target']} (not at same table)")
+                else:
+                    print(f"  - {violation['person']} wants to avoid {violation['target']} (seated together at table {violation['table']})")
+            offset += len(page)
+            if offset < total:
+                more = input(f"  -- {total - offset} more, press Enter to show more or 'q' to skip: ")
+                if more.strip().lower() == "q":
+                    break
+
+    print(f"{Colors.YELLOW}{'-' * 50}{Colors.RESET}")
+
+
+def display_constraint_violations(openspace: Openspace, limit: int = 20) -> None:
+    """
+    Display the tables that break a table composition rule.
+
+    :param openspace: The Openspace instance containing the seating arrangement.
+    :param limit: An int number of violations shown at most.
+    """
+    violations = openspace.get_constraint_violations()
+    if not violations:
+        return
+    print(f"\n{Colors.YELLOW}Table composition rules not met ({len(violations)}):{Colors.RESET}")
+    for violation in violations[:limit]:
+        print(
+            f"  - Table {violation['table_number']}: {violation['count']} with "
+            f"{violation['value']}, rule is {violation['rule']}"
+        )
+    if len(violations) > limit:
+        print(f"  ... and {len(violations) - limit} more")
+
+
 def display_menu(openspace: Openspace) -> None:
     """
     Display the main menu.
@@ -80,6 +214,11 @@ def display_menu(openspace: Openspace) -> None:
     print(f"{Colors.GREEN}3.{Colors.RESET} Add a colleague (late arrival)")
     print(f"{Colors.GREEN}4.{Colors.RESET} Add a table")
     print(f"{Colors.GREEN}5.{Colors.RESET} Re-organize seating")
+    print(f"{Colors.GREEN}9.{Colors.RESET} Watch colleagues file (auto-seat new arrivals)")
+    undo_label = openspace.get_undo_label()
+    redo_label = openspace.get_redo_label()
+    print(f"{Colors.GREEN}u.{Colors.RESET} Undo" + (f" ({undo_label})" if undo_label else ""))
+    print(f"{Colors.GREEN}r.{Colors.RESET} Redo" + (f" ({redo_label})" if redo_label else ""))
     print(f"\n{Colors.YELLOW}{Colors.BOLD}=== PREFERENCES ==={Colors.RESET}")
     print(
         f"{Colors.GREEN}6.{Colors.RESET} Manage seating preferences (white/blacklist)"
@@ -87,26 +226,31 @@ def display_menu(openspace: Openspace) -> None:
     print(f"\n{Colors.YELLOW}{Colors.BOLD}=== VIEW INFO ==={Colors.RESET}")
     print(f"{Colors.GREEN}7.{Colors.RESET} See current arrangement")
     print(f"{Colors.GREEN}8.{Colors.RESET} See room statistics")
-    print(f"\n{Colors.RED}9.{Colors.RESET} Exit")
+    print(f"{Colors.GREEN}w.{Colors.RESET} Where is ... ? (find a colleague)")
+    print(f"{Colors.GREEN}e.{Colors.RESET} Export arrangement (CSV, JSON Lines, one file per table)")
+    print(f"\n{Colors.RED}0.{Colors.RESET} Exit")
     print(f"{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
 
     display_statistics_footer(openspace)
 
 
-def configure_room(openspace: Openspace) -> bool:
+def configure_room(openspace: Openspace, state_file: str) -> bool:
     """
     Configure room setup.
 
     :param openspace: The Openspace instance to configure.
+    :param state_file: A str path to the state file, saved after restoring a version.
     :return: A bool indicating if room dimensions changed (True) or not (False).
     """
     clear_terminal()
     print(f"\n{Colors.CYAN}{Colors.BOLD}=== ROOM CONFIGURATION ==={Colors.RESET}\n")
     print(f"{Colors.GREEN}1.{Colors.RESET} Change room dimensions")
     print(f"{Colors.GREEN}2.{Colors.RESET} Change input file")
-    print(f"{Colors.GREEN}3.{Colors.RESET} Back to main menu")
+    print(f"{Colors.GREEN}3.{Colors.RESET} Saved versions (restore, prune)")
+    print(f"{Colors.GREEN}4.{Colors.RESET} Floor layout (table grid)")
+    print(f"{Colors.GREEN}5.{Colors.RESET} Back to main menu")
 
-    choice = input("\nEnter your choice (1-3): ")
+    choice = input("\nEnter your choice (1-5): ")
 
     if choice == "1":
         try:
@@ -140,10 +284,140 @@ def configure_room(openspace: Openspace) -> bool:
             print(f"\n{Colors.YELLOW}Input file not changed.{Colors.RESET}")
         input("Press Enter to continue...")
         return False
+    elif choice == "3":
+        history_menu(openspace, state_file)
+        return False
+    elif choice == "4":
+        layout_menu(openspace, state_file)
+        return False
     else:
         return False
 
 
+def layout_menu(openspace: Openspace, state_file: str) -> None:
+    """
+    Set or remove the grid the tables stand on.
+
+    :param openspace: The Openspace instance to configure.
+    :param state_file: A str path to the state file, saved after a change.
+    """
+    if openspace.layout is None:
+        print("\nNo floor layout: tables are not placed next to each other.")
+    else:
+        layout = openspace.layout
+        print(f"\nCurrent layout: {layout.columns} tables per row, {layout.spacing:g} apart"
+              + (f", {len(layout.positions)} tables at custom positions" if layout.positions else ""))
+    columns = input("Tables per row (empty to keep, 0 to remove the layout): ").strip()
+    if not columns:
+        print(f"\n{Colors.YELLOW}Layout not changed.{Colors.RESET}")
+        input("Press Enter to continue...")
+        return
+    try:
+        columns = int(columns)
+        if columns <= 0:
+            openspace.layout = None
+            print(f"\n{Colors.GREEN}Floor layout removed.{Colors.RESET}")
+        else:
+            spacing = input("Distance between neighboring tables (default 1): ").strip()
+            openspace.layout = TableLayout(columns=columns, spacing=float(spacing) if spacing else 1.0)
+            print(f"\n{Colors.GREEN}Tables now stand in rows of {columns}. "
+                  f"Re-organize to seat whitelisted colleagues at neighboring tables.{Colors.RESET}")
+        save_state(openspace, state_file)
+    except ValueError:
+        print(f"\n{Colors.RED}Invalid input! Layout not changed.{Colors.RESET}")
+    input("Press Enter to continue...")
+
+
+def history_menu(openspace: Openspace, state_file: str) -> None:
+    """
+    List the saved versions of the state and restore or prune them.
+
+    :param openspace: The Openspace instance whose history to show.
+    :param state_file: A str path to the state file, saved after restoring a version.
+    """
+    history = openspace.history
+    versions = history.versions() if history is not None else []
+    if not versions:
+        print(f"\n{Colors.YELLOW}No saved versions yet.{Colors.RESET}")
+        input("Press Enter to continue...")
+        return
+
+    print(f"\n{Colors.YELLOW}{Colors.BOLD}=== SAVED VERSIONS ({len(versions)}, "
+          f"{sum(entry['size'] for entry in versions) / 1024:.1f} KiB) ==={Colors.RESET}")
+    for entry in versions[-10:]:
+        saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"]))
+        print(f"Version {Colors.GREEN}{entry['version']:>5}{Colors.RESET}  {saved}  "
+              f"{entry['kind']:<5}  {entry['size']:>8} bytes")
+
+    action = input("\nEnter a version to restore, 'p' to prune, or Enter to go back: ").strip().lower()
+    if action == "p":
+        try:
+            keep_last = int(input("Keep how many recent versions? "))
+        except ValueError:
+            print(f"{Colors.RED}Invalid number!{Colors.RESET}")
+        else:
+            keep_daily = input("Also keep the last version of every day? (y/n): ").strip().lower() == "y"
+            deleted = history.prune(keep_last=keep_last, keep_daily=keep_daily)
+            print(f"{Colors.GREEN}Deleted {len(deleted)} versions.{Colors.RESET}")
+    elif action:
+        try:
+            start = time.perf_counter()
+            openspace.load_state(history.restore(int(action)))
+            elapsed = time.perf_counter() - start
+        except (ValueError, KeyError):
+            print(f"{Colors.RED}No such version!{Colors.RESET}")
+        else:
+            print(f"{Colors.GREEN}Version {action} restored in {elapsed * 1000:.0f} ms.{Colors.RESET}")
+            if save_state(openspace, state_file):
+                print(f"Restored arrangement saved to {state_file}")
+    input("\nPress Enter to continue...")
+
+
+def organize_with_progress(openspace: Openspace, names: list[str], default_budget: float = 2.0) -> dict:
+    """
+    Organize with a time budget asked from the user, showing progress; Ctrl+C stops early.
+
+    The first arrangement is built in full, then improved until the budget is used
+    up or Ctrl+C is pressed; the best arrangement found is kept either way.
+
+    :param openspace: The Openspace instance to organize.
+    :param names: A list of names to seat.
+    :param default_budget: A float number of seconds used when the user just presses Enter.
+    :return: The statistics returned by organize().
+    """
+    answer = input(f"Seconds to spend improving the arrangement (Enter for {default_budget:g}, 0 for none): ").strip()
+    try:
+        budget = max(0.0, float(answer)) if answer else default_budget
+    except ValueError:
+        budget = default_budget
+
+    stop = []
+
+    def on_interrupt(signum, frame) -> None:
+        stop.append(True)
+
+    def report(metrics: dict) -> bool:
+        print(
+            f"\r  {metrics['elapsed_ms'] / 1000:5.1f}s  penalty {metrics['penalty']:.1f}  "
+            f"whitelists broken {metrics['whitelist_violated']}  swaps {metrics['swaps']}  "
+            f"{Colors.YELLOW}(Ctrl+C to stop){Colors.RESET}",
+            end="", flush=True
+        )
+        return bool(stop)
+
+    print(f"{Colors.BLUE}Organizing {len(names)} colleagues...{Colors.RESET}")
+    previous = signal.signal(signal.SIGINT, on_interrupt)
+    try:
+        stats = openspace.organize(names, budget_ms=budget * 1000, progress=report)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    print()
+    if stats["cancelled"]:
+        print(f"{Colors.YELLOW}Stopped early, keeping the best arrangement found.{Colors.RESET}")
+    print(f"Done in {stats['elapsed_ms'] / 1000:.1f}s, {stats['swaps']} improving swap(s)")
+    return stats
+
+
 def organize_seating(openspace: Openspace, state_file: str) -> None:
     """
     Organize initial seating arrangement.
@@ -168,10 +442,14 @@ def organize_seating(openspace: Openspace, state_file: str) -> None:
 
     try:
         colleagues = FileUtils.load_colleagues(input_file)
-        print(f"\n{Colors.BLUE}Loaded {len(colleagues)} colleagues{Colors.RESET}")
+        attribute_count = openspace.load_attributes(input_file)
+        print(f"\n{Colors.BLUE}Loaded {len(colleagues)} colleagues{Colors.RESET}", end="")
+        print(f" ({', '.join(openspace.attributes.attributes())})" if attribute_count else "")
 
-        openspace.organize(colleagues)
-        openspace.store(state_file)
+        stats = organize_with_progress(openspace, colleagues)
+        save_state(openspace, state_file)
+        display_violations(openspace, stats)
+        display_constraint_violations(openspace)
 
         print(
             f"\n{Colors.GREEN}Seating arrangement organized and saved to {state_file}{Colors.RESET}"
@@ -197,12 +475,50 @@ def add_colleague_menu(openspace: Openspace, state_file: str) -> None:
     clear_terminal()
     print(f"\n{Colors.CYAN}{Colors.BOLD}=== ADD COLLEAGUE ==={Colors.RESET}\n")
 
-    name = input("Enter colleague name: ").strip()
-    if not name:
+    names = [name.strip() for name in input("Enter colleague name (or several, separated by commas): ").split(",")]
+    names = [name for name in names if name]
+    if not names:
         print(f"{Colors.RED}Name cannot be empty!{Colors.RESET}")
         input("\nPress Enter to continue...")
         return
 
+    # Catch typos and other spellings of people who are already here
+    resolved = []
+    for typed in names:
+        name = resolve_name(openspace, typed)
+        if name is None:
+            continue
+        location = openspace.find_person(name)
+        if location["status"] == "seated":
+            print(f"{Colors.YELLOW}{name} already sits at table {location['table']}.{Colors.RESET}")
+        elif location["status"] == "unseated":
+            print(f"{Colors.YELLOW}{name} is already on the unseated list.{Colors.RESET}")
+        else:
+            resolved.append(name)
+    names = resolved
+    if not names:
+        input("\nPress Enter to continue...")
+        return
+
+    if len(names) > 1:
+        # Several arrivals: one file write, one consistency pass and one save
+        added = FileUtils.add_colleagues_to_file(openspace.input_file, names)
+        print(f"{Colors.GREEN}{len(added)} colleagues added to {openspace.input_file}{Colors.RESET}")
+        result = SeatingBatch(openspace).add_colleagues(names).commit()
+        save_state(openspace, state_file)
+        not_seated, already_present = result["not_seated"], result["already_present"]
+        seated = len(names) - len(not_seated) - len(already_present)
+        print(f"{Colors.GREEN}{seated} colleagues seated.{Colors.RESET}")
+        if already_present:
+            print(f"{Colors.YELLOW}Already in the room: {', '.join(already_present)}{Colors.RESET}")
+        if not_seated:
+            print(f"{Colors.YELLOW}Added to the unseated list: {', '.join(not_seated)}{Colors.RESET}")
+        print(f"Updated arrangement saved to {state_file}")
+        input("\nPress Enter to continue...")
+        return
+
+    name = names[0]
+
     # Add to input file first
     added_to_file = FileUtils.add_colleague_to_file(openspace.input_file, name)
     if added_to_file:
@@ -213,18 +529,134 @@ def add_colleague_menu(openspace: Openspace, state_file: str) -> None:
     # Try to seat them
     if openspace.add_colleague(name):
         print(f"{Colors.GREEN}{name} has been seated successfully!{Colors.RESET}")
-        openspace.store(state_file)
+        save_state(openspace, state_file)
         print(f"Updated arrangement saved to {state_file}")
     else:
         print(
             f"{Colors.YELLOW}{name} could not be seated (no free seats available).{Colors.RESET}"
         )
         print(f"{name} has been added to the unseated list.")
-        openspace.store(state_file)
+        save_state(openspace, state_file)
 
     input("\nPress Enter to continue...")
 
 
+def watch_colleagues_menu(openspace: Openspace, state_file: str) -> None:
+    """
+    Seat colleagues as they are appended to the input file, until Ctrl+C.
+
+    :param openspace: The Openspace instance to seat new colleagues in.
+    :param state_file: A str path to the state file, saved once per batch of arrivals.
+    """
+    clear_terminal()
+    print(f"\n{Colors.CYAN}{Colors.BOLD}=== WATCH COLLEAGUES FILE ==={Colors.RESET}\n")
+
+    watcher = RosterWatcher(openspace, state_file)
+    try:
+        result = watcher.start()
+    except FileNotFoundError:
+        print(f"{Colors.RED}{openspace.input_file} not found.{Colors.RESET}")
+        input("\nPress Enter to continue...")
+        return
+    except StateConflictError:
+        if not save_state(openspace, state_file):
+            input("\nPress Enter to continue...")
+            return
+        result = {"skipped": True}
+    if not result["skipped"] and result["added"]:
+        print(f"{Colors.YELLOW}{len(result['added'])} colleagues from the file added to the unseated list.{Colors.RESET}")
+
+    def report(batch: dict) -> None:
+        timestamp = time.strftime("%H:%M:%S")
+        if batch["reconciled"]:
+            print(f"[{timestamp}] {Colors.YELLOW}{openspace.input_file} was rewritten, reconciled with the room.{Colors.RESET}")
+            return
+        seated = batch["seated"]
+        shown = ", ".join(seated[:5]) + (f" and {len(seated) - 5} more" if len(seated) > 5 else "")
+        if seated:
+            print(f"[{timestamp}] {Colors.GREEN}Seated {len(seated)}: {shown}{Colors.RESET}")
+        if batch["not_seated"]:
+            print(f"[{timestamp}] {Colors.YELLOW}{len(batch['not_seated'])} could not be seated (unseated list).{Colors.RESET}")
+
+    print(f"Watching {openspace.input_file} for new colleagues. Press Ctrl+C to stop.")
+    try:
+        watcher.run(on_batch=report)
+    except StateConflictError:
+        # The last batch is seated but not saved; let the user decide
+        print(f"\n{Colors.YELLOW}Stopped watching.{Colors.RESET}")
+        save_state(openspace, state_file)
+    except KeyboardInterrupt:
+        print(f"\n{Colors.GREEN}Stopped watching. State saved to {state_file}{Colors.RESET}")
+    input("\nPress Enter to continue...")
+
+
+def undo_redo(openspace: Openspace, state_file: str, redo: bool = False) -> None:
+    """
+    Undo or redo the last seating change and save the result.
+
+    :param openspace: The Openspace instance to change.
+    :param state_file: A str path to the state file.
+    :param redo: True to redo the last undone change instead of undoing.
+    """
+    label = openspace.redo() if redo else openspace.undo()
+    if label is None:
+        print(f"\n{Colors.YELLOW}Nothing to {'redo' if redo else 'undo'}.{Colors.RESET}")
+    else:
+        save_state(openspace, state_file)
+        print(f"\n{Colors.GREEN}{'Redone' if redo else 'Undone'}: {label}{Colors.RESET}")
+    input("\nPress Enter to continue...")
+
+
+def where_is_menu(openspace: Openspace) -> None:
+    """
+    Find where a colleague sits, from part of their name.
+
+    :param openspace: The Openspace instance to search.
+    """
+    clear_terminal()
+    print(f"\n{Colors.CYAN}{Colors.BOLD}=== WHERE IS ... ? ==={Colors.RESET}\n")
+    typed = input("Enter a name, or the beginning of a first or last name: ").strip()
+    if typed:
+        start = time.perf_counter()
+        matches = openspace.get_name_index().search(typed, limit=10)
+        elapsed = time.perf_counter() - start
+        if not matches:
+            print(f"\n{Colors.YELLOW}Nobody matches '{typed}'.{Colors.RESET}")
+        for name in matches:
+            location = openspace.find_person(name)
+            if location["status"] == "seated":
+                print(f"{Colors.GREEN}{name}{Colors.RESET}: table {location['table']}, seat {location['seat']}")
+            elif location["status"] == "unseated":
+                print(f"{Colors.YELLOW}{name}{Colors.RESET}: on the unseated list")
+            else:
+                print(f"{name}: not in the room")
+        print(f"\n({len(openspace.get_name_index())} names searched in {elapsed * 1000:.2f} ms)")
+    input("\nPress Enter to continue...")
+
+
+def export_menu(openspace: Openspace) -> None:
+    """
+    Export the seating arrangement to a file or a directory of per-table files.
+
+    :param openspace: The Openspace instance to export.
+    """
+    clear_terminal()
+    print(f"\n{Colors.CYAN}{Colors.BOLD}=== EXPORT ARRANGEMENT ==={Colors.RESET}\n")
+    print("  name.csv    seating CSV (same format as output.csv)")
+    print("  name.jsonl  JSON Lines, one line per table")
+    print("  directory   one CSV file per table, plus unseated.csv")
+    print("Add .gz to any of them to compress the output.")
+    target = input("\nExport to: ").strip()
+    if target:
+        try:
+            start = time.perf_counter()
+            summary = ArrangementExporter(openspace).export(target)
+            print(f"\n{Colors.GREEN}{summary} in {time.perf_counter() - start:.2f}s{Colors.RESET}")
+        except OSError as e:
+            print(f"\n{Colors.RED}Export failed: {e}{Colors.RESET}")
+    input("\nPress Enter to continue...")
+
+
 def add_table_menu(openspace: Openspace, state_file: str) -> None:
     """
     Add a table to the room.
@@ -245,7 +677,7 @@ def add_table_menu(openspace: Openspace, state_file: str) -> None:
         print(
             f"\n{Colors.GREEN}Table added! New total: {openspace.number_of_tables} tables{Colors.RESET}"
         )
-        openspace.store(state_file)
+        save_state(openspace, state_file)
         print(f"Updated arrangement saved to {state_file}")
     else:
         print(f"\n{Colors.YELLOW}Table not added.{Colors.RESET}")
@@ -253,6 +685,85 @@ def add_table_menu(openspace: Openspace, state_file: str) -> None:
     input("\nPress Enter to continue...")
 
 
+def ask_strength(preference_type: str) -> tuple[float | None, bool | None] | None:
+    """
+    Ask how strong a new preference is and whether it must hold.
+
+    :param preference_type: 'whitelist' or 'blacklist', for the default shown.
+    :return: (weight, hard) as read by parse_strength (None for defaults), or None if the input is invalid.
+    """
+    weight = input("Strength (strong, normal, mild or a number; Enter for normal): ").strip()
+    default = "hard" if DEFAULT_HARD[preference_type] else "soft"
+    hard = input(f"Hard (must hold) or soft (nice to have)? (Enter for {default}): ").strip()
+    try:
+        return parse_strength(weight, hard)
+    except ValueError as e:
+        print(f"\n{Colors.RED}{e}{Colors.RESET}")
+        return None
+
+
+def describe_targets(entries: list) -> str:
+    """
+    Format the targets of one person's preferences, with their strength when it is not the default.
+
+    :param entries: targets as returned by Preferences.state_items.
+    :return: a comma-separated str.
+    """
+    return ", ".join(
+        entry if isinstance(entry, str) else
+        f"{entry['name']} (weight {entry['weight']:g}, {'hard' if entry['hard'] else 'soft'})"
+        for entry in entries
+    )
+
+
+def constraints_menu(openspace: Openspace, state_file: str) -> None:
+    """
+    List, add and remove the table composition rules organize enforces.
+
+    :param openspace: The Openspace instance to manage rules for.
+    :param state_file: A str path to the state file for saving the rules.
+    """
+    print(f"\n{Colors.YELLOW}{Colors.BOLD}=== TABLE COMPOSITION RULES ==={Colors.RESET}")
+    attributes = openspace.attributes.attributes()
+    if attributes:
+        print(f"Roster columns: {', '.join(attributes)}")
+    else:
+        print("The colleagues file has no extra columns (add e.g. a 'name,team,role' header row).")
+    if openspace.constraints:
+        for i, constraint in enumerate(openspace.constraints, 1):
+            print(f"{Colors.GREEN}{i}.{Colors.RESET} {constraint.describe()}")
+    else:
+        print("No rules set.")
+
+    action = input("\n(a) at most N per table, (m) at least N per table, (r) remove, Enter to go back: ").strip().lower()
+    try:
+        if action in ("a", "m"):
+            attribute = input("Column (e.g. team): ").strip()
+            if attribute not in openspace.attributes:
+                print(f"\n{Colors.RED}Unknown column '{attribute}'{Colors.RESET}")
+                return
+            value = input("Value (Enter for every value separately): " if action == "a" else "Value (e.g. senior): ")
+            value = value.strip() or None
+            limit = int(input("How many per table? ").strip())
+            if action == "a":
+                constraint = AttributeConstraint(attribute, value, max_per_table=limit)
+            else:
+                constraint = AttributeConstraint(attribute, value, min_per_table=limit)
+            openspace.add_constraint(constraint)
+            save_state(openspace, state_file)
+            print(f"\n{Colors.GREEN}Rule added: {constraint.describe()}{Colors.RESET}")
+            print("It applies from the next organize.")
+        elif action == "r":
+            removed = openspace.remove_constraint(int(input("Rule number: ").strip()) - 1)
+            if removed is None:
+                print(f"\n{Colors.RED}No such rule{Colors.RESET}")
+                return
+            save_state(openspace, state_file)
+            print(f"\n{Colors.GREEN}Rule removed: {removed.describe()}{Colors.RESET}")
+    except ValueError as e:
+        print(f"\n{Colors.RED}Invalid input: {e}{Colors.RESET}")
+
+
 def manage_preferences(openspace: Openspace, state_file: str) -> None:
     """
     Manage seating preferences.
@@ -265,16 +776,21 @@ def manage_preferences(openspace: Openspace, state_file: str) -> None:
     print(f"{Colors.GREEN}1.{Colors.RESET} Add whitelist preference (sit with someone)")
     print(f"{Colors.GREEN}2.{Colors.RESET} Add blacklist preference (avoid someone)")
     print(f"{Colors.GREEN}3.{Colors.RESET} View current preferences")
-    print(f"{Colors.GREEN}4.{Colors.RESET} Back to main menu")
+    print(f"{Colors.GREEN}4.{Colors.RESET} Import preferences from file (CSV/JSONL)")
+    print(f"{Colors.GREEN}5.{Colors.RESET} Table composition rules (team, role, ...)")
+    print(f"{Colors.GREEN}6.{Colors.RESET} Back to main menu")
 
-    choice = input("\nEnter your choice (1-4): ")
+    choice = input("\nEnter your choice (1-6): ")
 
     if choice == "1":
         person = input("\nEnter person name: ").strip()
-        target = input("Enter who they want to sit with: ").strip()
-        if person and target:
-            openspace.set_preference(person, "whitelist", target)
-            openspace.store(state_file)
+        person = resolve_name(openspace, person, new_name_ok=False) if person else None
+        target = input("Enter who they want to sit with: ").strip() if person else ""
+        target = resolve_name(openspace, target, new_name_ok=False) if target else None
+        strength = ask_strength("whitelist") if person and target else None
+        if person and target and strength:
+            openspace.set_preference(person, "whitelist", target, *strength)
+            save_state(openspace, state_file)
             print(
                 f"\n{Colors.GREEN}Preference added: {person} wants to sit with {target}{Colors.RESET}"
             )
@@ -283,10 +799,13 @@ def manage_preferences(openspace: Openspace, state_file: str) -> None:
             print(f"\n{Colors.RED}Invalid input!{Colors.RESET}")
     elif choice == "2":
         person = input("\nEnter person name: ").strip()
-        target = input("Enter who they want to avoid: ").strip()
-        if person and target:
-            openspace.set_preference(person, "blacklist", target)
-            openspace.store(state_file)
+        person = resolve_name(openspace, person, new_name_ok=False) if person else None
+        target = input("Enter who they want to avoid: ").strip() if person else ""
+        target = resolve_name(openspace, target, new_name_ok=False) if target else None
+        strength = ask_strength("blacklist") if person and target else None
+        if person and target and strength:
+            openspace.set_preference(person, "blacklist", target, *strength)
+            save_state(openspace, state_file)
             print(
                 f"\n{Colors.GREEN}Preference added: {person} wants to avoid {target}{Colors.RESET}"
             )
@@ -295,24 +814,50 @@ def manage_preferences(openspace: Openspace, state_file: str) -> None:
             print(f"\n{Colors.RED}Invalid input!{Colors.RESET}")
     elif choice == "3":
         print(f"\n{Colors.YELLOW}{Colors.BOLD}=== WHITELIST ==={Colors.RESET}")
-        if openspace.preferences["whitelist"]:
-            for person, targets in openspace.preferences["whitelist"].items():
+        if openspace.preferences.edge_count("whitelist"):
+            for person, targets in openspace.preferences.state_items("whitelist"):
                 print(
-                    f"{Colors.GREEN}{person}{Colors.RESET} wants to sit with: {', '.join(targets)}"
+                    f"{Colors.GREEN}{person}{Colors.RESET} wants to sit with: {describe_targets(targets)}"
                 )
         else:
             print("No whitelist preferences set.")
 
         print(f"\n{Colors.YELLOW}{Colors.BOLD}=== BLACKLIST ==={Colors.RESET}")
-        if openspace.preferences["blacklist"]:
-            for person, targets in openspace.preferences["blacklist"].items():
+        if openspace.preferences.edge_count("blacklist"):
+            for person, targets in openspace.preferences.state_items("blacklist"):
                 print(
-                    f"{Colors.RED}{person}{Colors.RESET} wants to avoid: {', '.join(targets)}"
+                    f"{Colors.RED}{person}{Colors.RESET} wants to avoid: {describe_targets(targets)}"
                 )
         else:
             print("No blacklist preferences set.")
+    elif choice == "4":
+        print("\nEach row holds: person, type (whitelist/blacklist), target, and optionally")
+        print("a weight (strong/normal/mild or a number) and hard/soft")
+        filename = input("Enter preference file path: ").strip()
+        try:
+            start = time.perf_counter()
+            result = openspace.import_preferences(filename, openspace.get_roster())
+            elapsed = time.perf_counter() - start
+            save_state(openspace, state_file)
+            print(
+                f"\n{Colors.GREEN}Imported {result['added']} preferences in {elapsed:.2f}s{Colors.RESET}"
+                f" ({result['duplicates']} already known)"
+            )
+            if result["rejected"]:
+                print(f"{Colors.YELLOW}{len(result['rejected'])} rows rejected:{Colors.RESET}")
+                for row_number, reason in result["rejected"][:10]:
+                    print(f"  - row {row_number}: {reason}")
+                if len(result["rejected"]) > 10:
+                    print(f"  ... and {len(result['rejected']) - 10} more")
+            print(f"Preferences saved to {state_file}")
+        except FileNotFoundError:
+            print(f"\n{Colors.RED}Error: File '{filename}' not found!{Colors.RESET}")
+        except ValueError as e:
+            print(f"\n{Colors.RED}Error: could not parse '{filename}': {e}{Colors.RESET}")
+    elif choice == "5":
+        constraints_menu(openspace, state_file)
 
-    if choice in ["1", "2", "3"]:
+    if choice in ["1", "2", "3", "4", "5"]:
         input("\nPress Enter to continue...")
 
 
@@ -337,6 +882,45 @@ def show_statistics(openspace: Openspace) -> None:
     print(f"{Colors.YELLOW}Available seats:{Colors.RESET}   {available_seats}")
     print(f"{Colors.MAGENTA}People alone:{Colors.RESET}      {people_alone}")
 
+    histogram = openspace.get_occupancy_histogram()
+    print(f"\n{Colors.BLUE}Tables by occupancy:{Colors.RESET}")
+    for occupants, table_count in enumerate(histogram):
+        if table_count:
+            print(f"  {occupants} seated: {table_count} table(s)")
+
+    preference_stats = openspace.get_preference_stats()
+    if any(preference_stats.values()):
+        print(f"\n{Colors.BLUE}Preferences:{Colors.RESET}")
+        print(
+            f"  Whitelist: {Colors.GREEN}{preference_stats['whitelist_satisfied']} satisfied{Colors.RESET}, "
+            f"{Colors.RED}{preference_stats['whitelist_violated']} violated{Colors.RESET}"
+        )
+        print(
+            f"  Blacklist: {Colors.GREEN}{preference_stats['blacklist_satisfied']} satisfied{Colors.RESET}, "
+            f"{Colors.RED}{preference_stats['blacklist_violated']} violated{Colors.RESET}"
+        )
+        score = openspace.get_score()
+        print(
+            f"  Weighted penalty: {score['weighted_violations']:.1f}"
+            f" ({Colors.RED if score['hard_violated'] else Colors.GREEN}{score['hard_violated']} hard "
+            f"preference(s) broken{Colors.RESET})"
+        )
+
+    proximity_stats = openspace.get_proximity_stats()
+    if proximity_stats is not None and any(proximity_stats.values()):
+        print(f"\n{Colors.BLUE}Floor layout:{Colors.RESET}")
+        print(
+            f"  Whitelists split across tables: {proximity_stats['whitelist_split']}"
+            f" (average distance {proximity_stats['whitelist_split_average']:.1f})"
+        )
+        print(f"  Blacklists at neighboring tables: {proximity_stats['blacklist_adjacent']}")
+
+    if openspace.constraints:
+        violations = openspace.get_constraint_violations()
+        color = Colors.RED if violations else Colors.GREEN
+        print(f"\n{Colors.BLUE}Table composition rules:{Colors.RESET} {len(openspace.constraints)}, "
+              f"{color}{len(violations)} table(s) not meeting them{Colors.RESET}")
+
     if openspace.unseated:
         print(
             f"\n{Colors.RED}Unseated people:{Colors.RESET}   {len(openspace.unseated)}"
@@ -351,27 +935,67 @@ def show_statistics(openspace: Openspace) -> None:
 
 def show_arrangement(openspace: Openspace) -> None:
     """
-    Display current seating arrangement.
+    Display current seating arrangement, one screen of tables at a time.
 
     :param openspace: The Openspace instance containing the seating arrangement.
     """
-    clear_terminal()
-    print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
-    print(f"{Colors.CYAN}{Colors.BOLD}CURRENT SEATING ARRANGEMENT{Colors.RESET}")
-    print(f"{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}\n")
+    rows_per_table = openspace.table_capacity + 2
+    page_size = max(1, (shutil.get_terminal_size().lines - 12) // rows_per_table)
+    renderer = ArrangementRenderer(openspace, page_size)
 
-    openspace.display()
+    page = 0
+    filters = {"table": None, "person": None, "free_only": False}
 
-    # Display unseated people if any
-    if openspace.unseated:
-        print(f"\n{Colors.RED}{Colors.BOLD}UNSEATED COLLEAGUES:{Colors.RESET}")
-        print(f"{Colors.RED}{'=' * 50}{Colors.RESET}")
-        for name in openspace.unseated:
-            print(f"{Colors.RED}  - {name}{Colors.RESET}")
-        print(f"{Colors.RED}{'=' * 50}{Colors.RESET}")
+    while True:
+        clear_terminal()
+        print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
+        print(f"{Colors.CYAN}{Colors.BOLD}CURRENT SEATING ARRANGEMENT{Colors.RESET}")
+        print(f"{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}\n")
+
+        pages = renderer.page_count(**filters)
+        page = min(page, pages - 1)
+        print(renderer.render_page(page, **filters))
+
+        # Display unseated people if any
+        if openspace.unseated:
+            print(f"\n{Colors.RED}{Colors.BOLD}UNSEATED COLLEAGUES: {len(openspace.unseated)}{Colors.RESET}")
+            for name in openspace.unseated[:5]:
+                print(f"{Colors.RED}  - {name}{Colors.RESET}")
+            if len(openspace.unseated) > 5:
+                print(f"{Colors.RED}  ... and {len(openspace.unseated) - 5} more{Colors.RESET}")
+
+        print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
+        print(f"Page {page + 1}/{pages}")
+        command = input(
+            "[n]ext, [p]revious, [t] <number> table, [f] <name> find, [free] free seats, [a]ll, [q]uit: "
+        ).strip()
 
-    print(f"\n{Colors.CYAN}{Colors.BOLD}{'=' * 50}{Colors.RESET}")
-    input("\nPress Enter to continue...")
+        if command in ("", "n"):
+            if page + 1 >= pages:
+                break
+            page += 1
+        elif command == "p":
+            page = max(0, page - 1)
+        elif command.startswith("t "):
+            try:
+                filters = {"table": int(command[2:]), "person": None, "free_only": False}
+                page = 0
+            except ValueError:
+                pass
+        elif command.startswith("f "):
+            typed = command[2:].strip()
+            # Accept other spellings and the beginning of a name
+            matches = [typed] if typed in openspace.get_name_index() else openspace.get_name_index().search(typed, 1)
+            filters = {"table": None, "person": matches[0] if matches else typed, "free_only": False}
+            page = 0
+        elif command == "free":
+            filters = {"table": None, "person": None, "free_only": True}
+            page = 0
+        elif command == "a":
+            filters = {"table": None, "person": None, "free_only": False}
+            page = 0
+        elif command == "q":
+            break
 
 
 def main() -> None:
@@ -383,33 +1007,38 @@ def main() -> None:
     """
 
     STATE_FILE = "openspace_state.json"
+    HISTORY_DIR = "openspace_history"
 
     # Try to load existing state
     openspace = Openspace(6, 4)  # Default values
+    openspace.history = StateHistory(HISTORY_DIR)
     state_loaded = openspace.load_from_file(STATE_FILE)
 
     if state_loaded:
-        # Try to load all colleagues and check who isn't seated yet
+        # Bring the saved room in line with the colleagues file
         try:
-            all_colleagues = FileUtils.load_colleagues(openspace.input_file)
-
-            # Get currently seated people
-            seated_people = set()
-            for table in openspace.tables:
-                for seat in table.seats:
-                    if not seat.free:
-                        seated_people.add(seat.occupant)
-
-            # Add people who aren't seated to unseated list
-            for colleague in all_colleagues:
-                if colleague not in seated_people and colleague not in openspace.unseated:
-                    openspace.unseated.append(colleague)
+            result = RosterReconciler(openspace).reconcile()
+            if result["skipped"]:
+                print(f"Colleagues file unchanged since last session ({result['elapsed'] * 1000:.1f} ms)")
+            else:
+                openspace.load_attributes()
+                print(
+                    f"Reconciled colleagues file in {result['elapsed'] * 1000:.1f} ms: "
+                    f"{len(result['added'])} new, {result['present']} present, "
+                    f"{len(result['removed'])} no longer listed"
+                )
+                # Save the fingerprint so an unchanged file is skipped next time
+                save_state(openspace, STATE_FILE)
 
             print(f"Loaded existing session from {STATE_FILE}")
         except FileNotFoundError:
             pass  # No colleagues file yet, that's okay
     else:
         print(f"No previous session found. Starting fresh.")
+        try:
+            openspace.load_attributes()
+        except FileNotFoundError:
+            pass
 
     clear_terminal()
     print(
@@ -419,15 +1048,15 @@ def main() -> None:
     while True:
         display_menu(openspace)
         choice = input(
-            f"\n{Colors.CYAN}Enter your choice (1-9): {Colors.RESET}"
-        ).strip()
+            f"\n{Colors.CYAN}Enter your choice (0-9, u, r, w, e): {Colors.RESET}"
+        ).strip().lower()
 
         if choice == "1":
-            config_changed = configure_room(openspace)
+            config_changed = configure_room(openspace, STATE_FILE)
             # Recreate openspace if configuration changed
             if config_changed:
                 print(f"\n{Colors.YELLOW}Room dimensions changed. Recreating tables...{Colors.RESET}")
-                openspace.tables = [Table(openspace.table_capacity) for _ in range(openspace.number_of_tables)]
+                openspace.resize(openspace.number_of_tables, openspace.table_capacity)
 
                 # Try to migrate people from old arrangement if it exists
                 try:
@@ -440,7 +1069,7 @@ def main() -> None:
                     print(f"{Colors.GREEN}New openspace created with {openspace.number_of_tables} tables of capacity {openspace.table_capacity}{Colors.RESET}")
 
                 # Save the new configuration
-                openspace.store(STATE_FILE)
+                save_state(openspace, STATE_FILE)
                 input("\nPress Enter to continue...")
 
         elif choice == "2":
@@ -471,8 +1100,10 @@ def main() -> None:
                 all_people.extend(openspace.unseated)
 
                 # Re-organize
-                openspace.organize(all_people)
-                openspace.store(STATE_FILE)
+                stats = organize_with_progress(openspace, all_people)
+                save_state(openspace, STATE_FILE)
+                display_violations(openspace, stats)
+                display_constraint_violations(openspace)
                 print(
                     f"\n{Colors.GREEN}Seating re-organized and saved to {STATE_FILE}{Colors.RESET}"
                 )
@@ -490,8 +1121,20 @@ def main() -> None:
             show_statistics(openspace)
 
         elif choice == "9":
+            watch_colleagues_menu(openspace, STATE_FILE)
+
+        elif choice == "w":
+            where_is_menu(openspace)
+
+        elif choice == "e":
+            export_menu(openspace)
+
+        elif choice in ("u", "r"):
+            undo_redo(openspace, STATE_FILE, redo=choice == "r")
+
+        elif choice == "0":
             # Save state before exiting
-            openspace.store(STATE_FILE)
+            save_state(openspace, STATE_FILE)
             clear_terminal()
             print(
                 f"\n{Colors.GREEN}{Colors.BOLD}Thank you for using the Openspace Seating Organizer!{Colors.RESET}"
@@ -501,7 +1144,7 @@ def main() -> None:
 
         else:
             print(
-                f"\n{Colors.RED}Invalid choice. Please enter a number between 1 and 9.{Colors.RESET}"
+                f"\n{Colors.RED}Invalid choice. Please enter a number between 0 and 9, u, r, w or e.{Colors.RESET}"
             )
             input("Press Enter to continue...")
 
@@ -519,12 +1162,18 @@ if __name__ == "__main__":
 3. Add a colleague (late arrival)
 4. Add a table
 5. Re-organize seating
+9. Watch colleagues file (auto-seat new arrivals)
+u. Undo the last change
+r. Redo the last undone change
 
 === PREFERENCES ===
-6. Manage seating preferences (white/blacklist)
+6. Manage seating preferences (white/blacklist, table composition rules)
 
 === VIEW INFO ===
 7. See current arrangement
 8. See room statistics
-9. Exit
+w. Where is ... ? (find a colleague)
+e. Export arrangement (CSV, JSON Lines, one file per table; .gz to compress)
+
+0. Exit
 """
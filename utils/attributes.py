@@ -0,0 +1,192 @@
+from array import array
+from typing import Iterable, Iterator
+
+from utils.interner import NameInterner
+
+
+class AttributeStore:
+    """Extra roster columns (team, language, role, ...) per person, stored compactly.
+
+    Every attribute is a column of small integer codes indexed by the person's
+    interned id, with -1 for "no value"; the distinct values of a column are
+    kept once, in the order they were first seen. Looking up the value code of
+    a person is one array access.
+
+    :attr interner (NameInterner): maps names to the ids indexing the columns."""
+
+    MISSING = -1
+
+    def __init__(self, interner: NameInterner) -> None:
+        self.interner: NameInterner = interner
+        self._columns: dict[str, array] = {}
+        self._values: dict[str, list[str]] = {}
+        self._codes: dict[str, dict[str, int]] = {}
+
+    def attributes(self) -> list[str]:
+        """Returns the attribute names, in the order they were added."""
+        return list(self._columns)
+
+    def values(self, attribute: str) -> list[str]:
+        """Returns the distinct values of an attribute; a value's position is its code."""
+        return list(self._values.get(attribute, ()))
+
+    def __contains__(self, attribute: str) -> bool:
+        return attribute in self._columns
+
+    def value_code(self, attribute: str, value: str) -> int:
+        """Returns the code of a value, or MISSING if nobody has it."""
+        return self._codes.get(attribute, {}).get(value, self.MISSING)
+
+    def code(self, person_id: int, attribute: str) -> int:
+        """Returns the value code of a person by interned id, or MISSING.
+
+        :param person_id: interned id of the person.
+        :param attribute: attribute name.
+        :return: index into values(attribute), or MISSING."""
+        column = self._columns.get(attribute)
+        if column is None or person_id >= len(column):
+            return self.MISSING
+        return column[person_id]
+
+    def get(self, person: str, attribute: str) -> str | None:
+        """Returns a person's value of an attribute.
+
+        :return: the value, or None if the person has none."""
+        person_id = self.interner.get(person)
+        code = self.MISSING if person_id is None else self.code(person_id, attribute)
+        return None if code == self.MISSING else self._values[attribute][code]
+
+    def set(self, person: str, attribute: str, value: str | None) -> None:
+        """Sets (or with None or "", clears) a person's value of an attribute.
+
+        :return: None"""
+        column = self._columns.get(attribute)
+        if column is None:
+            if not value:
+                return
+            column = self._columns[attribute] = array("l")
+            self._values[attribute] = []
+            self._codes[attribute] = {}
+        person_id = self.interner.intern(person)
+        if person_id >= len(column):
+            column.extend([self.MISSING] * (len(self.interner.names) - len(column)))
+        if not value:
+            column[person_id] = self.MISSING
+            return
+        code = self._codes[attribute].get(value)
+        if code is None:
+            code = self._codes[attribute][value] = len(self._values[attribute])
+            self._values[attribute].append(value)
+        column[person_id] = code
+
+    def update_rows(self, attributes: list[str], rows: Iterable[tuple[str, list[str]]]) -> int:
+        """Sets many people's values at once, e.g. from a roster file.
+
+        :param attributes: attribute names, one per value column.
+        :param rows: (person, values) pairs, values in the order of attributes.
+        :return: number of people updated."""
+        count = 0
+        for person, values in rows:
+            for attribute, value in zip(attributes, values):
+                self.set(person, attribute, value.strip())
+            count += 1
+        return count
+
+    def items(self, attribute: str) -> Iterator[tuple[str, str]]:
+        """Iterates over everyone with a value of an attribute.
+
+        :return: iterator of (person, value)."""
+        names = self.interner.names
+        values = self._values.get(attribute, ())
+        for person_id, code in enumerate(self._columns.get(attribute, ())):
+            if code != self.MISSING:
+                yield names[person_id], values[code]
+
+    def copy(self) -> "AttributeStore":
+        """Returns an independent copy sharing the same interner."""
+        store = AttributeStore(self.interner)
+        store._columns = {attribute: array("l", column) for attribute, column in self._columns.items()}
+        store._values = {attribute: values.copy() for attribute, values in self._values.items()}
+        store._codes = {attribute: codes.copy() for attribute, codes in self._codes.items()}
+        return store
+
+    def to_dict(self) -> dict:
+        """Converts the attributes to the JSON layout of the state file.
+
+        :return: dict of {attribute: {person: value}}."""
+        return {attribute: dict(self.items(attribute)) for attribute in self._columns}
+
+    @classmethod
+    def from_dict(cls, data: dict, interner: NameInterner) -> "AttributeStore":
+        """Builds the store from the JSON layout of the state file.
+
+        :param data: dict of {attribute: {person: value}}.
+        :param interner: interner to share.
+        :return: the loaded store."""
+        store = cls(interner)
+        for attribute, people in data.items():
+            for person, value in people.items():
+                store.set(person, attribute, value)
+        return store
+
+
+class AttributeConstraint:
+    """A rule on how many people with an attribute value may or must sit at each table.
+
+    "At most 2 people from the same team per table" is
+    AttributeConstraint("team", max_per_table=2); "at least one senior per
+    table" is AttributeConstraint("role", "senior", min_per_table=1). Empty
+    tables never violate a minimum.
+
+    :attr attribute (str): the attribute the rule is about.
+    :attr value (str | None): the value it applies to, or None for every value separately.
+    :attr max_per_table (int | None): most people with the value at one table.
+    :attr min_per_table (int | None): fewest people with the value at every occupied table."""
+
+    def __init__(self, attribute: str, value: str | None = None, max_per_table: int | None = None,
+                 min_per_table: int | None = None) -> None:
+        if max_per_table is None and min_per_table is None:
+            raise ValueError("a constraint needs max_per_table or min_per_table")
+        if max_per_table is not None and max_per_table < 1:
+            raise ValueError("max_per_table must be at least 1")
+        if min_per_table is not None and min_per_table < 1:
+            raise ValueError("min_per_table must be at least 1")
+        if min_per_table is not None and value is None:
+            raise ValueError("min_per_table needs a value, e.g. role=senior")
+        self.attribute: str = attribute
+        self.value: str | None = value
+        self.max_per_table: int | None = max_per_table
+        self.min_per_table: int | None = min_per_table
+
+    def applies_to(self, value_code: int, store: AttributeStore) -> bool:
+        """Checks whether a person's value code falls under the rule."""
+        if value_code == AttributeStore.MISSING:
+            return False
+        return self.value is None or store.value_code(self.attribute, self.value) == value_code
+
+    def describe(self) -> str:
+        """Returns the rule in words, e.g. "at most 2 per table with the same team"."""
+        subject = f"{self.attribute}={self.value}" if self.value is not None else f"the same {self.attribute}"
+        parts = []
+        if self.max_per_table is not None:
+            parts.append(f"at most {self.max_per_table}")
+        if self.min_per_table is not None:
+            parts.append(f"at least {self.min_per_table}")
+        return f"{' and '.join(parts)} per table with {subject}"
+
+    def to_dict(self) -> dict:
+        """Rule as stored in the state file config."""
+        rule = {"attribute": self.attribute, "value": self.value}
+        if self.max_per_table is not None:
+            rule["max_per_table"] = self.max_per_table
+        if self.min_per_table is not None:
+            rule["min_per_table"] = self.min_per_table
+        return rule
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AttributeConstraint":
+        """Rule from a state file or config.json "constraints" entry.
+
+        :param data: dict with "attribute", and "value", "max_per_table" and/or "min_per_table".
+        :return: the AttributeConstraint."""
+        return cls(data["attribute"], data.get("value"), data.get("max_per_table"), data.get("min_per_table"))
@@ -0,0 +1,117 @@
+from typing import Iterable
+
+from utils.openspace import Openspace
+
+
+class SeatingBatch:
+    """Collects many changes and applies them to an openspace in one go.
+
+    Operations are queued and run on commit() (or when the with-block ends) in
+    the order they were added. While they run, only the person -> table map is
+    kept current; statistics and preference tracking are rebuilt once at the
+    end, and the state is saved once. If any operation fails, the openspace is
+    restored to where it was before the batch. A committed batch is undone as
+    one step (removing tables cannot be undone, see Openspace.undo).
+
+    Usage:
+        with SeatingBatch(openspace, "openspace_state.json") as batch:
+            batch.add_colleagues(new_hires)
+            batch.set_preferences(rows)
+
+    :attr openspace (Openspace): the openspace to change.
+    :attr state_file (str | None): where to save the state after the batch (default: don't save)."""
+
+    def __init__(self, openspace: Openspace, state_file: str | None = None) -> None:
+        self.openspace: Openspace = openspace
+        self.state_file: str | None = state_file
+        self._operations: list[tuple[str, object]] = []
+
+    def add_colleagues(self, names: Iterable[str]) -> "SeatingBatch":
+        """Queue colleagues to seat (or to add to the unseated list if there is no room)."""
+        self._operations.append(("add_colleagues", list(names)))
+        return self
+
+    def remove_colleagues(self, names: Iterable[str]) -> "SeatingBatch":
+        """Queue colleagues to remove from the room."""
+        self._operations.append(("remove_colleagues", list(names)))
+        return self
+
+    def add_tables(self, count: int = 1) -> "SeatingBatch":
+        """Queue new empty tables."""
+        self._operations.append(("add_tables", count))
+        return self
+
+    def remove_tables(self, table_numbers: Iterable[int]) -> "SeatingBatch":
+        """Queue tables to remove, by 1-based number as shown to the user."""
+        self._operations.append(("remove_tables", list(table_numbers)))
+        return self
+
+    def set_preferences(self, rows: Iterable[tuple[str, str, str]]) -> "SeatingBatch":
+        """Queue (person, type, target) preferences."""
+        self._operations.append(("set_preferences", list(rows)))
+        return self
+
+    def commit(self) -> dict:
+        """Apply every queued operation, rebuild the statistics once and save once.
+
+        :return: dict with the people not seated, the people already in the room
+            (not added again), the names not found on removal, the people
+            displaced by removed tables and the preference import result."""
+        openspace = self.openspace
+        operations, self._operations = self._operations, []
+        result = {"not_seated": [], "already_present": [], "not_found": [], "displaced": [], "preferences": None}
+        if not operations:
+            return result
+
+        # Copy-on-write snapshot to roll back to if an operation fails
+        ownership = (openspace._owned_tables, openspace._shared_preferences, openspace._shared_attributes)
+        snapshot = openspace.fork()
+        with openspace._undoable("batch"):
+            openspace._deferred_tracking = True
+            try:
+                for operation, argument in operations:
+                    if operation == "add_colleagues":
+                        unseated = set(openspace.unseated)
+                        present = {name for name in argument
+                                   if name in openspace._person_tables or name in unseated}
+                        for name in openspace.add_colleagues(argument):
+                            result["already_present" if name in present else "not_seated"].append(name)
+                    elif operation == "remove_colleagues":
+                        result["not_found"].extend(openspace.remove_colleagues(argument))
+                    elif operation == "add_tables":
+                        for _ in range(argument):
+                            openspace.add_table()
+                    elif operation == "remove_tables":
+                        result["displaced"].extend(openspace.remove_tables(argument))
+                    elif operation == "set_preferences":
+                        result["preferences"] = openspace._preferences_for_write().import_rows(
+                            argument, added_rows=openspace._journal["preferences"])
+            except Exception:
+                # The snapshot has no history of its own; the live room keeps its own
+                history = openspace.history
+                openspace.__dict__.update(snapshot.__dict__)
+                openspace.history = history
+                raise
+            finally:
+                openspace._deferred_tracking = False
+            # The snapshot is dropped, so whatever it still shares belongs to the openspace again
+            del snapshot
+            owned_tables, shared_preferences, shared_attributes = ownership
+            if owned_tables is None:
+                openspace._owned_tables = None
+            openspace._shared_preferences = openspace._shared_preferences and shared_preferences
+            openspace._shared_attributes = openspace._shared_attributes and shared_attributes
+            openspace._rebuild_tracking()
+
+        if self.state_file is not None:
+            openspace.store(self.state_file)
+        return result
+
+    def __enter__(self) -> "SeatingBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self._operations = []
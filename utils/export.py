@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+
+from utils.file_utils import FileUtils
+
+
+class ArrangementExporter:
+    """Writes the seating arrangement of an openspace to disk, one table at a time.
+
+    Nothing is collected before writing: every format is produced straight
+    from the tables, so memory use does not grow with the size of the room.
+    A file name ending in .gz is gzip-compressed while it is written. Every
+    file is replaced atomically (see FileUtils.open_atomic).
+
+    :attr openspace (Openspace): the openspace to export."""
+
+    def __init__(self, openspace) -> None:
+        self.openspace = openspace
+
+    @staticmethod
+    def _compressed(filename: str) -> bool:
+        return filename.endswith(".gz")
+
+    def to_csv(self, filename: str) -> int:
+        """Export in the seating CSV format read by Openspace.load_from_file.
+
+        :param filename: path of the CSV file (.csv or .csv.gz).
+        :return: number of rows written, without the header."""
+        rows = 0
+
+        def counted():
+            nonlocal rows
+            for row in self.openspace.iter_seating_rows():
+                rows += 1
+                yield row
+
+        FileUtils.store_seating(filename, counted(), compress=self._compressed(filename))
+        return rows
+
+    def to_jsonl(self, filename: str) -> int:
+        """Export as JSON Lines: one line per table, then one line per unseated colleague.
+
+        Table lines look like {"table_number": 1, "seats": ["Anna", null, ...]}
+        (null for a free seat); unseated lines like {"unseated": "Bob"}.
+
+        :param filename: path of the file (.jsonl or .jsonl.gz).
+        :return: number of lines written."""
+        lines = 0
+        with FileUtils.open_atomic(filename, newline="\n", compress=self._compressed(filename)) as file:
+            for i, table in enumerate(self.openspace.tables):
+                seats = [seat.occupant if not seat.free else None for seat in table.seats]
+                file.write(json.dumps({"table_number": i + 1, "seats": seats}, ensure_ascii=False) + "\n")
+                lines += 1
+            for name in self.openspace.unseated:
+                file.write(json.dumps({"unseated": name}, ensure_ascii=False) + "\n")
+                lines += 1
+        return lines
+
+    def to_table_files(self, directory: str, compress: bool = False) -> list[str]:
+        """Export one CSV file per table (table_001.csv, ...) plus unseated.csv.
+
+        Each table file lists its seats as "Seat Number,Occupant" rows; unseated.csv
+        has one "Name" column and is written even when nobody is unseated.
+
+        :param directory: where to write the files (created if missing).
+        :param compress: gzip the files and add .gz to their names.
+        :return: paths of the written files."""
+        os.makedirs(directory, exist_ok=True)
+        suffix = ".csv.gz" if compress else ".csv"
+        width = max(3, len(str(len(self.openspace.tables))))
+        paths = []
+        for i, table in enumerate(self.openspace.tables):
+            path = os.path.join(directory, f"table_{i + 1:0{width}d}{suffix}")
+            with FileUtils.open_atomic(path, newline="", compress=compress) as file:
+                writer = csv.writer(file)
+                writer.writerow(["Seat Number", "Occupant"])
+                writer.writerows((j + 1, seat.occupant if not seat.free else "Free")
+                                 for j, seat in enumerate(table.seats))
+            paths.append(path)
+        path = os.path.join(directory, f"unseated{suffix}")
+        with FileUtils.open_atomic(path, newline="", compress=compress) as file:
+            writer = csv.writer(file)
+            writer.writerow(["Name"])
+            writer.writerows([name] for name in self.openspace.unseated)
+        paths.append(path)
+        return paths
+
+    def export(self, target: str) -> str:
+        """Export in the format chosen by the target's name.
+
+        .csv / .csv.gz -> to_csv, .jsonl / .jsonl.gz -> to_jsonl, anything else
+        is a directory for to_table_files (compressed files if the name ends in .gz,
+        which is then left out of the directory name).
+
+        :param target: file or directory name.
+        :return: a short description of what was written."""
+        name = target[:-3] if self._compressed(target) else target
+        if name.endswith(".csv"):
+            return f"{self.to_csv(target)} rows written to {target}"
+        if name.endswith(".jsonl"):
+            return f"{self.to_jsonl(target)} lines written to {target}"
+        paths = self.to_table_files(name, compress=self._compressed(target))
+        return f"{len(paths)} files written to {name}"
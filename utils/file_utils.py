@@ -1,5 +1,92 @@
 import csv
+import gzip
+import hashlib
+import io
 import json
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from json.encoder import encode_basestring as _encode_string
+from typing import Callable, Iterable, Iterator, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; locking is skipped there
+    fcntl = None
+
+
+class StateConflictError(RuntimeError):
+    """Raised when a state file was saved by another session since it was loaded.
+
+    :attr filename (str): the state file.
+    :attr expected_version (int): version this session loaded or last saved.
+    :attr current_version (int): version now on disk."""
+
+    def __init__(self, filename: str, expected_version: int, current_version: int) -> None:
+        super().__init__(
+            f"{filename} was changed by another session "
+            f"(version {current_version} on disk, this session has version {expected_version})"
+        )
+        self.filename: str = filename
+        self.expected_version: int = expected_version
+        self.current_version: int = current_version
+
+
+class StreamedObject:
+    """A JSON object whose (key, value) pairs are produced while it is written.
+
+    See FileUtils.write_json; a plain generator is written as a JSON array.
+
+    :attr items (Iterable[tuple[str, object]]): the pairs, consumed once."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Iterable[tuple[str, object]]) -> None:
+        self.items: Iterable[tuple[str, object]] = items
+
+
+def _encode_json(value: object, parts: list[str], indent: int, level: int, flush: Callable[[], None]) -> None:
+    """Append the indented JSON text of a value to parts (see FileUtils.write_json).
+
+    flush is called after every item of a generator or StreamedObject, so at
+    most one item is held in parts at a time."""
+    kind = type(value)
+    if kind is str:
+        parts.append(_encode_string(value))
+    elif value is None:
+        parts.append("null")
+    elif kind is bool:
+        parts.append("true" if value else "false")
+    elif kind is int:
+        parts.append(int.__repr__(value))
+    elif isinstance(value, (dict, StreamedObject)):
+        streamed = kind is StreamedObject
+        inner = "\n" + " " * (indent * (level + 1))
+        separator = "{"
+        for key, item in (value.items if streamed else value.items()):
+            if type(key) is not str:
+                # JSON keys are strings: 1 -> "1", True -> "true", like json.dump
+                key = json.dumps(key).strip('"')
+            parts.append(separator + inner + _encode_string(key) + ": ")
+            _encode_json(item, parts, indent, level + 1, flush)
+            separator = ","
+            if streamed:
+                flush()
+        parts.append("{}" if separator == "{" else "\n" + " " * (indent * level) + "}")
+    elif isinstance(value, (list, tuple, Iterator)):
+        streamed = isinstance(value, Iterator)
+        inner = "\n" + " " * (indent * (level + 1))
+        separator = "["
+        for item in value:
+            parts.append(separator + inner)
+            _encode_json(item, parts, indent, level + 1, flush)
+            separator = ","
+            if streamed:
+                flush()
+        parts.append("[]" if separator == "[" else "\n" + " " * (indent * level) + "]")
+    else:
+        parts.append(json.dumps(value, ensure_ascii=False))
 
 
 class FileUtils:
@@ -20,22 +107,223 @@ class FileUtils:
 |
         :param filename: path to the CSV file containing colleague names.
         :return: list of colleague names."""
-        names = []
+        return FileUtils.load_roster(filename)[0]
+
+    @staticmethod
+    def load_roster(filename: str) -> tuple[list[str], list[str], list[list[str]]]:
+        """Load colleague names and any extra columns (team, role, ...) from a CSV file.
+
+        The name is the first column. A first row whose first cell is "name"
+        is a header naming the other columns; without one they are called
+        column2, column3, ... Short rows are padded with empty values.
+
+        :param filename: path to the CSV file containing colleague names.
+        :return: (names, attribute names, values per name in attribute order)."""
+        names, rows = [], []
+        attributes: list[str] = []
         with open(filename, mode="r", encoding="utf-8") as file:
             reader = csv.reader(file)
             for row in reader:
-                if row:  # Skip empty rows
-                    names.append(row[0].strip())
-        return names
+                if not row:  # Skip empty rows
+                    continue
+                if not names and FileUtils.roster_header(row) is not None:
+                    attributes = FileUtils.roster_header(row)
+                    continue
+                names.append(row[0].strip())
+                rows.append(row[1:])
+        width = max(len(attributes), max(map(len, rows), default=0))
+        attributes = FileUtils.roster_columns(attributes, width)
+        return names, attributes, [values + [""] * (width - len(values)) for values in rows]
+
+    @staticmethod
+    def roster_header(row: list[str]) -> list[str] | None:
+        """The attribute names of a roster header row (see load_roster).
+
+        :param row: the first non-empty row of the roster.
+        :return: names of the columns after the name, or None if the row is not a header."""
+        if not row or row[0].strip().casefold() != "name":
+            return None
+        return [cell.strip() or f"column{i}" for i, cell in enumerate(row[1:], 2)]
+
+    @staticmethod
+    def roster_columns(attributes: list[str], width: int) -> list[str]:
+        """Attribute names for rows with width values after the name: the header's, then column<n>.
+
+        :param attributes: names from the header (empty without one).
+        :param width: number of value columns.
+        :return: at least width names."""
+        return attributes + [f"column{i}" for i in range(len(attributes) + 2, width + 2)]
+
+    @staticmethod
+    def file_stat(filename: str) -> dict:
+        """Cheap fingerprint of a file from its metadata.
+
+        :param filename: path to the file.
+        :return: dict with the size in bytes and the modification time in nanoseconds."""
+        stat = os.stat(filename)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    @staticmethod
+    def file_hash(filename: str) -> str:
+        """Hash the contents of a file without loading it all into memory.
+
+        :param filename: path to the file.
+        :return: hex digest of the contents."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filename, mode="rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def iter_preference_rows(filename: str) -> Iterator[tuple]:
+        """Stream (person, type, target) preference rows from a CSV or JSON Lines file.
+
+        Files ending in .jsonl or .ndjson hold one {"person", "type", "target"} object
+        per line, anything else is read as CSV with an optional person,type,target header.
+        A row may also give a weight (a number, or strong/normal/mild) and hard or
+        soft: as "weight" and "hard" keys, or as fourth and fifth CSV columns.
+
+        :param filename: path to the preference file.
+        :return: iterator of (person, preference_type, target) tuples, with (weight, hard)
+            appended when the row gives them (see Preferences.import_rows)."""
+        with open(filename, mode="r", encoding="utf-8", newline="") as file:
+            if filename.endswith((".jsonl", ".ndjson")):
+                for line in file:
+                    if line.strip():
+                        row = json.loads(line)
+                        preference = (
+                            str(row.get("person", "")).strip(),
+                            str(row.get("type", "")).strip().lower(),
+                            str(row.get("target", "")).strip(),
+                        )
+                        if "weight" in row or "hard" in row:
+                            preference += (row.get("weight"), row.get("hard"))
+                        yield preference
+            else:
+                reader = csv.reader(file)
+                for row in reader:
+                    if len(row) < 3:
+                        continue  # Skip empty or incomplete rows
+                    person, preference_type, target = row[0].strip(), row[1].strip().lower(), row[2].strip()
+                    if (person, preference_type, target) == ("person", "type", "target"):
+                        continue  # Skip header row
+                    if len(row) > 3 and any(value.strip() for value in row[3:5]):
+                        yield person, preference_type, target, row[3].strip(), row[4].strip() if len(row) > 4 else ""
+                    else:
+                        yield person, preference_type, target
 
     @staticmethod
-    def store_seating(filename: str, data: list[tuple]) -> None:
+    @contextmanager
+    def file_lock(filename: str, shared: bool = False) -> Iterator[None]:
+        """Hold an advisory lock on a file for the duration of a with-block.
+
+        The lock is taken on a separate "<filename>.lock" file, so it survives the
+        file itself being replaced by write_atomic. Without fcntl this is a no-op.
+
+        :param filename: path of the file to lock.
+        :param shared: take a shared (read) lock instead of an exclusive one."""
+        if fcntl is None:
+            yield
+            return
+        with open(filename + ".lock", mode="a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    @contextmanager
+    def open_atomic(filename: str, newline: str | None = None, compress: bool = False) -> Iterator[TextIO]:
+        """Open a text file for writing so that readers see either the old or the new contents.
+
+        The data goes to a temporary file in the same directory, which is flushed
+        to disk and renamed over the target when the with-block ends; if the
+        block raises, the target is left untouched.
+
+        :param filename: path of the file to write.
+        :param newline: newline argument for open() (use "" for CSV).
+        :param compress: gzip-compress the data as it is written.
+        :return: the open text file, for use in a with-block."""
+        directory = os.path.dirname(os.path.abspath(filename))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + ".", suffix=".tmp")
+        try:
+            with open(descriptor, mode="wb") as raw:
+                stream = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if compress else raw
+                file = io.TextIOWrapper(stream, encoding="utf-8", newline=newline)
+                yield file
+                file.flush()
+                file.detach()
+                if compress:
+                    # Writes the gzip trailer; the raw file stays open
+                    stream.close()
+                raw.flush()
+                os.fsync(raw.fileno())
+            if os.path.exists(filename):
+                os.chmod(temporary, os.stat(filename).st_mode & 0o777)
+            else:
+                os.chmod(temporary, 0o644)
+            os.replace(temporary, filename)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        try:
+            # Make the rename itself durable
+            directory_descriptor = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(directory_descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(directory_descriptor)
+
+    @staticmethod
+    def write_atomic(filename: str, write: Callable, newline: str | None = None) -> None:
+        """Write a text file atomically (see open_atomic).
+
+        :param filename: path of the file to write.
+        :param write: function called with the open temporary file.
+        :param newline: newline argument for open() (use "" for CSV).
+        :return: None"""
+        with FileUtils.open_atomic(filename, newline) as file:
+            write(file)
+
+    @staticmethod
+    def write_json(file: TextIO, value: object, indent: int = 2) -> None:
+        """Write a value as indented JSON, streaming generators instead of building them in memory.
+
+        A generator (or other iterator) is written as an array and a
+        StreamedObject as an object, one item at a time; lists and dicts may
+        hold either. The output is the same as json.dump(value, file,
+        indent=indent, ensure_ascii=False) with the iterators turned into lists.
+
+        :param file: text file to write to.
+        :param value: the value to write.
+        :param indent: spaces per nesting level.
+        :return: None"""
+        parts = []
+
+        def flush() -> None:
+            file.write("".join(parts))
+            parts.clear()
+
+        _encode_json(value, parts, indent, 0, flush)
+        flush()
+
+    @staticmethod
+    def store_seating(filename: str, data: Iterable[tuple], compress: bool = False) -> None:
         """Store seating arrangement to a CSV file.
 
+        The rows are written as they come, so a generator is never held in memory.
+
         :param filename: path to the output CSV file.
-        :param data: list of tuples containing (table_number, seat_number, occupant).
+        :param data: (table_number, seat_number, occupant) tuples, e.g. a generator.
+        :param compress: gzip-compress the file while writing it.
         :return: None"""
-        with open(filename, mode="w", newline="", encoding="utf-8") as file:
+        with FileUtils.open_atomic(filename, newline="", compress=compress) as file:
             writer = csv.writer(file)
             writer.writerow(["Table Number", "Seat Number", "Occupant"])
             writer.writerows(data)
@@ -44,11 +332,12 @@ class FileUtils:
     def load_seating(filename: str) -> list[tuple]:
         """Load seating arrangement from a CSV file.
 
-        :param filename: path to the CSV file containing seating arrangement.
+        :param filename: path to the CSV file containing seating arrangement (gzip-compressed if it ends in .gz).
         :return: list of tuples containing (table_number, seat_number, occupant)."""
         data = []
+        opener = gzip.open if filename.endswith(".gz") else open
         try:
-            with open(filename, mode="r", encoding="utf-8") as file:
+            with opener(filename, mode="rt", encoding="utf-8") as file:
                 reader = csv.reader(file)
                 next(reader)  # Skip header row
                 for row in reader:
@@ -62,19 +351,63 @@ class FileUtils:
         return data
 
     @staticmethod
-    def store_openspace_state(filename: str, state: dict) -> None:
+    def read_state_version(filename: str) -> int:
+        """Read the version counter of a state file.
+
+        The version is the first key of the file, so normally only its first
+        bytes are read; older files without a version count as version 0, and so
+        do empty or unreadable ones, which the next save then replaces.
+
+        :param filename: path to the JSON state file.
+        :return: the version, or 0 if the file does not exist or holds no valid state."""
+        try:
+            with open(filename, mode="r", encoding="utf-8") as file:
+                match = re.match(r'\s*\{\s*"version"\s*:\s*(\d+)', file.read(64))
+                if match:
+                    return int(match.group(1))
+                file.seek(0)
+                state = json.load(file)
+        except FileNotFoundError:
+            return 0
+        except ValueError:  # Empty or not JSON (json.JSONDecodeError, UnicodeDecodeError)
+            return 0
+        if not isinstance(state, dict):
+            return 0
+        try:
+            return int(state.get("version", 0))
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def store_openspace_state(filename: str, state: dict, expected_version: int | None = None) -> int:
         """Store complete openspace state to a JSON file.
 
+        The file is written atomically while holding its lock, and its version
+        counter is increased. If expected_version is given and the file on disk
+        has another version, another session saved in between and nothing is written.
+
         :param filename: path to the output JSON file.
-        :param state: dictionary containing complete openspace state.
-        :return: None"""
-        with open(filename, mode="w", encoding="utf-8") as file:
-            json.dump(state, file, indent=2, ensure_ascii=False)
+        :param state: dictionary containing complete openspace state; parts may be
+            generators or StreamedObjects, written without building them (see write_json).
+        :param expected_version: version the caller last loaded or saved (default: don't check).
+        :return: the new version of the file.
+        :raises StateConflictError: if the version on disk is not expected_version."""
+        with FileUtils.file_lock(filename):
+            current_version = FileUtils.read_state_version(filename)
+            if expected_version is not None and current_version != expected_version:
+                raise StateConflictError(filename, expected_version, current_version)
+            version = current_version + 1
+            state = {"version": version, **state}
+            FileUtils.write_atomic(filename, lambda file: FileUtils.write_json(file, state))
+        return version
 
     @staticmethod
     def load_openspace_state(filename: str) -> dict:
         """Load complete openspace state from a JSON file.
 
+        No lock is needed: state files are only ever replaced atomically, so a
+        reader sees either the previous or the new version, never a partial one.
+
         :param filename: path to the JSON file containing openspace state.
         :return: dictionary containing openspace state, or empty dict if file not found."""
         try:
@@ -90,27 +423,40 @@ class FileUtils:
         :param filename: path to the colleagues CSV file.
         :param colleague_name: name of the colleague to add.
         :return: True if added successfully, False if already exists."""
-        try:
-            # Load existing colleagues
-            existing_colleagues = FileUtils.load_colleagues(filename)
+        # Appending keeps a header row and any attribute columns of the other rows
+        return bool(FileUtils.add_colleagues_to_file(filename, [colleague_name]))
 
-            # Check if colleague already exists
-            if colleague_name in existing_colleagues:
-                return False
+    @staticmethod
+    def add_colleagues_to_file(filename: str, colleague_names: list[str]) -> list[str]:
+        """Append several new colleagues to the colleagues CSV file in one write.
 
-            # Add new colleague
-            existing_colleagues.append(colleague_name)
+        :param filename: path to the colleagues CSV file.
+        :param colleague_names: names of the colleagues to add.
+        :return: the names that were added (those not already in the file)."""
+        try:
+            existing_colleagues = set(FileUtils.load_colleagues(filename))
+        except FileNotFoundError:
+            existing_colleagues = set()
 
-            # Write back to file
-            with open(filename, mode="w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file)
-                for name in existing_colleagues:
-                    writer.writerow([name])
+        added = []
+        for name in colleague_names:
+            if name not in existing_colleagues:
+                existing_colleagues.add(name)
+                added.append(name)
 
-            return True
-        except FileNotFoundError:
-            # Create new file with this colleague
-            with open(filename, mode="w", newline="", encoding="utf-8") as file:
+        if added:
+            # Do not glue the first new name onto a last line without a line break
+            try:
+                with open(filename, mode="rb") as file:
+                    file.seek(0, os.SEEK_END)
+                    if file.tell():
+                        file.seek(-1, os.SEEK_END)
+                    needs_break = file.read(1) not in (b"", b"\n", b"\r")
+            except FileNotFoundError:
+                needs_break = False
+            with open(filename, mode="a", newline="", encoding="utf-8") as file:
+                if needs_break:
+                    file.write("\r\n")
                 writer = csv.writer(file)
-                writer.writerow([colleague_name])
-            return True
+                writer.writerows([name] for name in added)
+        return added
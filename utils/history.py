@@ -0,0 +1,485 @@
+import hashlib
+import json
+import lzma
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from utils.file_utils import FileUtils, StreamedObject
+
+
+# Codec name -> (new incremental compressor, decompress function)
+CODECS = {
+    "zlib": (lambda: zlib.compressobj(9), zlib.decompress),
+    "lzma": (lzma.LZMACompressor, lzma.decompress),
+}
+
+
+def _encode(value: object) -> str:
+    """Compact JSON text of a value, as stored in the history files."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _digest(text: str, generation: int) -> bytes:
+    """Short fingerprint of a part's JSON text, to tell whether it changed without keeping it.
+
+    The first byte is the generation of the recording that saw the part (see
+    StateRecording), the rest the hash of the text."""
+    return bytes((generation,)) + hashlib.blake2b(text.encode("utf-8"), digest_size=15).digest()
+
+
+def _pairs(value: dict | StreamedObject) -> Iterable[tuple[str, object]]:
+    """The (key, value) pairs of a dict or StreamedObject."""
+    return value.items if isinstance(value, StreamedObject) else value.items()
+
+
+class StateRecording:
+    """One version of a StateHistory, recorded while its state is written (see StateHistory.recording).
+
+    A state is split into independent parts, so a delta only holds the parts
+    that changed: each table, each person's whitelist and blacklist, each
+    person's attribute value and the remaining top-level entries. The parts
+    are compressed into a temporary file as they come, all of them for a
+    keyframe and only those whose digest differs from the previous version
+    for a delta. Only the digests are kept, never the parts themselves, and
+    they are updated in place: every digest written by this recording carries
+    its generation, so the parts of the previous version that were not seen
+    again (the deleted ones) are those still holding the other generation.
+
+    :attr keyframe (bool): whether a full copy is recorded rather than a delta.
+    :attr generation (int): 0 or 1, the other value than the previous recording.
+    :attr digests (dict[str, bytes]): part key -> digest, of the previous version until updated."""
+
+    def __init__(self, history: "StateHistory", keyframe: bool, digests: dict[str, bytes], generation: int) -> None:
+        self.keyframe: bool = keyframe
+        self.generation: int = generation
+        self.digests: dict[str, bytes] = digests
+        self._history = history
+        descriptor, self._temporary = tempfile.mkstemp(dir=history.directory, prefix="v", suffix=".tmp")
+        self._file = open(descriptor, mode="wb")
+        self._compressor = CODECS[history.codec][0]()
+        self._size = 0
+        self._empty = True
+        self._entry: dict | None = None
+
+    def _write(self, text: str) -> None:
+        data = self._compressor.compress(text.encode("utf-8"))
+        if data:
+            self._file.write(data)
+            self._size += len(data)
+
+    def add(self, key: str, value: object) -> None:
+        """Record one part.
+
+        :param key: part key, e.g. "table/3" or "preferences/whitelist/Alice".
+        :param value: its JSON value.
+        :return: None"""
+        text = _encode(value)
+        digest = _digest(text, self.generation)
+        previous = self.digests.get(key)
+        self.digests[key] = digest
+        if self.keyframe or previous is None or previous[1:] != digest[1:]:
+            opening = ("{" if self.keyframe else '{"set":{') if self._empty else ","
+            self._write(opening + _encode(key) + ":" + text)
+            self._empty = False
+
+    def tee(self, state: dict) -> dict:
+        """Wrap a state so that its parts are recorded while it is written.
+
+        The tables and the preference and attribute lists are wrapped in
+        generators, so nothing is built in memory; the other entries are
+        recorded right away. The result can be written once, e.g. with
+        FileUtils.write_json.
+
+        :param state: state dict as built by Openspace.stream_state or get_state.
+        :return: the state to write instead."""
+        teed = {}
+        for key, value in state.items():
+            if key == "tables":
+                teed[key] = self._tables(value)
+            elif key == "preferences":
+                teed[key] = {
+                    preference_type: StreamedObject(self._items(f"preferences/{preference_type}/", _pairs(owners)))
+                    for preference_type, owners in value.items()
+                }
+            elif key == "attributes":
+                teed[key] = {
+                    attribute: StreamedObject(self._items(f"attributes/{attribute}/", _pairs(people)))
+                    for attribute, people in value.items()
+                }
+            else:
+                if key != "version":
+                    self.add(key, value)
+                teed[key] = value
+        return teed
+
+    def add_state(self, state: dict) -> None:
+        """Record all parts of a state at once (see tee).
+
+        :param state: state dict as built by Openspace.stream_state or get_state.
+        :return: None"""
+        teed = self.tee(state)
+        for _ in teed.get("tables", ()):
+            pass
+        for section in ("preferences", "attributes"):
+            for streamed in teed.get(section, {}).values():
+                for _ in streamed.items:
+                    pass
+
+    def _tables(self, tables: Iterable[dict]) -> Iterator[dict]:
+        for table in tables:
+            self.add(f"table/{table['table_number']}", [seat["occupant"] for seat in table["seats"]])
+            yield table
+
+    def _items(self, prefix: str, items: Iterable[tuple[str, object]]) -> Iterator[tuple[str, object]]:
+        for name, value in items:
+            self.add(prefix + name, value)
+            yield name, value
+
+    def finish(self, version: int | None = None) -> dict:
+        """Store the recorded parts as the next version of the history.
+
+        :param version: version number, see StateHistory.record.
+        :return: the index entry of the new version."""
+        deleted = [key for key, digest in self.digests.items() if digest[0] != self.generation]
+        for key in deleted:
+            del self.digests[key]
+        if self.keyframe:
+            self._write(("{" if self._empty else "") + "}")
+        else:
+            self._write(('{"set":{' if self._empty else "") + '},"delete":' + _encode(deleted) + "}")
+        data = self._compressor.flush()
+        self._file.write(data)
+        self._size += len(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._entry = self._history._append(self, version)
+        return self._entry
+
+    def _discard(self) -> None:
+        """Remove the temporary file unless the version was stored."""
+        if not self._file.closed:
+            self._file.close()
+        if self._entry is None:
+            # The digests were partly updated for a version that does not exist
+            self._history._last_digests = None
+            try:
+                os.unlink(self._temporary)
+            except FileNotFoundError:
+                pass
+
+
+def _unflatten(parts: dict) -> dict:
+    """Rebuild a state dict from its parts (as split by StateRecording).
+
+    :param parts: dict of part key -> JSON value.
+    :return: state dict accepted by Openspace.load_state."""
+    state = {}
+    tables = {}
+    preferences = {"whitelist": {}, "blacklist": {}}
+    attributes = {}
+    for key, value in parts.items():
+        if key.startswith("table/"):
+            tables[int(key[len("table/"):])] = value
+        elif key.startswith("preferences/"):
+            _, preference_type, person = key.split("/", 2)
+            preferences.setdefault(preference_type, {})[person] = value
+        elif key.startswith("attributes/"):
+            attribute, _, person = key[len("attributes/"):].partition("/")
+            if person:
+                attributes.setdefault(attribute, {})[person] = value
+            else:
+                # Versions recorded before attribute values were split per person
+                attributes[attribute] = value
+        else:
+            state[key] = value
+    state["tables"] = [
+        {
+            "table_number": number,
+            "seats": [
+                {"seat_number": seat + 1, "occupant": occupant, "free": occupant is None}
+                for seat, occupant in enumerate(tables[number])
+            ]
+        }
+        for number in sorted(tables)
+    ]
+    state["preferences"] = preferences
+    state["attributes"] = attributes
+    return state
+
+
+class StateHistory:
+    """Compressed, versioned history of saved states.
+
+    Every recorded state is stored as a delta against the previous version:
+    only the tables, preference lists and other parts that changed (see
+    StateRecording), computed while the state is streamed. Every
+    keyframe_interval versions a full copy (keyframe) is stored instead, so
+    restoring any version reads at most one keyframe plus keyframe_interval - 1
+    deltas, however long the history is.
+
+    Layout of the directory: one compressed file per version and index.jsonl,
+    with one line per version (number, time, keyframe or delta, file, codec
+    and size). The index is appended to while recording and rewritten
+    atomically when pruning.
+
+    :attr directory (str): where the history is kept.
+    :attr keyframe_interval (int): a full copy is stored at least this often.
+    :attr codec (str): "zlib" (fast) or "lzma" (smaller) for new entries."""
+
+    INDEX = "index.jsonl"
+
+    def __init__(self, directory: str, keyframe_interval: int = 20, codec: str = "zlib") -> None:
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec '{codec}', expected one of {', '.join(CODECS)}")
+        self.directory: str = directory
+        self.keyframe_interval: int = max(1, keyframe_interval)
+        self.codec: str = codec
+        os.makedirs(directory, exist_ok=True)
+        self._index_file: str = os.path.join(directory, self.INDEX)
+        self._entries: list[dict] = self._read_index()
+        self._index_size: int = self._current_index_size()
+        # Part digests of the last recorded version, the base of the next delta
+        self._last_digests: dict[str, bytes] | None = None
+        self._generation: int = 0
+
+    def _read_index(self) -> list[dict]:
+        """Load the index from disk."""
+        try:
+            with open(self._index_file, mode="r", encoding="utf-8") as file:
+                return [json.loads(line) for line in file if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _current_index_size(self) -> int:
+        """Size of the index file on disk, to notice records made by other processes."""
+        try:
+            return os.stat(self._index_file).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self) -> None:
+        """Reload the index if another process changed it."""
+        if self._current_index_size() != self._index_size:
+            self._entries = self._read_index()
+            self._index_size = self._current_index_size()
+            self._last_digests = None
+
+    def _write_entry(self, version: int, kind: str, payload: dict, tag: str = "") -> dict:
+        """Compress and write one version; returns its index entry (not yet in the index)."""
+        compressor = CODECS[self.codec][0]()
+        data = compressor.compress(_encode(payload).encode("utf-8")) + compressor.flush()
+        name = f"v{version:08d}{tag}.{kind}.{self.codec}"
+        with open(os.path.join(self.directory, name), mode="wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        return {"version": version, "time": time.time(), "kind": kind, "file": name,
+                "codec": self.codec, "size": len(data)}
+
+    def _read_entry(self, entry: dict) -> dict:
+        """Decompress the payload of one index entry."""
+        with open(os.path.join(self.directory, entry["file"]), mode="rb") as file:
+            return json.loads(CODECS[entry["codec"]][1](file.read()).decode("utf-8"))
+
+    @staticmethod
+    def _delta(old: dict, new: dict) -> dict:
+        """Parts to set and part keys to delete to turn old into new."""
+        return {
+            "set": {key: value for key, value in new.items() if key not in old or old[key] != value},
+            "delete": [key for key in old if key not in new]
+        }
+
+    def _position(self, version: int) -> int:
+        """Index position of a version (binary search, versions are increasing)."""
+        low, high = 0, len(self._entries)
+        while low < high:
+            middle = (low + high) // 2
+            if self._entries[middle]["version"] < version:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self._entries) or self._entries[low]["version"] != version:
+            raise KeyError(f"version {version} is not in the history")
+        return low
+
+    def _parts_at(self, position: int) -> dict:
+        """Rebuild the parts of the version at an index position from the nearest keyframe."""
+        start = position
+        while self._entries[start]["kind"] != "key":
+            start -= 1
+        parts = self._read_entry(self._entries[start])
+        for entry in self._entries[start + 1:position + 1]:
+            delta = self._read_entry(entry)
+            parts.update(delta["set"])
+            for key in delta["delete"]:
+                parts.pop(key, None)
+        return parts
+
+    def versions(self) -> list[dict]:
+        """Returns the index: one dict per stored version, oldest first.
+
+        :return: list of dicts with "version", "time" (epoch seconds), "kind", "file", "codec" and "size" (bytes)."""
+        self._refresh()
+        return [entry.copy() for entry in self._entries]
+
+    def latest_version(self) -> int | None:
+        """Returns the newest stored version, or None if the history is empty."""
+        self._refresh()
+        return self._entries[-1]["version"] if self._entries else None
+
+    def _since_keyframe(self) -> int:
+        """Number of deltas stored after the last keyframe."""
+        count = 0
+        for entry in reversed(self._entries):
+            if entry["kind"] == "key":
+                break
+            count += 1
+        return count
+
+    @contextmanager
+    def recording(self) -> Iterator[StateRecording]:
+        """Record the next version while its state is being written, e.g. to the state file.
+
+        Pass the state through StateRecording.tee before writing it, then call
+        StateRecording.finish. The history stays locked until the with-block
+        ends; if the block raises before finish, nothing is recorded.
+
+        :return: the StateRecording, for use in a with-block."""
+        with FileUtils.file_lock(self._index_file):
+            # Another process may have recorded versions since this history was opened
+            self._refresh()
+            keyframe = not self._entries or self._since_keyframe() + 1 >= self.keyframe_interval
+            if self._last_digests is None:
+                # A keyframe needs no base; the next recording compares against its digests
+                self._last_digests = {} if keyframe else {
+                    key: _digest(_encode(value), self._generation)
+                    for key, value in self._parts_at(len(self._entries) - 1).items()
+                }
+            recording = StateRecording(self, keyframe, self._last_digests, 1 - self._generation)
+            try:
+                yield recording
+            finally:
+                recording._discard()
+
+    def _append(self, recording: StateRecording, version: int | None) -> dict:
+        """Move a finished recording into place and add it to the index (the lock is held)."""
+        latest = self._entries[-1]["version"] if self._entries else 0
+        if version is None or version <= latest:
+            version = latest + 1
+        kind = "key" if recording.keyframe else "delta"
+        name = f"v{version:08d}.{kind}.{self.codec}"
+        os.chmod(recording._temporary, 0o644)
+        os.replace(recording._temporary, os.path.join(self.directory, name))
+        entry = {"version": version, "time": time.time(), "kind": kind, "file": name,
+                 "codec": self.codec, "size": recording._size}
+        with open(self._index_file, mode="a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+        self._entries.append(entry)
+        self._index_size = self._current_index_size()
+        self._generation = recording.generation
+        return entry
+
+    def record(self, state: dict, version: int | None = None) -> dict:
+        """Store a state as the next version.
+
+        :param state: state dict as built by Openspace.get_state or stream_state.
+        :param version: version number, normally the state file version (default: one
+            more than the latest); numbers that are not newer than the latest are replaced
+            by the next free one, e.g. after the state file was deleted.
+        :return: the index entry of the new version."""
+        with self.recording() as recording:
+            recording.add_state(state)
+            return recording.finish(version)
+
+    def restore(self, version: int | None = None) -> dict:
+        """Rebuild a stored state.
+
+        :param version: version to restore (default: the latest).
+        :return: state dict accepted by Openspace.load_state.
+        :raises KeyError: if the version is not in the history."""
+        self._refresh()
+        if version is None:
+            if not self._entries:
+                raise KeyError("the history is empty")
+            version = self._entries[-1]["version"]
+        return _unflatten(self._parts_at(self._position(version)))
+
+    def prune(self, keep_last: int | None = None, max_age_days: float | None = None,
+              keep_daily: bool = False) -> list[int]:
+        """Delete old versions according to a retention policy.
+
+        A version is kept if it matches any of the rules that are given: among
+        the keep_last newest versions, younger than max_age_days, or (with
+        keep_daily) the last version of its calendar day. The newest version is
+        always kept. The remaining versions are re-encoded against each other,
+        so every kept version can still be restored.
+
+        :param keep_last: number of newest versions to keep.
+        :param max_age_days: keep versions younger than this many days.
+        :param keep_daily: keep the last version of every day.
+        :return: the deleted version numbers."""
+        with FileUtils.file_lock(self._index_file):
+            self._entries = self._read_index()
+            self._index_size = self._current_index_size()
+            if not self._entries:
+                return []
+
+            now = time.time()
+            keep = {len(self._entries) - 1}
+            if keep_last:
+                keep.update(range(max(0, len(self._entries) - keep_last), len(self._entries)))
+            if max_age_days is not None:
+                keep.update(position for position, entry in enumerate(self._entries)
+                            if now - entry["time"] < max_age_days * 86400)
+            if keep_daily:
+                last_of_day = {}
+                for position, entry in enumerate(self._entries):
+                    last_of_day[time.strftime("%Y-%m-%d", time.localtime(entry["time"]))] = position
+                keep.update(last_of_day.values())
+            if len(keep) == len(self._entries):
+                return []
+
+            # Replay the whole history once and re-encode the kept versions
+            tag = "-" + os.urandom(4).hex()
+            new_entries = []
+            old_files = {entry["file"] for entry in self._entries}
+            parts = {}
+            previous = None
+            since_keyframe = self.keyframe_interval
+            for position, entry in enumerate(self._entries):
+                payload = self._read_entry(entry)
+                if entry["kind"] == "key":
+                    parts = payload
+                else:
+                    parts = dict(parts)
+                    parts.update(payload["set"])
+                    for key in payload["delete"]:
+                        parts.pop(key, None)
+                if position not in keep:
+                    continue
+                if previous is None or since_keyframe + 1 >= self.keyframe_interval:
+                    kind, new_payload, since_keyframe = "key", parts, 0
+                else:
+                    kind, new_payload = "delta", self._delta(previous, parts)
+                    since_keyframe += 1
+                # A fresh tag per prune, so no file the replay still has to read is overwritten
+                new_entry = self._write_entry(entry["version"], kind, new_payload, tag)
+                new_entry["time"] = entry["time"]
+                new_entries.append(new_entry)
+                previous = parts
+
+            FileUtils.write_atomic(self._index_file, lambda file: file.writelines(
+                json.dumps(entry) + "\n" for entry in new_entries
+            ))
+            deleted = [entry["version"] for position, entry in enumerate(self._entries) if position not in keep]
+            for name in old_files:
+                os.unlink(os.path.join(self.directory, name))
+            self._entries = new_entries
+            self._index_size = self._current_index_size()
+            self._last_digests = None
+        return deleted
@@ -0,0 +1,43 @@
+class NameInterner:
+    """Maps names to compact integer ids and back.
+
+    Every distinct name is stored once, so structures keyed by ids (preference
+    sets, pair histories) stay small and hash quickly.
+
+    :attr names (list[str]): the interned names, indexed by id."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        """Returns the id of a name, assigning a new one if it was never seen.
+
+        :param name: the name to intern.
+        :return: id of the name."""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self._ids[name] = name_id
+            self.names.append(name)
+        return name_id
+
+    def get(self, name: str) -> int | None:
+        """Returns the id of a name without interning it.
+
+        :param name: the name to look up.
+        :return: id of the name or None if it was never interned."""
+        return self._ids.get(name)
+
+    def name(self, name_id: int) -> str:
+        """Returns the name behind an id.
+
+        :param name_id: id returned by intern().
+        :return: the interned name."""
+        return self.names[name_id]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def __len__(self) -> int:
+        return len(self.names)
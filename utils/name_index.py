@@ -0,0 +1,250 @@
+import unicodedata
+from bisect import bisect_left
+from typing import Iterable
+
+# Separates the folded search key from the original name inside one index entry
+_SEPARATOR = "\x00"
+
+# Combining marks that NFKD splits off accented letters, deleted with one str.translate
+_STRIP_MARKS = {
+    code: None
+    for start, end in ((0x0300, 0x0370), (0x1AB0, 0x1B00), (0x1DC0, 0x1E00), (0x20D0, 0x2100), (0xFE20, 0xFE30))
+    for code in range(start, end)
+    if unicodedata.combining(chr(code))
+}
+
+
+def fold(name: str) -> str:
+    """Search key of a name: accents removed, case folded, whitespace collapsed.
+
+    "  Frédéric  DUPONT" and "frederic dupont" have the same key.
+
+    :param name: the name as typed or stored.
+    :return: the folded key."""
+    if name.isascii():
+        return " ".join(name.casefold().split())
+    stripped = unicodedata.normalize("NFKD", name).translate(_STRIP_MARKS)
+    return " ".join(stripped.casefold().split())
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, cut off early once it exceeds limit.
+
+    :return: the distance, or limit + 1 if it is larger than limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Only the part between a shared beginning and a shared end can differ
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class NameIndex:
+    """Searchable index of names, tolerant of accents, case and typos.
+
+    Every name is indexed under its folded key and under the key suffix that
+    starts at each later word, so "dup" finds "Jean Dupont". The entries form
+    one sorted list, which works as a flattened prefix trie: all names under a
+    prefix are one contiguous range, found with two binary searches. New names
+    are buffered and merged on the next query.
+
+    :attr names (dict[str, str]): every indexed name, mapped to its folded key."""
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.names: dict[str, str] = {}
+        self._entries: list[str] = []
+        self._pending: list[str] = []
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _name_entries(name: str, key: str) -> list[str]:
+        """The index entries of a name: its whole key, then the key from each later word on."""
+        words = key.split(" ")
+        return [" ".join(words[start:]) + _SEPARATOR + name for start in range(len(words)) if words[start]]
+
+    def _merge(self) -> None:
+        """Merge buffered entries into the sorted list."""
+        if self._pending:
+            # Both parts are sorted runs, so this sort is a linear merge
+            self._pending.sort()
+            if self._entries:
+                self._entries += self._pending
+                self._entries.sort()
+            else:
+                self._entries = self._pending
+            self._pending = []
+
+    def add(self, name: str) -> bool:
+        """Index a name.
+
+        :param name: the name to add.
+        :return: True if it was new, False if it was already indexed (or empty)."""
+        if not name or name in self.names:
+            return False
+        key = fold(name)
+        self.names[name] = key
+        self._pending.extend(self._name_entries(name, key))
+        return True
+
+    def update(self, names: Iterable[str]) -> None:
+        """Index many names.
+
+        :return: None"""
+        for name in names:
+            self.add(name)
+
+    def remove(self, name: str) -> bool:
+        """Take a name out of the index.
+
+        :param name: the name to remove.
+        :return: True if it was indexed, False otherwise."""
+        key = self.names.pop(name, None)
+        if key is None:
+            return False
+        self._merge()
+        for entry in self._name_entries(name, key):
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        """Positions of the entries whose key starts with a folded prefix."""
+        self._merge()
+        return bisect_left(self._entries, prefix), bisect_left(self._entries, prefix + "\U0010ffff")
+
+    def lookup(self, text: str) -> list[str]:
+        """Names with exactly the same folded key, e.g. every spelling of "frederic dupont".
+
+        :param text: the name as typed.
+        :return: matching names, sorted."""
+        key = fold(text)
+        if not key:
+            return []
+        start, end = self._range(key + _SEPARATOR)
+        return [entry.split(_SEPARATOR, 1)[1] for entry in self._entries[start:end]
+                if self.names.get(entry.split(_SEPARATOR, 1)[1]) == key]
+
+    def prefix(self, text: str, limit: int = 10) -> list[str]:
+        """Names whose first name or any later word starts with some text.
+
+        :param text: the beginning of a name or of one of its words.
+        :param limit: maximum number of names returned.
+        :return: matching names, those matching from the start of the name first."""
+        key = fold(text)
+        if not key:
+            return []
+        start, end = self._range(key)
+        whole, word = [], []
+        seen = set()
+        # Enough entries to fill the result, without walking a huge range for a one-letter prefix
+        for entry in self._entries[start:min(end, start + 50 * limit)]:
+            name = entry.split(_SEPARATOR, 1)[1]
+            if name in seen:
+                continue
+            seen.add(name)
+            (whole if self.names[name].startswith(key) else word).append(name)
+            if len(whole) >= limit:
+                break
+        return (whole + word)[:limit]
+
+    def _names_with_key(self, key: str) -> list[str]:
+        """Names with an entry (whole key or word suffix) exactly equal to key."""
+        entry_prefix = key + _SEPARATOR
+        position = bisect_left(self._entries, entry_prefix)
+        names = []
+        while position < len(self._entries) and self._entries[position].startswith(entry_prefix):
+            names.append(self._entries[position][len(entry_prefix):])
+            position += 1
+        return names
+
+    def _one_edit(self, key: str) -> set[str]:
+        """Names one typo away from key, found by walking the sorted entries like a trie.
+
+        At every position, only the letters that really follow the prefix in the
+        index are tried (each found with one binary search), for a changed,
+        missing, extra or swapped letter.
+
+        :return: matching names."""
+        found = set()
+        for position in range(len(key) + 1):
+            prefix, rest = key[:position], key[position:]
+            # An extra letter, or two swapped letters
+            if rest:
+                found.update(self._names_with_key(prefix + rest[1:]))
+            if len(rest) > 1:
+                found.update(self._names_with_key(prefix + rest[1] + rest[0] + rest[2:]))
+            # A changed or missing letter: try every letter that follows the prefix
+            start, end = self._range(prefix)
+            while start < end:
+                entry = self._entries[start]
+                letter = entry[position]
+                if letter != _SEPARATOR:
+                    if not rest or letter != rest[0]:
+                        found.update(self._names_with_key(prefix + letter + rest[1:]))
+                    found.update(self._names_with_key(prefix + letter + rest))
+                start = bisect_left(self._entries, prefix + chr(ord(letter) + 1), start, end)
+        return found
+
+    def suggest(self, text: str, limit: int = 5, max_distance: int = 2, window: int = 10) -> list[str]:
+        """Names that are spelled almost like some text, for "did you mean" hints.
+
+        Every name one typo away is found (see _one_edit). Names with more typos
+        are looked for among the entries next to the text (and to each of its
+        words) in the sorted index, so the cost does not grow with the number of
+        names, but such names can be missed.
+
+        :param text: the name as typed.
+        :param limit: maximum number of suggestions.
+        :param max_distance: most typos (inserted, deleted or changed letters) per suggestion.
+        :param window: entries looked at on each side of every search position.
+        :return: suggestions, closest first."""
+        key = fold(text)
+        if not key:
+            return []
+        self._merge()
+        words = key.split(" ")
+        probes = [" ".join(words[start:]) for start in range(len(words))]
+        scores = {name: 1 for name in self._one_edit(key)} if max_distance >= 1 else {}
+        for probe in probes:
+            position = bisect_left(self._entries, probe)
+            for entry in self._entries[max(0, position - window):position + window]:
+                name = entry.split(_SEPARATOR, 1)[1]
+                if name in scores:
+                    continue
+                candidate = self.names[name]
+                distance = _edit_distance(key, candidate, max_distance)
+                if distance > max_distance:
+                    # The text may be one word of a longer name, e.g. a surname
+                    distance = min(_edit_distance(key, word, max_distance) for word in candidate.split(" ")) + 1
+                scores[name] = distance
+        ranked = sorted((distance, name) for name, distance in scores.items() if distance <= max_distance)
+        return [name for _, name in ranked[:limit]]
+
+    def search(self, text: str, limit: int = 5) -> list[str]:
+        """Best guesses for a typed name: exact folded matches, else prefix matches, else suggestions.
+
+        :param text: the name as typed.
+        :param limit: maximum number of names returned.
+        :return: candidate names, best first."""
+        return self.lookup(text)[:limit] or self.prefix(text, limit) or self.suggest(text, limit)
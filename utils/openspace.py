@@ -1,6 +1,21 @@
-from utils.table import Table, Seat
-from utils.file_utils import FileUtils
+from utils.table import Table
+from utils.file_utils import FileUtils, StreamedObject
+from utils.interner import NameInterner
+from utils.preferences import PREFERENCE_TYPES, Preferences
+from utils.seat_store import SeatStore
+from utils.history import StateHistory
+from utils.spatial import TableLayout
+from utils.name_index import NameIndex
+from utils.scoring import PreferenceScorer
+from utils.attributes import AttributeConstraint, AttributeStore
+from collections import deque
+from contextlib import contextmanager
+import heapq
+import math
+import os
 import random
+import time
+from typing import Iterable
 
 
 class Openspace:
@@ -9,6 +24,9 @@ class Openspace:
     :attr tables (list[Table]): which is a list of table objects.
     :attr number_of_tables (int): representing the number of tables in the openspace."""
 
+    # Share of an organize budget the first arrangement may take before falling back to first-fit
+    BUILD_SHARE = 0.5
+
     def __init__(self, number_of_tables: int, table_capacity: int, input_file: str = "new_colleagues.csv") -> None:
         self.number_of_tables: int = number_of_tables
         self.table_capacity: int = table_capacity
@@ -17,15 +35,497 @@ class Openspace:
             Table(table_capacity) for _ in range(number_of_tables)
         ]
         self.unseated: list[str] = []
-        self.preferences: dict = {"whitelist": {}, "blacklist": {}}
-    
+        self.names: NameInterner = NameInterner()
+        self.preferences: Preferences = Preferences(self.names)
+        # Extra roster columns (team, role, ...) and the per-table rules organize enforces on them
+        self.attributes: AttributeStore = AttributeStore(self.names)
+        self.constraints: list[AttributeConstraint] = []
+        # Size, mtime and hash of the roster file when it was last reconciled with the room
+        self.roster_fingerprint: dict | None = None
+        # Version of each state file (by absolute path) as this openspace last loaded or saved it
+        self._state_versions: dict[str, int] = {}
+        # Where every saved state is also recorded as a compressed delta (default: nowhere)
+        self.history: StateHistory | None = None
+        # Where the tables stand; organize then seats split whitelist groups at neighboring tables
+        self.layout: TableLayout | None = None
+        # Search index over every known name, built on first use (see get_name_index)
+        self._name_index: NameIndex | None = None
+        # When True, every seat mutation recounts the room and compares it with the counters
+        self.check_consistency: bool = False
+        # Copy-on-write bookkeeping for forks: None means every table belongs to this openspace
+        self._owned_tables: set[int] | None = None
+        self._shared_preferences: bool = False
+        self._shared_attributes: bool = False
+        # While True, only the person -> table map is kept current; the rest is rebuilt afterwards
+        self._deferred_tracking: bool = False
+        # Undo/redo: net changes of the last actions, and the journal of the action in progress
+        self._undo_stack: deque[dict] = deque(maxlen=50)
+        self._redo_stack: list[dict] = []
+        self._journal: dict | None = None
+        self._rebuild_tracking()
+
+    def fork(self) -> "Openspace":
+        """Create a copy-on-write snapshot of the openspace for what-if simulations.
+
+        Tables and preferences are shared with the fork until either side changes
+        them; only the touched tables are then copied. Changes to the fork never
+        affect this openspace and vice versa. The fork has no state history.
+
+        :return: the forked openspace."""
+        fork = Openspace.__new__(Openspace)
+        fork.number_of_tables = self.number_of_tables
+        fork.table_capacity = self.table_capacity
+        fork.input_file = self.input_file
+        fork.tables = list(self.tables)
+        fork.unseated = self.unseated.copy()
+        fork.names = self.names
+        fork.preferences = self.preferences
+        fork.attributes = self.attributes
+        fork.constraints = list(self.constraints)
+        fork.roster_fingerprint = self.roster_fingerprint
+        fork._state_versions = self._state_versions.copy()
+        # A what-if fork must not record its saves into the live room's history
+        fork.history = None
+        fork.layout = self.layout
+        fork._name_index = None
+        fork.check_consistency = self.check_consistency
+        fork._deferred_tracking = self._deferred_tracking
+        fork._person_tables = self._person_tables.copy()
+        fork._seated_count = self._seated_count
+        fork._occupancy_histogram = self._occupancy_histogram.copy()
+        fork._preference_totals = self._preference_totals.copy()
+        fork._violated_edges = self._violated_edges.copy()
+        fork._attribute_counts = {
+            attribute: [row.copy() for row in rows] for attribute, rows in self._attribute_counts.items()
+        }
+        fork._undo_stack = deque(self._undo_stack, maxlen=self._undo_stack.maxlen)
+        fork._redo_stack = self._redo_stack.copy()
+        fork._journal = None
+
+        # From now on both sides must copy a table before writing to it
+        fork._owned_tables = set()
+        self._owned_tables = set()
+        fork._shared_preferences = True
+        self._shared_preferences = True
+        fork._shared_attributes = True
+        self._shared_attributes = True
+        return fork
+
+    def _table_for_write(self, table_idx: int) -> Table:
+        """Return a table that is safe to modify, copying it first if it is shared with a fork.
+
+        :param table_idx: index of the table.
+        :return: the table owned by this openspace."""
+        if self._owned_tables is not None and table_idx not in self._owned_tables:
+            self.tables[table_idx] = self.tables[table_idx].copy()
+            self._owned_tables.add(table_idx)
+        return self.tables[table_idx]
+
+    def _preferences_for_write(self) -> Preferences:
+        """Return preferences that are safe to modify, copying them first if shared with a fork.
+
+        :return: the preferences owned by this openspace."""
+        if self._shared_preferences:
+            self.preferences = self.preferences.copy()
+            self._shared_preferences = False
+        return self.preferences
+
+    def _clear_tables(self) -> None:
+        """Empty every table, replacing shared tables instead of clearing them.
+
+        :return: None"""
+        if self._journal is not None:
+            seats = self._journal["seats"]
+            for table_idx, table in enumerate(self.tables):
+                if table.occupied:
+                    seats.extend((table_idx, seat_idx, seat.occupant, None)
+                                 for seat_idx, seat in enumerate(table.seats) if not seat.free)
+        if self._owned_tables is None:
+            for table in self.tables:
+                table.clear()
+        else:
+            self.tables = [Table(self.table_capacity) for _ in range(self.number_of_tables)]
+            self._owned_tables = None
+
+    def _rebuild_tracking(self) -> None:
+        """Recompute every incrementally maintained counter from scratch.
+
+        Called after bulk changes (clearing, loading, resizing) instead of tracking
+        each seat individually.
+
+        :return: None"""
+        self._person_tables: dict[str, int] = self._person_table_map()
+        self._seated_count: int = len(self._person_tables)
+        self._occupancy_histogram: list[int] = [0] * (self.table_capacity + 1)
+        for table in self.tables:
+            self._occupancy_histogram[table.occupied] += 1
+        self._recount_preferences()
+        self._recount_attributes()
+
+    def _recount_attributes(self) -> None:
+        """Recompute the per-table counts of every attribute a constraint is about.
+
+        _attribute_counts[attribute][table index][value code] is the number of
+        people with that value at the table; rows grow as new values appear.
+
+        :return: None"""
+        self._attribute_counts: dict[str, list[list[int]]] = {
+            constraint.attribute: [[] for _ in self.tables] for constraint in self.constraints
+        }
+        for person, table_idx in self._person_tables.items():
+            self._count_attributes(person, table_idx, 1)
+
+    def _count_attributes(self, person: str, table_idx: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a person from the attribute counts of a table.
+
+        :return: None"""
+        person_id = self.names.get(person)
+        if person_id is None:
+            return
+        for attribute, rows in self._attribute_counts.items():
+            code = self.attributes.code(person_id, attribute)
+            if code != AttributeStore.MISSING:
+                row = rows[table_idx]
+                if code >= len(row):
+                    row.extend([0] * (code + 1 - len(row)))
+                row[code] += sign
+
+    def _recount_preferences(self) -> None:
+        """Recompute the preference totals and the set of violated edges in one pass.
+
+        :return: None"""
+        self._preference_totals: dict = {
+            'whitelist_satisfied': 0,
+            'whitelist_violated': 0,
+            'blacklist_satisfied': 0,
+            'blacklist_violated': 0
+        }
+        # Currently violated edges as (person, target, type)
+        self._violated_edges: set[tuple[str, str, str]] = set()
+        if not self._person_tables:
+            return  # Only seated owners count, so an empty room has nothing to walk
+        for person, target, preference_type, _, satisfied in self._iter_preference_edges(self._person_tables):
+            if satisfied:
+                self._preference_totals[f"{preference_type}_satisfied"] += 1
+            else:
+                self._preference_totals[f"{preference_type}_violated"] += 1
+                self._violated_edges.add((person, target, preference_type))
+
+    def _track_preferences(self, person: str, table_idx: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) the preference outcome of a person sitting at a table.
+
+        Only the edges touching the person are visited. The person must be present
+        in the person -> table map while this runs.
+
+        :param person: name of the person who moves.
+        :param table_idx: index of the table they sit at.
+        :param sign: 1 when they sit down, -1 when they stand up.
+        :return: None"""
+        totals = self._preference_totals
+        violated = self._violated_edges
+        person_tables = self._person_tables
+        for preference_type in ("whitelist", "blacklist"):
+            want_together = preference_type == "whitelist"
+            # Edges owned by the person only count while they are seated
+            for target in self.preferences.targets(person, preference_type):
+                together = person_tables.get(target) == table_idx
+                if together == want_together:
+                    totals[f"{preference_type}_satisfied"] += sign
+                else:
+                    totals[f"{preference_type}_violated"] += sign
+                    if sign > 0:
+                        violated.add((person, target, preference_type))
+                    else:
+                        violated.discard((person, target, preference_type))
+            # Edges pointing at the person flip only for owners at the same table
+            for owner in self.preferences.owners(person, preference_type):
+                if owner != person and person_tables.get(owner) == table_idx:
+                    flip = sign if want_together else -sign
+                    totals[f"{preference_type}_satisfied"] += flip
+                    totals[f"{preference_type}_violated"] -= flip
+                    if flip > 0:
+                        violated.discard((owner, person, preference_type))
+                    else:
+                        violated.add((owner, person, preference_type))
+
+    def _seat_person(self, table_idx: int, name: str, seat_idx: int | None = None) -> bool:
+        """Seat a person and update the room counters.
+
+        :param table_idx: index of the table to seat them at.
+        :param name: name of the person to seat.
+        :param seat_idx: specific seat to use (default: first free seat).
+        :return: True if the person was seated, False if the seat or table was full."""
+        table = self._table_for_write(table_idx)
+        if seat_idx is None:
+            seat_idx = table.claim_seat(name)
+            if seat_idx is None:
+                return False
+        elif not table.set_seat(seat_idx, name):
+            return False
+        if self._journal is not None:
+            self._journal["seats"].append((table_idx, seat_idx, None, name))
+        self._record_seated(table_idx, name, table.occupied - 1)
+        return True
+
+    def _record_seated(self, table_idx: int, name: str, before: int) -> None:
+        """Update the room counters after a person took a seat.
+
+        :param table_idx: index of the table they sat down at.
+        :param name: name of the person.
+        :param before: number of occupants the table had before.
+        :return: None"""
+        self._person_tables[name] = table_idx
+        # Attribute counts back organize's constraint checks, so they stay current even when deferred
+        if self._attribute_counts:
+            self._count_attributes(name, table_idx, 1)
+        if self._deferred_tracking:
+            return
+        self._occupancy_histogram[before] -= 1
+        self._occupancy_histogram[before + 1] += 1
+        self._seated_count += 1
+        self._track_preferences(name, table_idx, 1)
+        if self.check_consistency:
+            self.verify_statistics()
+
+    def _unseat_person(self, table_idx: int, seat_idx: int) -> str | None:
+        """Free a seat and update the room counters.
+
+        :param table_idx: index of the table.
+        :param seat_idx: index of the seat to free.
+        :return: name of the removed occupant or None if the seat was already free."""
+        if self.tables[table_idx].seats[seat_idx].free:
+            return None
+        table = self._table_for_write(table_idx)
+        name = table.remove_seat(seat_idx)
+        if self._journal is not None:
+            self._journal["seats"].append((table_idx, seat_idx, name, None))
+        self._record_unseated(table_idx, name, table.occupied + 1)
+        return name
+
+    def _record_unseated(self, table_idx: int, name: str, before: int) -> None:
+        """Update the room counters after a person left their seat.
+
+        :param table_idx: index of the table they left.
+        :param name: name of the person.
+        :param before: number of occupants the table had before.
+        :return: None"""
+        if self._attribute_counts:
+            self._count_attributes(name, table_idx, -1)
+        if self._deferred_tracking:
+            del self._person_tables[name]
+            return
+        self._track_preferences(name, table_idx, -1)
+        del self._person_tables[name]
+        self._occupancy_histogram[before] -= 1
+        self._occupancy_histogram[before - 1] += 1
+        self._seated_count -= 1
+        if self.check_consistency:
+            self.verify_statistics()
+
+    def verify_statistics(self) -> None:
+        """Compare the incrementally maintained counters against a full recount.
+
+        :return: None
+        :raises RuntimeError: if any counter drifted from the recount."""
+        person_tables = self._person_table_map()
+        histogram = [0] * (self.table_capacity + 1)
+        for table in self.tables:
+            histogram[table.capacity - sum(1 for seat in table.seats if seat.free)] += 1
+
+        mismatches = []
+        if self._person_tables != person_tables:
+            mismatches.append("person -> table map")
+        if self._seated_count != len(person_tables):
+            mismatches.append(f"seated count {self._seated_count} != {len(person_tables)}")
+        if self._occupancy_histogram != histogram:
+            mismatches.append(f"occupancy histogram {self._occupancy_histogram} != {histogram}")
+        totals, violated = self._preference_totals, self._violated_edges
+        self._recount_preferences()
+        if totals != self._preference_totals:
+            mismatches.append(f"preference totals {totals} != {self._preference_totals}")
+        if violated != self._violated_edges:
+            mismatches.append(f"{len(violated ^ self._violated_edges)} violated edges differ")
+        self._preference_totals, self._violated_edges = totals, violated
+        attribute_counts = self._attribute_counts
+        self._recount_attributes()
+        for attribute, rows in attribute_counts.items():
+            recounted = self._attribute_counts[attribute]
+            if any(row + [0] * (len(other) - len(row)) != other + [0] * (len(row) - len(other))
+                   for row, other in zip(rows, recounted)):
+                mismatches.append(f"{attribute} counts per table")
+        self._attribute_counts = attribute_counts
+        if mismatches:
+            raise RuntimeError("Statistics out of sync: " + "; ".join(mismatches))
+
+    @contextmanager
+    def _undoable(self, label: str):
+        """Record the changes made in a with-block as one undo step.
+
+        Seat changes are journaled by the seat helpers and reduced to their net
+        effect at the end, so an undo step costs memory and time proportional to
+        what changed. Nested blocks belong to the outermost one. If the block
+        raises, nothing is recorded.
+
+        :param label: what the user did, shown by the undo and redo menu entries."""
+        if self._journal is not None:
+            yield
+            return
+        self._journal = {"label": label, "seats": [], "tables_added": 0, "preferences": [],
+                         "unseated": self.unseated.copy(), "reset": False}
+        try:
+            yield
+        except BaseException:
+            self._journal = None
+            raise
+        journal, self._journal = self._journal, None
+        if journal["reset"]:
+            return
+
+        net = {}
+        for table_idx, seat_idx, old, new in journal["seats"]:
+            change = net.get((table_idx, seat_idx))
+            if change is None:
+                net[(table_idx, seat_idx)] = [old, new]
+            else:
+                change[1] = new
+        seats = [(table_idx, seat_idx, old, new) for (table_idx, seat_idx), (old, new) in net.items() if old != new]
+        unseated = None if journal["unseated"] == self.unseated else (journal["unseated"], self.unseated.copy())
+        if not seats and not journal["tables_added"] and not journal["preferences"] and unseated is None:
+            return
+        self._push_undo(label, seats=seats, tables_added=journal["tables_added"],
+                        preferences=journal["preferences"], unseated=unseated)
+
+    def _push_undo(self, label: str, seats: list | None = None, tables_added: int = 0,
+                   preferences: list | None = None, unseated: tuple | None = None) -> None:
+        """Record an undo step; a new action makes the undone ones unreachable.
+
+        :param label: what the user did.
+        :param seats: net seat changes as (table index, seat index, old occupant, new occupant).
+        :param tables_added: number of tables appended.
+        :param preferences: preference edges added or changed, as recorded by Preferences.import_rows.
+        :param unseated: the unseated list (before, after), or None if it did not change.
+        :return: None"""
+        self._undo_stack.append({"label": label, "seats": seats or [], "tables_added": tables_added,
+                                 "preferences": preferences or [], "unseated": unseated})
+        self._redo_stack.clear()
+
+    def _reset_undo(self) -> None:
+        """Forget the undo and redo steps, after a change that cannot be undone.
+
+        :return: None"""
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        if self._journal is not None:
+            self._journal["reset"] = True
+
+    def _apply_change(self, change: dict, undo: bool) -> None:
+        """Revert (undo=True) or re-apply a recorded change.
+
+        :param change: an undo step as recorded by _undoable.
+        :param undo: True to go back to the state before the change.
+        :return: None"""
+        # Journal into a scratch record, so replaying the change does not record new undo steps
+        self._journal = {"label": change["label"], "seats": [], "tables_added": 0, "preferences": [],
+                         "unseated": None, "reset": False}
+        try:
+            if not undo:
+                for _ in range(change["tables_added"]):
+                    self.add_table()
+            # Free every changed seat first, so people who moved between tables can sit down again
+            for table_idx, seat_idx, old, new in change["seats"]:
+                if (new if undo else old) is not None:
+                    self._unseat_person(table_idx, seat_idx)
+            for table_idx, seat_idx, old, new in change["seats"]:
+                name = old if undo else new
+                if name is not None:
+                    self._seat_person(table_idx, name, seat_idx)
+            if undo:
+                for _ in range(change["tables_added"]):
+                    # Added tables are empty again once their seats were reverted
+                    self.tables.pop()
+                    self.number_of_tables -= 1
+                    if self._owned_tables is not None:
+                        self._owned_tables.discard(len(self.tables))
+                    self._occupancy_histogram[0] -= 1
+                    for rows in self._attribute_counts.values():
+                        rows.pop()
+                for entry in reversed(change["preferences"]):
+                    if len(entry) == 7:
+                        # Only the strength of an existing edge changed: put the old one back
+                        self._preferences_for_write().add(*entry[:3], *entry[5:])
+                    else:
+                        self._remove_preference(*entry[:3])
+            else:
+                for entry in change["preferences"]:
+                    self.set_preference(*entry[:5])
+            if change["unseated"] is not None:
+                self.unseated = change["unseated"][0 if undo else 1].copy()
+        finally:
+            self._journal = None
+
+    def undo(self) -> str | None:
+        """Undo the last recorded action.
+
+        Recorded actions: adding and removing colleagues, adding tables, setting
+        or importing preferences, clearing tables, organize and seating batches.
+        Resizing the room, removing tables and loading a state or seat file
+        cannot be undone and forget the recorded actions.
+
+        :return: label of the undone action, or None if there is nothing to undo."""
+        if not self._undo_stack:
+            return None
+        change = self._undo_stack.pop()
+        self._apply_change(change, undo=True)
+        self._redo_stack.append(change)
+        return change["label"]
+
+    def redo(self) -> str | None:
+        """Redo the last undone action.
+
+        :return: label of the redone action, or None if there is nothing to redo."""
+        if not self._redo_stack:
+            return None
+        change = self._redo_stack.pop()
+        self._apply_change(change, undo=False)
+        self._undo_stack.append(change)
+        return change["label"]
+
+    def get_undo_label(self) -> str | None:
+        """Returns what undo() would undo, or None if there is nothing to undo."""
+        return self._undo_stack[-1]["label"] if self._undo_stack else None
+
+    def get_redo_label(self) -> str | None:
+        """Returns what redo() would redo, or None if there is nothing to redo."""
+        return self._redo_stack[-1]["label"] if self._redo_stack else None
+
+    def set_undo_depth(self, depth: int) -> None:
+        """Limit how many actions can be undone; the oldest are forgotten first.
+
+        :param depth: maximum number of undo steps kept.
+        :return: None"""
+        self._undo_stack = deque(self._undo_stack, maxlen=max(0, depth))
+
     def clear_all_tables(self) -> None:
         """Clear all tables and unseat everyone.
 
         :return: None"""
-        for table in self.tables:
-            table.seats = [Seat() for i in range(self.table_capacity)]
-        self.unseated = []
+        with self._undoable("clear tables"):
+            self._clear_tables()
+            self.unseated = []
+            self._rebuild_tracking()
+
+    def resize(self, number_of_tables: int, table_capacity: int) -> None:
+        """Replace every table with empty tables of the given dimensions.
+
+        :param number_of_tables: new number of tables.
+        :param table_capacity: new number of seats per table.
+        :return: None"""
+        self.number_of_tables = number_of_tables
+        self.table_capacity = table_capacity
+        self.tables = [Table(table_capacity) for _ in range(number_of_tables)]
+        self._owned_tables = None
+        self._reset_undo()
+        self._rebuild_tracking()
 
     def calculate_table_distribution(self, num_people: int) -> list[int]:
         """
@@ -95,29 +595,112 @@ class Openspace:
         return distribution
 
     def _can_sit_at_table(self, person: str, table_idx: int) -> bool:
-        """Check if a person can sit at a table based on blacklist preferences.
+        """Check if a person can sit at a table based on hard preferences and attribute maximums.
+
+        Soft preferences never block a table; they only add to the penalty.
 
         :param person: name of the person to check
         :param table_idx: index of the table to check
-        :return: True if person can sit at table, False if blacklist violation"""
+        :return: True if person can sit at table, False if hard preference or attribute violation"""
 
-        table = self.tables[table_idx]
+        person_tables = self._person_tables
 
-        # Check if person has blacklist preferences and anyone they avoid is at this table
-        if person in self.preferences["blacklist"]:
-            avoided_people = self.preferences["blacklist"][person]
-            for seat in table.seats:
-                if not seat.free and seat.occupant in avoided_people:
-                    return False
+        # Check both directions - nobody at the table may have a hard blacklist edge with this person
+        for other in self._blacklist_neighbors(person):
+            if person_tables.get(other) == table_idx:
+                return False
 
-        # Also check reverse - if anyone at the table has this person on their blacklist
-        for seat in table.seats:
-            if not seat.free:
-                occupant = seat.occupant
-                if occupant in self.preferences["blacklist"]:
-                    if person in self.preferences["blacklist"][occupant]:
-                        return False
+        return self._whitelist_allows(person, table_idx) and self._attribute_allows(person, table_idx)
+
+    def _whitelist_allows(self, person: str, table_idx: int) -> bool:
+        """Check that everyone seated with a hard whitelist edge to a person sits at a table."""
+        person_tables = self._person_tables
+        for other in self.preferences.hard_neighbors(person, "whitelist"):
+            other_table = person_tables.get(other)
+            if other_table is not None and other_table != table_idx:
+                return False
+        return True
 
+    def _hard_whitelist_parts(self, group: set) -> list[list[str]]:
+        """Split a whitelist group into the parts held together by hard whitelist edges.
+
+        :param group: names of a whitelist group.
+        :return: lists of two or more names, largest first."""
+        parts = []
+        processed = set()
+        for person in group:
+            if person in processed:
+                continue
+            processed.add(person)
+            part = [person]
+            stack = [person]
+            while stack:
+                for neighbor in self.preferences.hard_neighbors(stack.pop(), "whitelist"):
+                    if neighbor in group and neighbor not in processed:
+                        processed.add(neighbor)
+                        part.append(neighbor)
+                        stack.append(neighbor)
+            if len(part) > 1:
+                parts.append(part)
+        parts.sort(key=len, reverse=True)
+        return parts
+
+    def _limited_at_tables(self, person: str) -> bool:
+        """Check if a person falls under any max_per_table constraint or has a hard whitelist edge."""
+        if self.preferences.hard_neighbors(person, "whitelist"):
+            return True
+        if not self.constraints:
+            return False
+        person_id = self.names.get(person)
+        if person_id is None:
+            return False
+        return any(constraint.max_per_table is not None
+                   and constraint.applies_to(self.attributes.code(person_id, constraint.attribute), self.attributes)
+                   for constraint in self.constraints)
+
+    def _attribute_allows(self, person: str, table_idx: int, leaving: str | None = None) -> bool:
+        """Check the max_per_table constraints for a person joining a table, from the table counters.
+
+        :param person: name of the person who would sit down.
+        :param table_idx: index of the table.
+        :param leaving: someone at the table who leaves it at the same time (for swaps).
+        :return: True if no maximum would be exceeded."""
+        if not self.constraints:
+            return True
+        person_id = self.names.get(person)
+        if person_id is None:
+            return True
+        leaving_id = self.names.get(leaving) if leaving is not None else None
+        for constraint in self.constraints:
+            if constraint.max_per_table is None:
+                continue
+            code = self.attributes.code(person_id, constraint.attribute)
+            if not constraint.applies_to(code, self.attributes):
+                continue
+            row = self._attribute_counts[constraint.attribute][table_idx]
+            count = row[code] if code < len(row) else 0
+            if leaving_id is not None and self.attributes.code(leaving_id, constraint.attribute) == code:
+                count -= 1
+            if count >= constraint.max_per_table:
+                return False
+        return True
+
+    def _group_allows(self, group: list[str], table_idx: int | None = None) -> bool:
+        """Check the max_per_table constraints for a whole group joining a table (or an empty one) together."""
+        joining = {}
+        for constraint in self.constraints:
+            if constraint.max_per_table is None:
+                continue
+            row = self._attribute_counts[constraint.attribute][table_idx] if table_idx is not None else []
+            for person in group:
+                person_id = self.names.get(person)
+                code = self.attributes.code(person_id, constraint.attribute) if person_id is not None \
+                    else AttributeStore.MISSING
+                if constraint.applies_to(code, self.attributes):
+                    key = (constraint.attribute, code)
+                    joining[key] = joining.get(key, 0) + 1
+                    if (row[code] if code < len(row) else 0) + joining[key] > constraint.max_per_table:
+                        return False
         return True
 
     def _has_blacklist_conflict(self, person1: str, person2: str) -> bool:
@@ -126,24 +709,14 @@ class Openspace:
         :param person1: first person's name
         :param person2: second person's name
         :return: True if they should not sit together, False otherwise"""
+        return self.preferences.has_conflict(person1, person2)
 
-        # Check if person1 has person2 on their blacklist
-        if person1 in self.preferences["blacklist"]:
-            if person2 in self.preferences["blacklist"][person1]:
-                return True
-
-        # Check if person2 has person1 on their blacklist
-        if person2 in self.preferences["blacklist"]:
-            if person1 in self.preferences["blacklist"][person2]:
-                return True
-
-        return False
-
-    def _get_whitelist_groups(self, names: list[str]) -> list[set]:
+    def _get_whitelist_groups(self, names: list[str], deadline: float | None = None) -> list[set]:
         """Create groups of people who want to sit together based on whitelist.
-        Groups are split if there are blacklist conflicts between members.
+        Groups are split if there are hard blacklist conflicts between members.
 
         :param names: list of all names to organize
+        :param deadline: time.perf_counter() value after which no more edges or groups are added.
         :return: list of sets, where each set is a group of people who want to sit together"""
 
         # Build a graph of whitelist connections
@@ -152,7 +725,9 @@ class Openspace:
             graph[person] = set()
 
         # Add all whitelist connections (even one-way), but only if no blacklist conflict
-        for person, targets in self.preferences["whitelist"].items():
+        for person, targets in self.preferences.items("whitelist"):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
             if person in graph:
                 for target in targets:
                     if target in graph:
@@ -162,132 +737,155 @@ class Openspace:
                             # Make it bidirectional - if A wants B, seat them together
                             graph[target].add(person)
 
-        # Find connected components (groups) using DFS
+        # Find connected components (groups) with an explicit DFS stack, so that
+        # long whitelist chains cannot hit the recursion limit
         groups = []
         processed = set()
 
-        def has_group_conflict(person, group):
-            """Check if person has blacklist conflict with anyone in the group."""
-            for member in group:
-                if self._has_blacklist_conflict(person, member):
-                    return True
-            return False
-
-        def dfs(node, group):
-            """Depth-first search to find all connected people without blacklist conflicts."""
-            if node in processed:
-                return
-
-            # Check if this node conflicts with anyone already in the group
-            if has_group_conflict(node, group):
-                return
-
-            processed.add(node)
-            group.add(node)
-            for neighbor in graph[node]:
-                if neighbor not in processed:
-                    dfs(neighbor, group)
-
         for person in names:
-            if person not in processed:
-                group = set()
-                dfs(person, group)
-                if len(group) > 1:
-                    groups.append(group)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if person in processed:
+                continue
+            group = {person}
+            processed.add(person)
+            # People with a blacklist conflict with anyone already in the group
+            blocked = set(self._blacklist_neighbors(person))
+            stack = [iter(graph[person])]
+            while stack:
+                for neighbor in stack[-1]:
+                    if neighbor not in processed and neighbor not in blocked:
+                        processed.add(neighbor)
+                        group.add(neighbor)
+                        blocked.update(self._blacklist_neighbors(neighbor))
+                        stack.append(iter(graph[neighbor]))
+                        break
+                else:
+                    stack.pop()
+            if len(group) > 1:
+                groups.append(group)
 
         return groups
 
-    def organize(self, names: list[str]) -> dict:
+    def organize(self, names: list[str], budget_ms: float | None = None, progress=None) -> dict:
         """
         Assigns people to Seat objects respecting whitelist and blacklist preferences.
         Uses calculate_table_distribution to ensure optimal seating arrangement.
+        Hard preferences are never broken: someone who can only be seated by
+        breaking a hard blacklist, or away from a seated hard whitelist partner,
+        stays unseated. Soft preferences are kept where the seating allows and
+        traded off against each other by their weights while improving.
+        Attribute maximums are never exceeded; attribute minimums are met where
+        enough people with the value can be moved (see add_constraint).
         If there are too many people, they are added to the unseated list.
+        Can be undone as one step.
+
+        With a time budget, the arrangement built as above is then improved by
+        swapping people between tables (see _improve) until the budget is used
+        up, progress asks to stop, or no preference is broken. Every accepted
+        swap lowers the weighted penalty, so the arrangement left behind is the
+        best one found. The budget covers the whole call. Building the first
+        arrangement may use up to BUILD_SHARE of it. Past that point the build
+        stops forming whitelist groups and seats everyone left first-fit,
+        skipping the augmenting and repair searches, and the remaining time
+        goes to the improvement. Seating each person once is the only part
+        that is never cut short.
 
         :param names: list of names to be assigned to seats.
+        :param budget_ms: time budget in milliseconds, or None to only build the arrangement.
+        :param progress: called with a metrics dict (see _improve) after the first
+            arrangement and then every 100 ms; returning True stops the improvement.
+        :return: dict with preference satisfaction statistics; with a budget also
+            "timeline" (the metrics dicts, oldest first), "swaps", "elapsed_ms" and "cancelled"."""
+        start = time.perf_counter()
+        with self._undoable("organize seating"):
+            if budget_ms is None:
+                return self._organize(names)
+            self._organize(names, start + self.BUILD_SHARE * budget_ms / 1000)
+            result = self._improve(start + budget_ms / 1000, start, progress)
+        stats = self.get_preference_stats()
+        stats.update(result)
+        stats["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return stats
+
+    def _organize(self, names: list[str], deadline: float | None = None) -> dict:
+        """The seating phases of organize, see there.
+
+        The preference counters are rebuilt once at the end rather than kept
+        current for every seat.
+
+        :param names: list of names to be assigned to seats.
+        :param deadline: time.perf_counter() value after which to fall back to first-fit seating.
         :return: dict with preference satisfaction statistics"""
 
         self.clear_all_tables()
         self.unseated = []  # Reset unseated list
+        deferred, self._deferred_tracking = self._deferred_tracking, True
+        try:
+            self._seat_phases(names, deadline)
+        finally:
+            self._deferred_tracking = deferred
+        if not deferred:
+            self._rebuild_tracking()
+
+        # Phase 3: Return preference statistics
+        return self.get_preference_stats()
+
+    def _past(self, deadline: float | None) -> bool:
+        """Check whether a deadline (a time.perf_counter() value, or None for none) has passed."""
+        return deadline is not None and time.perf_counter() >= deadline
 
-        remaining_names = names.copy()
-        seated_names = []
+    def _seat_phases(self, names: list[str], deadline: float | None) -> None:
+        """Phases 1 and 2 of organize: seat everyone, from the ideal distribution.
+
+        :param names: list of names to be assigned to seats.
+        :param deadline: see _organize.
+        :return: None"""
+
+        remaining_names = list(dict.fromkeys(names))
+
+        # Calculate the ideal final distribution
+        ideal_distribution = self.calculate_table_distribution(len(remaining_names))
 
         # Phase 1: Handle whitelist groups - seat people who want to sit together
-        whitelist_groups = self._get_whitelist_groups(remaining_names)
+        whitelist_groups = self._get_whitelist_groups(remaining_names, deadline)
 
         # Sort groups by size (largest first) to maximize satisfaction
         whitelist_groups.sort(key=len, reverse=True)
 
+        group_seated = set()
+        cursors = {}
         for group in whitelist_groups:
-            group_list = list(group)
-
-            # Try to find a table that can accommodate this group
-            for table_idx, table in enumerate(self.tables):
-                if table.left_capacity() >= len(group_list):
-                    # Check if all group members can sit at this table (no blacklist violations)
-                    can_all_sit = True
-                    for person in group_list:
-                        if not self._can_sit_at_table(person, table_idx):
-                            can_all_sit = False
-                            break
-
-                    if can_all_sit:
-                        # Seat the entire group at this table
-                        for person in group_list:
-                            table.assign_seat(person)
-                            seated_names.append(person)
-                            remaining_names.remove(person)
-                        break
+            if self._past(deadline):
+                break  # The rest are seated one by one in Phase 2
+            table_idx = self._find_group_table(list(group), ideal_distribution, cursors)
+            if table_idx is not None:
+                # Seat the entire group at this table
+                for person in group:
+                    self._seat_person(table_idx, person)
+                group_seated.update(group)
+                continue
+            # The group does not fit anywhere: keep at least its hard whitelist edges together
+            for part in self._hard_whitelist_parts(group):
+                table_idx = self._find_group_table(part, ideal_distribution, cursors)
+                if table_idx is not None:
+                    for person in part:
+                        self._seat_person(table_idx, person)
+                    group_seated.update(part)
 
         # Phase 2: Seat remaining people while respecting blacklist and using optimal distribution
+        remaining_names = [person for person in remaining_names if person not in group_seated]
         random.shuffle(remaining_names)
 
-        # Get current occupancy of each table
-        current_occupancy = [self.table_capacity - table.left_capacity() for table in self.tables]
-
-        # Calculate target distribution for remaining people
-        # We need to consider what's already seated
-        total_to_seat = len(remaining_names)
-        total_already_seated = sum(current_occupancy)
-        total_people = total_already_seated + total_to_seat
-
-        # Calculate the ideal final distribution
-        ideal_distribution = self.calculate_table_distribution(total_people)
-
         # Calculate how many MORE people each table needs to reach ideal distribution
         target_additions = []
         for table_idx in range(self.number_of_tables):
-            current = current_occupancy[table_idx]
+            current = self.tables[table_idx].occupied
             ideal = ideal_distribution[table_idx]
             needed = max(0, ideal - current)  # How many more people this table needs
             target_additions.append(needed)
 
-        # Create table priority list: (table_idx, spots_needed), sorted by spots needed (descending)
-        table_priority = [(idx, needed) for idx, needed in enumerate(target_additions) if needed > 0]
-        table_priority.sort(key=lambda x: x[1], reverse=True)
-
-        # Track which people we've tried to seat
-        remaining_people = remaining_names.copy()
-
-        # Try to fill tables according to priority
-        for table_idx, spots_needed in table_priority:
-            spots_filled = 0
-            people_to_remove = []
-
-            for person in remaining_people:
-                if spots_filled >= spots_needed:
-                    break
-
-                # Check if this person can sit at this table
-                if self.tables[table_idx].has_free_spot() and self._can_sit_at_table(person, table_idx):
-                    self.tables[table_idx].assign_seat(person)
-                    seated_names.append(person)
-                    people_to_remove.append(person)
-                    spots_filled += 1
-
-            # Remove seated people from remaining list
-            for person in people_to_remove:
-                remaining_people.remove(person)
+        remaining_people = self._assign_to_targets(remaining_names, target_additions, deadline)
 
         # Phase 2b: Handle any remaining people who couldn't be seated due to distribution or blacklist
         # Try to seat them at any available table
@@ -297,8 +895,7 @@ class Openspace:
             # Try to find any suitable table
             for table_idx, table in enumerate(self.tables):
                 if table.has_free_spot() and self._can_sit_at_table(person, table_idx):
-                    table.assign_seat(person)
-                    seated_names.append(person)
+                    self._seat_person(table_idx, person)
                     seated = True
                     break
 
@@ -306,51 +903,829 @@ class Openspace:
             if not seated:
                 self.unseated.append(person)
 
-        # Phase 3: Calculate and return preference statistics
-        stats = self._calculate_preference_stats()
+        # Phases 2c to 2e only improve the arrangement, so they are skipped once the deadline passed
+        if self._past(deadline):
+            return
 
-        # Print violations
-        if stats["whitelist_violated"] > 0 or stats["blacklist_violated"] > 0:
-            print(f"\n{'-' * 50}")
-            print("PREFERENCE VIOLATIONS:")
-            print(f"{'-' * 50}")
+        # Phase 2c: Move already seated people to make room for those blocked by blacklists
+        self._repair_unseated()
+
+        # Phase 2d: Swap people between tables until every table meets the attribute minimums
+        if any(constraint.min_per_table is not None for constraint in self.constraints):
+            self._balance_minimums()
+
+        # Phase 2e: Put tables that share whitelists next to each other on the floor
+        if self.layout is not None:
+            self._place_tables()
+
+    def _improve(self, deadline: float, start: float, progress=None, report_every: float = 0.1,
+                 stale_passes: int = 3) -> dict:
+        """Lower the weighted penalty of the arrangement by swapping people until a deadline.
+
+        Hill climbing over broken preferences: one side of a broken whitelist is
+        swapped with someone at the other side's table, or one side of a broken
+        blacklist with someone at a random table. A swap is scored from the two
+        people's own preferences (PreferenceScorer.person_penalty) and kept only
+        if it lowers the penalty and breaks no hard preference or table
+        composition rule; soft preferences are traded off by their weights.
+        Table sizes never change. Stops early once several passes over the
+        broken preferences in a row found nothing to improve.
+
+        :param deadline: time.perf_counter() value to stop at.
+        :param start: time.perf_counter() value the timeline's elapsed times count from.
+        :param progress: called with every metrics dict; returning True stops early.
+        :param report_every: seconds between two metrics dicts.
+        :param stale_passes: passes without any accepted swap after which to stop.
+        :return: dict with "timeline" (list of dicts with "elapsed_ms", "penalty",
+            "whitelist_violated", "blacklist_violated" and "swaps"), "swaps" and "cancelled"."""
+        scorer = self.get_scorer()
+        tables = scorer.table_array(self._person_tables)
+        penalty = scorer.penalty(tables)
+        get_id = self.names.get
+        person_tables = self._person_tables
+        timeline = []
+        swaps = 0
+        cancelled = False
+        candidates = []
+        next_report = 0.0
+        pass_start_swaps, stale = 0, -1
+
+        while True:
+            now = time.perf_counter()
+            if now >= next_report or now >= deadline:
+                metrics = {
+                    "elapsed_ms": (now - start) * 1000,
+                    "penalty": penalty,
+                    "whitelist_violated": self._preference_totals["whitelist_violated"],
+                    "blacklist_violated": self._preference_totals["blacklist_violated"],
+                    "swaps": swaps
+                }
+                timeline.append(metrics)
+                if progress is not None and progress(metrics):
+                    cancelled = True
+                    break
+                next_report = now + report_every
+            if now >= deadline or stale >= stale_passes:
+                break
+            if not candidates:
+                candidates = list(self._violated_edges)
+                if not candidates:
+                    stale = stale_passes  # Nothing left to improve
+                elif swaps == pass_start_swaps:
+                    stale += 1
+                else:
+                    stale = 0
+                pass_start_swaps = swaps
+                if stale >= stale_passes:
+                    next_report = 0.0  # Report where it stopped
+                    continue
+                random.shuffle(candidates)
 
-            if stats["whitelist_violated"] > 0:
-                print(f"\nWhitelist violations ({stats['whitelist_violated']}):")
-                for person, preferred_people in self.preferences["whitelist"].items():
-                    person_table = self._find_person_table(person)
-                    if person_table is None:
+            owner, target, preference_type = candidates.pop()
+            owner_table, target_table = person_tables.get(owner), person_tables.get(target)
+            if owner_table is None or target_table is None:
+                continue
+            mover, source = (owner, owner_table) if random.random() < 0.5 else (target, target_table)
+            if preference_type == "whitelist":
+                destination = target_table if mover == owner else owner_table
+            else:
+                destination = random.randrange(len(self.tables))
+            if destination == source:
+                continue
+            seat = random.choice(self.tables[destination].seats)
+            if seat.free:
+                continue
+            partner = seat.occupant
+            # People without preferences are not in the scorer and add nothing to the penalty
+            mover_id = get_id(mover)
+            partner_id = get_id(partner)
+            if partner_id is not None and partner_id >= scorer.size:
+                partner_id = None
+
+            before = scorer.person_penalty(tables, mover_id)
+            if partner_id is not None:
+                before += scorer.person_penalty(tables, partner_id)
+                tables[partner_id] = source
+            tables[mover_id] = destination
+            after = scorer.person_penalty(tables, mover_id)
+            if partner_id is not None:
+                after += scorer.person_penalty(tables, partner_id)
+            if after < before - 1e-9 and self._swap_allowed(mover, source, partner, destination):
+                self._swap_people(mover, source, partner, destination)
+                penalty += after - before
+                swaps += 1
+            else:
+                tables[mover_id] = source
+                if partner_id is not None:
+                    tables[partner_id] = destination
+        return {"timeline": timeline, "swaps": swaps, "cancelled": cancelled}
+
+    def _table_ties(self) -> dict[int, dict[int, list[int]]]:
+        """Count the preferences between people at different tables.
+
+        :return: dict table index -> {other table index: [whitelist edges, blacklist edges]}."""
+        ties = {}
+        person_tables = self._person_tables
+        for person, table_idx in person_tables.items():
+            for preference_type, slot in (("whitelist", 0), ("blacklist", 1)):
+                for target in self.preferences.targets(person, preference_type):
+                    other = person_tables.get(target)
+                    if other is None or other == table_idx:
                         continue
-                    for preferred in preferred_people:
-                        preferred_table = self._find_person_table(preferred)
-                        if preferred_table != person_table:
-                            print(f"  - {person} wants to sit with {preferred} (not at same table)")
-
-            if stats["blacklist_violated"] > 0:
-                print(f"\nBlacklist violations ({stats['blacklist_violated']}):")
-                for person, avoided_people in self.preferences["blacklist"].items():
-                    person_table = self._find_person_table(person)
-                    if person_table is None:
+                    ties.setdefault(table_idx, {}).setdefault(other, [0, 0])[slot] += 1
+                    ties.setdefault(other, {}).setdefault(table_idx, [0, 0])[slot] += 1
+        return ties
+
+    def _placement_cost(self, table_idx: int, position_of: dict[int, int], ties: dict,
+                        positions: list[tuple[float, float]]) -> float:
+        """Proximity cost of one table against the tables placed so far.
+
+        Every whitelist edge to another table costs the distance between the two
+        tables; every blacklist edge costs how much closer than two adjacency
+        distances the tables are.
+
+        :param table_idx: the table whose cost is wanted.
+        :param position_of: table index -> position index of the placed tables.
+        :param ties: as returned by _table_ties.
+        :param positions: the floor positions.
+        :return: the cost."""
+        x, y = positions[position_of[table_idx]]
+        horizon = 2 * self.layout.adjacency
+        cost = 0.0
+        for other, (whitelist, blacklist) in ties.get(table_idx, {}).items():
+            position = position_of.get(other)
+            if position is None:
+                continue
+            ox, oy = positions[position]
+            distance = math.hypot(x - ox, y - oy)
+            cost += whitelist * distance + blacklist * max(0.0, horizon - distance)
+        return cost
+
+    def _place_tables(self, passes: int = 2, candidates: int = 6) -> int:
+        """Move the people of whole tables between floor positions to reduce the proximity cost.
+
+        Which people sit together does not change, only where each group sits.
+        Tables are placed greedily, each next to the already placed tables it has
+        the most whitelist edges with (nearest free positions come from a KD-tree),
+        then improved by swapping pairs of tables. The new placement is only
+        applied if it beats the current one.
+
+        :param passes: rounds of swap improvements.
+        :param candidates: positions tried per table.
+        :return: number of tables whose people moved."""
+        ties = self._table_ties()
+        if not ties:
+            return 0
+        number_of_tables = len(self.tables)
+        positions = self.layout.positions_for(number_of_tables)
+        free = self.layout.tree(number_of_tables)
+
+        def total_cost(position_of: dict[int, int]) -> float:
+            return sum(self._placement_cost(table_idx, position_of, ties, positions) for table_idx in ties) / 2
+
+        # Greedy: most strongly tied tables first, each at a free position near its placed whitelist partners
+        weight = {table_idx: sum(whitelist for whitelist, _ in others.values()) for table_idx, others in ties.items()}
+        order = sorted(ties, key=lambda table_idx: (-weight[table_idx], table_idx))
+        position_of = {}
+        attached = {}
+        heap = []
+        next_start = 0
+        last_position = None
+        while len(position_of) < len(ties):
+            table_idx = None
+            while heap:
+                negative_weight, candidate = heapq.heappop(heap)
+                if candidate not in position_of and attached[candidate] == -negative_weight:
+                    table_idx = candidate
+                    break
+            if table_idx is None:
+                while order[next_start] in position_of:
+                    next_start += 1
+                table_idx = order[next_start]
+
+            partners = [(positions[position_of[other]], whitelist)
+                        for other, (whitelist, _) in ties[table_idx].items() if whitelist and other in position_of]
+            if partners:
+                total = sum(whitelist for _, whitelist in partners)
+                anchor = (sum(x * whitelist for (x, _), whitelist in partners) / total,
+                          sum(y * whitelist for (_, y), whitelist in partners) / total)
+            elif last_position is not None:
+                anchor = positions[last_position]
+            else:
+                anchor = positions[0]
+            best = None
+            for position in free.nearest(anchor, candidates):
+                position_of[table_idx] = position
+                cost = self._placement_cost(table_idx, position_of, ties, positions)
+                if best is None or cost < best[0]:
+                    best = (cost, position)
+            position_of[table_idx] = best[1]
+            free.remove(best[1])
+            last_position = best[1]
+
+            for other, (whitelist, _) in ties[table_idx].items():
+                if whitelist and other not in position_of:
+                    attached[other] = attached.get(other, 0) + whitelist
+                    heapq.heappush(heap, (-attached[other], other))
+
+        # Tables without ties keep their place if it is still free, otherwise take the first free one
+        table_at = {position: table_idx for table_idx, position in position_of.items()}
+        loose = [table_idx for table_idx in range(number_of_tables) if table_idx not in position_of]
+        homeless = []
+        for table_idx in loose:
+            if table_idx in free:
+                free.remove(table_idx)
+                position_of[table_idx] = table_idx
+                table_at[table_idx] = table_idx
+            else:
+                homeless.append(table_idx)
+        open_positions = (position for position in range(number_of_tables) if position not in table_at)
+        for table_idx, position in zip(homeless, open_positions):
+            position_of[table_idx] = position
+            table_at[position] = table_idx
+
+        # Swaps: move a tied table next to its partners (or away from a blacklisted table)
+        tree = self.layout.tree(number_of_tables)
+        for _ in range(passes):
+            improved = False
+            for table_idx in ties:
+                partners = [(positions[position_of[other]], whitelist)
+                            for other, (whitelist, _) in ties[table_idx].items() if whitelist]
+                if partners:
+                    total = sum(whitelist for _, whitelist in partners)
+                    anchor = (sum(x * whitelist for (x, _), whitelist in partners) / total,
+                              sum(y * whitelist for (_, y), whitelist in partners) / total)
+                else:
+                    # Only blacklist ties: try a random spot on the floor
+                    anchor = positions[random.randrange(number_of_tables)]
+                for position in tree.nearest(anchor, candidates):
+                    own_position = position_of[table_idx]
+                    if position == own_position:
                         continue
-                    for avoided in avoided_people:
-                        avoided_table = self._find_person_table(avoided)
-                        if avoided_table == person_table:
-                            print(f"  - {person} wants to avoid {avoided} (seated together at table {person_table + 1})")
+                    other = table_at[position]
+                    before = (self._placement_cost(table_idx, position_of, ties, positions)
+                              + (self._placement_cost(other, position_of, ties, positions) if other in ties else 0))
+                    position_of[table_idx], position_of[other] = position, own_position
+                    after = (self._placement_cost(table_idx, position_of, ties, positions)
+                             + (self._placement_cost(other, position_of, ties, positions) if other in ties else 0))
+                    if after < before - 1e-9:
+                        table_at[position], table_at[own_position] = table_idx, other
+                        improved = True
+                    else:
+                        position_of[table_idx], position_of[other] = own_position, position
+            if not improved:
+                break
 
-            print(f"{'-' * 50}\n")
+        if total_cost(position_of) >= total_cost({table_idx: table_idx for table_idx in range(number_of_tables)}):
+            return 0
 
-        return stats
+        # Move the people of every relocated table, seat by seat
+        moved = [table_idx for table_idx in range(number_of_tables) if position_of[table_idx] != table_idx]
+        groups = []
+        for table_idx in moved:
+            table = self.tables[table_idx]
+            occupants = [(seat_idx, seat.occupant) for seat_idx, seat in enumerate(table.seats) if not seat.free]
+            for seat_idx, _ in occupants:
+                self._unseat_person(table_idx, seat_idx)
+            groups.append((position_of[table_idx], occupants))
+        for position, occupants in groups:
+            for seat_idx, name in occupants:
+                self._seat_person(position, name, seat_idx)
+        return len(moved)
+
+    def get_proximity_stats(self) -> dict | None:
+        """How well the floor layout serves the preferences of seated people.
+
+        :return: dict with the number of whitelist edges split across tables, their
+            total and average distance, and the number of blacklist edges between
+            adjacent tables; None if the room has no layout."""
+        if self.layout is None:
+            return None
+        split = 0
+        split_distance = 0.0
+        blacklist_adjacent = 0
+        for table_idx, others in self._table_ties().items():
+            for other, (whitelist, blacklist) in others.items():
+                if other < table_idx:
+                    continue
+                distance = self.layout.distance(table_idx, other)
+                split += whitelist
+                split_distance += whitelist * distance
+                if distance <= self.layout.adjacency:
+                    blacklist_adjacent += blacklist
+        return {
+            "whitelist_split": split,
+            "whitelist_split_distance": split_distance,
+            "whitelist_split_average": split_distance / split if split else 0.0,
+            "blacklist_adjacent": blacklist_adjacent
+        }
 
-    def _find_person_table(self, person_name: str) -> int | None:
-        """Find which table a person is seated at.
+    def _find_group_table(self, group: list[str], ideal_distribution: list[int],
+                          cursors: dict | None = None) -> int | None:
+        """Find a table for a whole whitelist group.
+
+        Prefers the first table whose distribution target still has room for the
+        group, and falls back to the first table with enough free seats.
+
+        While tables only fill up (as in Phase 1), a table without room for a
+        group size never gets room again. cursors remembers, per group size,
+        where the leading run of such tables ends, so later searches start
+        there instead of scanning every table again.
+
+        :param group: the people who want to sit together.
+        :param ideal_distribution: target number of people per table.
+        :param cursors: dict kept between calls while tables only fill up, or None.
+        :return: table index or None if no table can take the whole group."""
+        size = len(group)
+        if size > self.table_capacity:
+            return None
+        if self.constraints and not self._group_allows(group):
+            return None  # The group alone is over an attribute maximum
+        if cursors is None:
+            cursors = {}
+        for use_target in (True, False):
+            key = (use_target, size)
+            start = cursors.get(key, 0)
+            leading = True  # Every table from start up to here lacks room
+            for table_idx in range(start, len(self.tables)):
+                table = self.tables[table_idx]
+                room = ideal_distribution[table_idx] - table.occupied if use_target else table.left_capacity()
+                if room < size:
+                    if leading:
+                        cursors[key] = table_idx + 1
+                    continue
+                leading = False
+                # Check if all group members can sit at this table (no blacklist violations)
+                if not all(self._can_sit_at_table(person, table_idx) for person in group):
+                    continue
+                if self.constraints and not self._group_allows(group, table_idx):
+                    continue
+                return table_idx
+        return None
+
+    def _blacklist_neighbors(self, person: str) -> list[str]:
+        """Everyone a person has a hard blacklist edge with, in either direction."""
+        return self.preferences.hard_neighbors(person, "blacklist")
+
+    def _assign_to_targets(self, people: list[str], target_additions: list[int],
+                           deadline: float | None = None) -> list[str]:
+        """Seat people so that every table receives exactly its target number of people.
+
+        This is a capacitated matching of people to tables, solved with
+        augmenting paths. People with hard blacklist edges are matched first,
+        most constrained first, each to an open table where nobody conflicts with
+        them. When every open table is blocked, a breadth-first search looks for
+        a chain of people placed earlier in this phase who each take the seat of
+        the next one, the last moving to an open table (see _augment_target).
+        People without any hard blacklist edge, hard whitelist or attribute
+        maximum can sit anywhere, so they simply fill whatever capacity is left.
+        Each person costs O(degree) apart from the augmenting search and, for
+        people under an attribute maximum or with a hard whitelist, the open
+        tables skipped because they cannot sit there.
+
+        The targets are not guaranteed. Whether someone fits at a table depends
+        on who else sits there, so this is not a plain bipartite matching.
+        Some rooms can only meet their targets by moving several chains of
+        people at once, and a single augmenting path cannot find that. Those
+        people are left over and seated by the later phases.
+
+        :param people: names to seat, in the order to consider them.
+        :param target_additions: number of people each table should still receive.
+        :param deadline: time.perf_counter() value after which the augmenting search is skipped.
+        :return: names that could not be matched within the targets."""
+        remaining = target_additions.copy()
+        open_tables = [idx for idx, needed in enumerate(remaining) if needed > 0]
+        position = {table_idx: i for i, table_idx in enumerate(open_tables)}
+        placed = set()  # People seated by this phase, who may still be moved
+
+        def place(person: str, table_idx: int) -> None:
+            self._seat_person(table_idx, person)
+            placed.add(person)
+            remaining[table_idx] -= 1
+            if remaining[table_idx] == 0:
+                # Swap-remove the table from the open list
+                i = position.pop(table_idx)
+                last = open_tables.pop()
+                if last != table_idx:
+                    open_tables[i] = last
+                    position[last] = i
+
+        def first_open(blocked: set, person: str | None = None) -> int | None:
+            # Without attribute limits or hard whitelists, at most len(blocked) + 1 open tables are looked at
+            check_tables = person is not None and self._limited_at_tables(person)
+            for table_idx in open_tables:
+                if table_idx not in blocked and (not check_tables or (self._attribute_allows(person, table_idx)
+                                                                      and self._whitelist_allows(person, table_idx))):
+                    return table_idx
+            return None
+
+        constrained = []
+        unconstrained = []
+        for person in people:
+            degree = len(self._blacklist_neighbors(person))
+            if degree or self._limited_at_tables(person):
+                constrained.append((degree, person))
+            else:
+                unconstrained.append(person)
+        constrained.sort(key=lambda item: item[0], reverse=True)
+
+        leftovers = []
+        for _, person in constrained:
+            if not open_tables:
+                leftovers.append(person)
+                continue
+            table_idx = first_open(self._blocked_tables(person), person)
+            if table_idx is not None:
+                place(person, table_idx)
+            elif self._past(deadline) or not self._augment_target(person, placed, remaining, first_open, place,
+                                                                  deadline=deadline):
+                leftovers.append(person)
+
+        for person in unconstrained:
+            if open_tables:
+                place(person, open_tables[-1])
+            else:
+                leftovers.append(person)
+        return leftovers
+
+    def _blocked_tables(self, person: str) -> set:
+        """Tables where someone with a hard blacklist edge to a person sits."""
+        person_tables = self._person_tables
+        return {person_tables[other] for other in self._blacklist_neighbors(person) if other in person_tables}
+
+    def _augment_target(self, person: str, placed: set, remaining: list[int], first_open, place,
+                        budget: int = 200_000, deadline: float | None = None) -> bool:
+        """Seat a person whose open tables are all blocked, along an augmenting path.
+
+        Breadth-first search over the people placed earlier in Phase 2: the
+        person takes the seat of someone q at a table where q is the only one
+        in the way, q takes the seat of someone else in the same way, and so on
+        until the last one moves to an open table. Every table on the path loses
+        one person and gains one, except the open table at the end, so every
+        table still receives its target. The open table at the end may already
+        be on the path (see _open_path_table); otherwise no table is used twice.
+        People with a hard whitelist edge are never moved. A person is searched
+        again when a different predecessor evicts them, so paths are not cut off
+        by whoever reached them first.
+
+        The search stops after examining budget tables. That covers small and
+        medium rooms completely. In larger rooms a path can then be missed.
+
+        :param person: the unseated person.
+        :param placed: people seated by this phase.
+        :param remaining: number of people each table should still receive.
+        :param first_open: returns an open table a person can sit at, given the tables they are blocked from.
+        :param place: seats a person at an open table and updates the targets.
+        :param budget: maximum number of tables examined.
+        :param deadline: time.perf_counter() value at which to give up.
+        :return: True if the person was seated."""
+        # Search states: (person to move, index of the state whose person takes their seat, their table)
+        states = [(person, -1, None)]
+        seen = set()
+        queue = deque([0])
+        while queue and budget > 0 and not self._past(deadline):
+            index = queue.popleft()
+            mover = states[index][0]
+            # Table each earlier person on the path moves to
+            moved_to = {}
+            step = states[index]
+            while step[1] >= 0:
+                moved_to[states[step[1]][0]] = step[2]
+                step = states[step[1]]
+            path_tables = set(moved_to.values())
+            current = self._person_tables.get(mover)
+            blocked = self._blocked_tables(mover)
+
+            destination = first_open(blocked | path_tables | {current}, mover)
+            budget -= 1
+            if destination is None:
+                destination = self._open_path_table(mover, moved_to, current, remaining)
+            if destination is not None:
+                self._apply_augmenting_path(states, index, destination, placed, place)
+                return True
+
+            conflicts = {}
+            for other in self._blacklist_neighbors(mover):
+                table_idx = self._person_tables.get(other)
+                if table_idx is not None:
+                    conflicts.setdefault(table_idx, []).append(other)
+            for table_idx, table in enumerate(self.tables):
+                budget -= 1
+                if table_idx == current or table_idx in path_tables:
+                    continue
+                in_the_way = conflicts.get(table_idx, ())
+                if len(in_the_way) > 1 or not self._whitelist_allows(mover, table_idx):
+                    continue
+                candidates = in_the_way or [seat.occupant for seat in table.seats if not seat.free]
+                for evicted in candidates:
+                    if (evicted, mover) in seen or evicted not in placed or evicted in moved_to:
+                        continue
+                    if self.preferences.hard_neighbors(evicted, "whitelist"):
+                        continue
+                    if not self._attribute_allows(mover, table_idx, leaving=evicted):
+                        continue
+                    seen.add((evicted, mover))
+                    states.append((evicted, index, table_idx))
+                    queue.append(len(states) - 1)
+        return False
+
+    def _open_path_table(self, mover: str, moved_to: dict, current: int | None, remaining: list[int]) -> int | None:
+        """An open table already on an augmenting path where the last mover can end it.
+
+        Each table on the path keeps its size, so an open one can still take the
+        mover; the blacklist check uses the tables people sit at after the path.
+        Only used without attribute rules or a hard whitelist for the mover, as
+        those are checked against the current table counts.
+
+        :param mover: the last person on the path.
+        :param moved_to: earlier people on the path -> the table they move to.
+        :param current: the mover's table.
+        :param remaining: number of people each table should still receive.
+        :return: the table index, or None."""
+        if self.constraints or self.preferences.hard_neighbors(mover, "whitelist"):
+            return None
+        person_tables = self._person_tables
+        for table_idx in dict.fromkeys(moved_to.values()):
+            if table_idx == current or remaining[table_idx] <= 0:
+                continue
+            if all(moved_to.get(other, person_tables.get(other)) != table_idx
+                   for other in self._blacklist_neighbors(mover)):
+                return table_idx
+        return None
+
+    def _apply_augmenting_path(self, states: list, index: int, destination: int, placed: set, place) -> None:
+        """Carry out the moves found by _augment_target, from the open table back to the unseated person."""
+        last = states[index][0]
+        current = self._person_tables.get(last)
+        if current is not None:
+            self._unseat_person(current, self.tables[current].find_seat(last))
+        place(last, destination)
+        while states[index][1] >= 0:
+            # The person of this state has left their table; the one who evicted them takes the free seat
+            _, index, table_idx = states[index]
+            mover = states[index][0]
+            current = self._person_tables.get(mover)
+            if current is not None:
+                self._unseat_person(current, self.tables[current].find_seat(mover))
+            self._seat_person(table_idx, mover)
+            placed.add(mover)
+
+    def _blockers(self, person: str, table_idx: int, moved_out: set, moved_in: dict) -> list[str]:
+        """People at a table who conflict with a person, taking planned moves into account.
+
+        :param person: the person who would sit at the table.
+        :param table_idx: index of the table.
+        :param moved_out: people planned to leave their table.
+        :param moved_in: table index -> people planned to sit there.
+        :return: list of conflicting people."""
+        person_tables = self._person_tables
+        blockers = []
+        for other in self._blacklist_neighbors(person):
+            if other not in moved_out and person_tables.get(other) == table_idx and other not in blockers:
+                blockers.append(other)
+        for other in moved_in.get(table_idx, ()):
+            if self.preferences.has_conflict(person, other):
+                blockers.append(other)
+        return blockers
+
+    def _is_anchored(self, person: str) -> bool:
+        """Check if a seated person shares their table with someone on a whitelist edge."""
+        table_idx = self._person_tables.get(person)
+        for other in self.preferences.targets(person, "whitelist") + self.preferences.owners(person, "whitelist"):
+            if other != person and self._person_tables.get(other) == table_idx:
+                return True
+        return False
+
+    def _find_augmenting_chain(self, person: str, free_tables: list[int], max_depth: int, budget: int) -> list | None:
+        """Breadth-first search for a short chain of moves that seats a person.
+
+        A chain is a list of (person, table index, evicted person or None): each
+        person takes the seat of the one they evict, and the last one takes a free
+        seat. No step may break a blacklist or an attribute maximum.
+
+        :param person: the unseated person.
+        :param free_tables: indices of tables with at least one free seat.
+        :param max_depth: maximum number of moves in the chain.
+        :param budget: maximum number of tables examined.
+        :return: the chain or None if none was found within the limits."""
+        queue = [[(person, None, None)]]
+        for chain in queue:
+            # The first entry is the unseated person; after that, the last evicted person moves next
+            mover = chain[-1][2] if len(chain) > 1 else person
+            moved_out = {step[2] for step in chain if step[2] is not None}
+            moved_in = {}
+            path_tables = set()
+            for step_person, step_table, _ in chain:
+                if step_table is not None:
+                    moved_in.setdefault(step_table, []).append(step_person)
+                    path_tables.add(step_table)
+            current = self._person_tables.get(mover)
+            steps = [step for step in chain if step[1] is not None]
+
+            # Terminal move: a free seat without conflicts
+            for table_idx in free_tables:
+                budget -= 1
+                if table_idx in path_tables or table_idx == current:
+                    continue
+                if not self._blockers(mover, table_idx, moved_out, moved_in) and \
+                        self._attribute_allows(mover, table_idx) and self._whitelist_allows(mover, table_idx):
+                    return steps + [(mover, table_idx, None)]
+            if len(steps) + 1 >= max_depth or budget <= 0:
+                continue
+
+            # Take the seat of a single blocker, who then has to move on
+            candidates = []
+            person_tables = self._person_tables
+            for other in self._blacklist_neighbors(mover):
+                table_idx = person_tables.get(other)
+                if table_idx is not None and table_idx not in path_tables and table_idx != current:
+                    candidates.append(table_idx)
+            # Or take any seat at a few other tables and move its occupant on
+            candidates.extend(random.sample(range(len(self.tables)), min(len(self.tables), 8)))
+
+            for table_idx in dict.fromkeys(candidates):
+                budget -= 1
+                if table_idx in path_tables or table_idx == current:
+                    continue
+                blockers = self._blockers(mover, table_idx, moved_out, moved_in)
+                if len(blockers) > 1 or any(blocker in moved_in.get(table_idx, ()) for blocker in blockers):
+                    continue
+                evictable = blockers or [
+                    seat.occupant for seat in self.tables[table_idx].seats
+                    if not seat.free and seat.occupant not in moved_out
+                ]
+                for evicted in evictable:
+                    if evicted == person or self._is_anchored(evicted):
+                        continue
+                    if self.preferences.hard_neighbors(evicted, "whitelist"):
+                        continue
+                    if not (self._attribute_allows(mover, table_idx, leaving=evicted)
+                            and self._whitelist_allows(mover, table_idx)):
+                        continue
+                    queue.append(chain + [(mover, table_idx, evicted)])
+                if budget <= 0:
+                    break
+        return None
+
+    def _repair_unseated(self, max_depth: int = 3, budget: int = 2000) -> int:
+        """Seat people left out by blacklist conflicts by moving already seated people.
+
+        :param max_depth: maximum number of moves per repaired person.
+        :param budget: maximum number of tables examined per unseated person.
+        :return: number of people who got a seat."""
+        repaired = 0
+        still_unseated = []
+        for person in self.unseated:
+            free_tables = [idx for idx, table in enumerate(self.tables) if table.has_free_spot()]
+            if not free_tables:
+                still_unseated.append(person)
+                continue
+            chain = self._find_augmenting_chain(person, free_tables, max_depth, budget)
+            if chain is None:
+                still_unseated.append(person)
+                continue
+            for mover, table_idx, evicted in chain:
+                if evicted is None:
+                    self._seat_person(table_idx, mover)
+                else:
+                    seat_idx = self.tables[table_idx].find_seat(evicted)
+                    self._unseat_person(table_idx, seat_idx)
+                    self._seat_person(table_idx, mover, seat_idx)
+            repaired += 1
+        self.unseated = still_unseated
+        return repaired
+
+    def _attribute_count(self, attribute: str, table_idx: int, code: int) -> int:
+        """Number of people with a value code at a table, from the counters."""
+        row = self._attribute_counts[attribute][table_idx]
+        return row[code] if 0 <= code < len(row) else 0
+
+    def _swap_allowed(self, first: str, first_table: int, second: str, second_table: int) -> bool:
+        """Check that two seated people can trade tables without breaking a hard preference or a constraint.
+
+        No hard blacklist may be broken and no hard whitelist that holds may be
+        split. No table may go over a maximum, nor drop below a minimum it still meets.
+
+        :return: True if the swap is allowed."""
+        moved_out = {first, second}
+        if self._blockers(first, second_table, moved_out, {}) or self._blockers(second, first_table, moved_out, {}):
+            return False
+        person_tables = self._person_tables
+        for person, source in ((first, first_table), (second, second_table)):
+            for other in self.preferences.hard_neighbors(person, "whitelist"):
+                if other not in moved_out and person_tables.get(other) == source:
+                    return False
+        if not (self._attribute_allows(first, second_table, leaving=second)
+                and self._attribute_allows(second, first_table, leaving=first)):
+            return False
+        first_id, second_id = self.names.get(first), self.names.get(second)
+        for constraint in self.constraints:
+            if constraint.min_per_table is None:
+                continue
+            code = self.attributes.value_code(constraint.attribute, constraint.value)
+            first_has = self.attributes.code(first_id, constraint.attribute) == code
+            second_has = self.attributes.code(second_id, constraint.attribute) == code
+            if first_has != second_has:
+                losing_table = first_table if first_has else second_table
+                if self._attribute_count(constraint.attribute, losing_table, code) <= constraint.min_per_table:
+                    return False
+        return True
+
+    def _swap_people(self, first: str, first_table: int, second: str, second_table: int) -> None:
+        """Let two seated people trade seats.
+
+        :return: None"""
+        first_seat = self.tables[first_table].find_seat(first)
+        second_seat = self.tables[second_table].find_seat(second)
+        self._unseat_person(first_table, first_seat)
+        self._unseat_person(second_table, second_seat)
+        self._seat_person(second_table, first, second_seat)
+        self._seat_person(first_table, second, first_seat)
+
+    def _balance_minimums(self, attempts: int = 64) -> int:
+        """Meet the min_per_table constraints by swapping people between tables.
+
+        A table below a minimum trades someone without the value for someone
+        with it from a table that has more than the minimum, so table sizes do
+        not change. People who sit with someone on a whitelist edge are moved
+        last. Tables that cannot be balanced keep their shortfall, which
+        get_constraint_violations reports.
+
+        :param attempts: maximum number of candidate pairs tried per missing person.
+        :return: number of swaps made."""
+        swaps = 0
+        for constraint in self.constraints:
+            if constraint.min_per_table is None:
+                continue
+            attribute, minimum = constraint.attribute, constraint.min_per_table
+            code = self.attributes.value_code(attribute, constraint.value)
+            if code == AttributeStore.MISSING:
+                continue
+            donors = [idx for idx in range(len(self.tables)) if self._attribute_count(attribute, idx, code) > minimum]
+            for table_idx in range(len(self.tables)):
+                while self.tables[table_idx].occupied and self._attribute_count(attribute, table_idx, code) < minimum:
+                    donor = self._swap_in_value(attribute, code, table_idx, donors, attempts)
+                    if donor is None:
+                        break
+                    swaps += 1
+                    if self._attribute_count(attribute, donor, code) <= minimum:
+                        donors.remove(donor)
+        return swaps
+
+    def _swap_in_value(self, attribute: str, code: int, table_idx: int, donors: list[int], attempts: int) -> bool:
+        """Bring one more person with a value code to a table, in exchange for someone without it.
+
+        :param attribute: attribute name.
+        :param code: value code to bring in.
+        :param table_idx: index of the table short of the value.
+        :param donors: tables with more people with the value than the minimum.
+        :param attempts: maximum number of candidate pairs tried.
+        :return: index of the table that gave someone, or None if no swap was made."""
+        has_value = lambda person: self.attributes.code(self.names.get(person), attribute) == code
+        receivers = sorted((seat.occupant for seat in self.tables[table_idx].seats
+                            if not seat.free and not has_value(seat.occupant)), key=self._is_anchored)
+        if not receivers:
+            return None
+        for donor in donors:
+            givers = sorted((seat.occupant for seat in self.tables[donor].seats
+                             if not seat.free and has_value(seat.occupant)), key=self._is_anchored)
+            for giver in givers:
+                for receiver in receivers:
+                    if self._swap_allowed(giver, donor, receiver, table_idx):
+                        self._swap_people(giver, donor, receiver, table_idx)
+                        return donor
+                    attempts -= 1
+                    if attempts <= 0:
+                        return None
+        return None
+
+    def _person_table_map(self) -> dict[str, int]:
+        """Map every seated person to the index of their table in a single pass.
 
-        :param person_name: name of person to find
-        :return: table index or None if not seated"""
+        :return: dict of person name -> table index"""
+        person_tables = {}
         for idx, table in enumerate(self.tables):
             for seat in table.seats:
-                if not seat.free and seat.occupant == person_name:
-                    return idx
-        return None
+                if not seat.free:
+                    person_tables[seat.occupant] = idx
+        return person_tables
+
+    def _iter_preference_edges(self, person_tables: dict[str, int]):
+        """Walk every preference edge whose owner is seated.
+
+        Each edge is yielded once as (person, target, type, person_table, satisfied).
+
+        :param person_tables: person -> table index map from _person_table_map
+        :return: generator of edge tuples"""
+        for preference_type in ("whitelist", "blacklist"):
+            want_together = preference_type == "whitelist"
+            for person, targets in self.preferences.items(preference_type):
+                person_table = person_tables.get(person)
+                if person_table is None:
+                    continue
+                for target in targets:
+                    together = person_tables.get(target) == person_table
+                    yield person, target, preference_type, person_table, together == want_together
 
     def _calculate_preference_stats(self) -> dict:
         """Calculate how many preferences are satisfied vs violated.
@@ -363,60 +1738,207 @@ class Openspace:
             'blacklist_violated': 0
         }
 
-        # Check whitelist
-        for person, preferred_people in self.preferences["whitelist"].items():
-            person_table = self._find_person_table(person)
-            if person_table is None:
-                continue
+        for _, _, preference_type, _, satisfied in self._iter_preference_edges(self._person_table_map()):
+            if satisfied:
+                stats[f'{preference_type}_satisfied'] += 1
+            else:
+                stats[f'{preference_type}_violated'] += 1
 
-            for preferred in preferred_people:
-                preferred_table = self._find_person_table(preferred)
-                if preferred_table == person_table:
-                    stats['whitelist_satisfied'] += 1
-                else:
-                    stats['whitelist_violated'] += 1
+        return stats
 
-        # Check blacklist
-        for person, avoided_people in self.preferences["blacklist"].items():
-            person_table = self._find_person_table(person)
-            if person_table is None:
+    def get_violations(self, preference_type: str | None = None, person: str | None = None,
+                       offset: int = 0, limit: int | None = None) -> list[dict]:
+        """Build a report of the preferences broken by the current arrangement.
+
+        Every record is a dict with the keys person, target, type and table, where
+        table is the 1-based number of the table the person sits at. Only the
+        currently violated edges are visited.
+
+        :param preference_type: only report 'whitelist' or 'blacklist' violations (default: both).
+        :param person: only report violations involving this person, on either end.
+        :param offset: number of matching records to skip (for pagination).
+        :param limit: maximum number of records to return (default: no limit).
+        :return: list of violation records."""
+        violations = []
+        skipped = 0
+        for owner, target, edge_type in self._violated_edges:
+            if preference_type is not None and edge_type != preference_type:
+                continue
+            if person is not None and person not in (owner, target):
                 continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            if limit is not None and len(violations) >= limit:
+                break
+            violations.append({
+                "person": owner,
+                "target": target,
+                "type": edge_type,
+                "table": self._person_tables[owner] + 1
+            })
+        return violations
 
-            for avoided in avoided_people:
-                avoided_table = self._find_person_table(avoided)
-                if avoided_table != person_table or avoided_table is None:
-                    stats['blacklist_satisfied'] += 1
-                else:
-                    stats['blacklist_violated'] += 1
+    def get_violated_edges(self) -> list[tuple[str, str, str]]:
+        """Returns the preference edges broken by the current arrangement.
 
-        return stats
+        :return: list of (person, target, type) tuples."""
+        return list(self._violated_edges)
+
+    def get_preference_stats(self) -> dict:
+        """Returns how many preferences are satisfied vs violated right now.
+
+        :return: dict with satisfaction statistics"""
+        return self._preference_totals.copy()
+
+    def add_constraint(self, constraint: AttributeConstraint) -> None:
+        """Add a table composition rule that organize enforces from now on.
+
+        The current seating is not changed; see get_constraint_violations.
+
+        :param constraint: the rule, e.g. AttributeConstraint("team", max_per_table=2).
+        :return: None"""
+        self.constraints.append(constraint)
+        self._recount_attributes()
+
+    def remove_constraint(self, index: int) -> AttributeConstraint | None:
+        """Remove a table composition rule.
+
+        :param index: position of the rule in self.constraints.
+        :return: the removed rule, or None if there is no rule at that position."""
+        if not 0 <= index < len(self.constraints):
+            return None
+        constraint = self.constraints.pop(index)
+        self._recount_attributes()
+        return constraint
+
+    def set_attribute(self, person: str, attribute: str, value: str | None) -> None:
+        """Set (or with None or "", clear) one person's value of an attribute.
+
+        :return: None"""
+        if self._shared_attributes:
+            self.attributes = self.attributes.copy()
+            self._shared_attributes = False
+        self.attributes.set(person, attribute, value)
+        self._recount_attributes()
+
+    def update_attributes(self, attributes: list[str], rows: Iterable[tuple[str, list[str]]]) -> int:
+        """Set many people's values at once, e.g. for rows appended to the roster.
+
+        The table counters are recounted once, and only if someone updated is seated.
+
+        :param attributes: attribute names, one per value column.
+        :param rows: (person, values) pairs, values in the order of attributes.
+        :return: number of people updated."""
+        if self._shared_attributes:
+            self.attributes = self.attributes.copy()
+            self._shared_attributes = False
+        rows = list(rows)
+        count = self.attributes.update_rows(attributes, rows)
+        if any(person in self._person_tables for person, _ in rows):
+            self._recount_attributes()
+        return count
+
+    def load_attributes(self, filename: str | None = None) -> int:
+        """Read the extra columns of the roster file into the attribute store.
+
+        A roster with only names leaves the attributes as they are, e.g. as
+        restored from the state file.
+
+        :param filename: roster CSV (default: the input file).
+        :return: number of attributes read."""
+        names, attributes, rows = FileUtils.load_roster(filename or self.input_file)
+        if not attributes:
+            return 0
+        store = AttributeStore(self.names)
+        store.update_rows(attributes, zip(names, rows))
+        self.attributes = store
+        self._shared_attributes = False
+        self._recount_attributes()
+        return len(attributes)
+
+    def get_constraint_violations(self) -> list[dict]:
+        """List every table that breaks a table composition rule.
+
+        :return: list of dicts with the 1-based "table_number", the "rule" (its
+            description), the "value" concerned and the "count" at the table."""
+        violations = []
+        for constraint in self.constraints:
+            attribute = constraint.attribute
+            values = self.attributes.values(attribute)
+            if constraint.value is not None:
+                codes = [self.attributes.value_code(attribute, constraint.value)]
+            else:
+                codes = range(len(values))
+            for table_idx, table in enumerate(self.tables):
+                if not table.occupied:
+                    continue
+                for code in codes:
+                    count = self._attribute_count(attribute, table_idx, code)
+                    too_many = constraint.max_per_table is not None and count > constraint.max_per_table
+                    too_few = constraint.min_per_table is not None and count < constraint.min_per_table
+                    if too_many or too_few:
+                        violations.append({
+                            "table_number": table_idx + 1,
+                            "rule": constraint.describe(),
+                            "value": values[code] if code != AttributeStore.MISSING else constraint.value,
+                            "count": count
+                        })
+        return violations
+
+    def get_scorer(self) -> PreferenceScorer:
+        """Returns a scorer over the current (weighted) preferences, for comparing arrangements.
+
+        :return: a new PreferenceScorer; build another one after preferences change."""
+        return PreferenceScorer(self.preferences)
+
+    def get_score(self) -> dict:
+        """Scores the current arrangement against the weighted preferences.
+
+        :return: dict as returned by PreferenceScorer.evaluate."""
+        scorer = self.get_scorer()
+        return scorer.evaluate(scorer.table_array(self._person_tables))
+
+    def get_occupancy_histogram(self) -> list[int]:
+        """Returns how many tables hold each possible number of people.
+
+        :return: list where index i is the number of tables with i occupants"""
+        return self._occupancy_histogram.copy()
 
     def get_remaining_seats(self) -> int:
         """Returns the number of remaining free seats in the openspace.
 
         :return: Number of free seats"""
-        remaining = 0
-        for table in self.tables:
-            remaining += table.left_capacity()
-        return remaining
-    
+        return self.get_total_seats() - self._seated_count
+
     def get_seated_count(self) -> int:
         """Returns the number of seats filled in.
 
         :return: Number of seated colleagues"""
-        seated = 0
-        for table in self.tables:
-            seated += table.capacity - table.left_capacity()
-        return seated
+        return self._seated_count
 
-    def display(self) -> None:
+    def get_person_table(self, name: str) -> int | None:
+        """Returns the table a person is seated at.
+
+        :param name: name of the person.
+        :return: 0-based table index, or None if the person is not seated"""
+        return self._person_tables.get(name)
+
+    def display(self, start: int = 0, count: int | None = None) -> None:
         """Displays the different tables and their occupants in a nice and readable way.
 
+        The output is built in one buffer and printed at once.
+
+        :param start: index of the first table to show (default: 0).
+        :param count: number of tables to show (default: all remaining tables).
         :return: None"""
-        for i, table in enumerate(self.tables):
-            print(f"Table {i+1}:")
-            print(table)
-            print("-" * 20)
+        end = len(self.tables) if count is None else min(len(self.tables), start + count)
+        lines = []
+        for i in range(start, end):
+            lines.append(f"Table {i+1}:")
+            lines.append(str(self.tables[i]))
+            lines.append("-" * 20)
+        print("\n".join(lines))
 
     def display_statistics(self) -> None:
         """Displays statistics about the seating arrangement.
@@ -440,65 +1962,110 @@ class Openspace:
             for name in self.unseated:
                 print(f"  - {name}")
 
-    def store(self, filename: str = "output.csv") -> None:
+    def store(self, filename: str = "output.csv", force: bool = False) -> None:
         """Stores the repartition in a file. default: output.csv
 
         :param filename: name of the file to store the repartition. (default: output.csv)
-        :return: None"""
+        :param force: for JSON state files, overwrite changes saved by another session.
+        :return: None
+        :raises StateConflictError: if another session saved the JSON state file since it was loaded."""
         # Check if filename is JSON or CSV
         if filename.endswith('.json'):
             # Store complete state in JSON format
-            self.store_complete_state(filename)
+            self.store_complete_state(filename, force)
         else:
-            # Legacy CSV format - only seating arrangement
-            data = []
-            for i, table in enumerate(self.tables):
-                for j, seat in enumerate(table.seats):
-                    data.append(
-                        (i + 1, j + 1, seat.occupant if not seat.free else "Free")
-                    )
-
-            # Add unseated colleagues with table 0 and seat 0
-            for name in self.unseated:
-                data.append((0, 0, name))
+            # Legacy CSV format - only seating arrangement, written row by row
+            FileUtils.store_seating(filename, self.iter_seating_rows(), compress=filename.endswith(".gz"))
+
+    def iter_seating_rows(self):
+        """Yields the rows of the CSV export, one seat at a time.
 
-            # Use FileUtils to store the data
-            FileUtils.store_seating(filename, data)
+        Free seats have the occupant "Free"; unseated colleagues follow with table 0 and seat 0.
 
-    def store_complete_state(self, filename: str = "openspace_state.json") -> None:
+        :return: iterator of (table_number, seat_number, occupant) tuples."""
+        for i, table in enumerate(self.tables):
+            for j, seat in enumerate(table.seats):
+                yield i + 1, j + 1, seat.occupant if not seat.free else "Free"
+        for name in self.unseated:
+            yield 0, 0, name
+
+    def store_complete_state(self, filename: str = "openspace_state.json", force: bool = False) -> None:
         """Store complete openspace state including preferences and configuration.
 
+        If this openspace loaded or saved the file before, the save fails when
+        another session has saved it in the meantime, instead of silently
+        overwriting their changes.
+
         :param filename: name of the JSON file to store the state.
-        :return: None"""
-        # Build complete state dictionary
-        state = {
+        :param force: overwrite the file even if another session changed it.
+        :return: None
+        :raises StateConflictError: if the file changed since this openspace last loaded or saved it."""
+        # Written table by table; the history records each part as it goes by
+        state = self.stream_state()
+
+        # Use FileUtils to store the complete state
+        key = os.path.abspath(filename)
+        expected_version = None if force else self._state_versions.get(key)
+        if self.history is None:
+            self._state_versions[key] = FileUtils.store_openspace_state(filename, state, expected_version)
+            return
+        with self.history.recording() as recording:
+            self._state_versions[key] = FileUtils.store_openspace_state(filename, recording.tee(state),
+                                                                        expected_version)
+            recording.finish(self._state_versions[key])
+
+    def _table_state(self, table_idx: int) -> dict:
+        """One entry of the "tables" list of the state file."""
+        return {
+            "table_number": table_idx + 1,
+            "seats": [
+                {
+                    "seat_number": j + 1,
+                    "occupant": seat.occupant if not seat.free else None,
+                    "free": seat.free
+                }
+                for j, seat in enumerate(self.tables[table_idx].seats)
+            ]
+        }
+
+    def stream_state(self) -> dict:
+        """The complete state like get_state, with the tables and preferences produced lazily.
+
+        The tables are a generator and each preference type a StreamedObject, so
+        FileUtils.write_json can write the state with one table in memory at a
+        time. The result can be written once; use get_state for a plain dict.
+
+        :return: dict with the config, roster fingerprint, tables, unseated people, preferences and attributes."""
+        return {
             "config": {
                 "number_of_tables": self.number_of_tables,
                 "table_capacity": self.table_capacity,
-                "input_file": self.input_file
+                "input_file": self.input_file,
+                "layout": self.layout.to_dict() if self.layout is not None else None,
+                "constraints": [constraint.to_dict() for constraint in self.constraints]
             },
-            "tables": [],
+            "roster_fingerprint": self.roster_fingerprint,
+            "tables": (self._table_state(i) for i in range(len(self.tables))),
             "unseated": self.unseated.copy(),
-            "preferences": self.preferences.copy()
+            "preferences": {
+                preference_type: StreamedObject(self.preferences.state_items(preference_type))
+                for preference_type in PREFERENCE_TYPES
+            },
+            "attributes": {
+                attribute: StreamedObject(self.attributes.items(attribute))
+                for attribute in self.attributes.attributes()
+            }
         }
 
-        # Add table data
-        for i, table in enumerate(self.tables):
-            table_data = {
-                "table_number": i + 1,
-                "seats": []
-            }
-            for j, seat in enumerate(table.seats):
-                seat_data = {
-                    "seat_number": j + 1,
-                    "occupant": seat.occupant if not seat.free else None,
-                    "free": seat.free
-                }
-                table_data["seats"].append(seat_data)
-            state["tables"].append(table_data)
+    def get_state(self) -> dict:
+        """Build the complete state as stored in the JSON state file.
 
-        # Use FileUtils to store the complete state
-        FileUtils.store_openspace_state(filename, state)
+        :return: dict with the config, roster fingerprint, tables, unseated people, preferences and attributes."""
+        state = self.stream_state()
+        state["tables"] = list(state["tables"])
+        state["preferences"] = self.preferences.to_dict()
+        state["attributes"] = self.attributes.to_dict()
+        return state
 
     def load_from_file(self, filename: str) -> bool:
         """Load seating arrangement from a file (CSV or JSON).
@@ -516,6 +2083,8 @@ class Openspace:
                 return False
 
             # Clear current seating
+            self._reset_undo()
+            self._name_index = None
             self.unseated = []
 
             # Find max table number in the file
@@ -526,8 +2095,7 @@ class Openspace:
                 print(f"Warning: File has {max_table} tables but room only has {self.number_of_tables} tables.")
 
             # Clear all tables
-            for table in self.tables:
-                table.seats = [Seat() for _ in range(self.table_capacity)]
+            self._clear_tables()
 
             # Assign people from the file
             for table_num, seat_num, occupant in data:
@@ -541,11 +2109,12 @@ class Openspace:
                         seat_idx = seat_num - 1
                         # Only seat if within current table/capacity limits
                         if table_idx < self.number_of_tables and seat_idx < self.table_capacity:
-                            self.tables[table_idx].seats[seat_idx].set_occupant(occupant)
+                            self.tables[table_idx].set_seat(seat_idx, occupant)
                         else:
                             # Person was at a table that no longer exists
                             self.unseated.append(occupant)
 
+            self._rebuild_tracking()
             return True
 
     def load_complete_state(self, filename: str = "openspace_state.json") -> bool:
@@ -555,28 +2124,56 @@ class Openspace:
         :return: True if loaded successfully, False otherwise."""
         state = FileUtils.load_openspace_state(filename)
         if not state:
+            if not os.path.exists(filename):
+                # Saving must not overwrite a file another session creates meanwhile
+                self._state_versions[os.path.abspath(filename)] = 0
             return False
+        self._state_versions[os.path.abspath(filename)] = state.get("version", 0)
+
+        self.load_state(state)
+        return True
 
+    def load_state(self, state: dict) -> None:
+        """Replace the room with a state as built by get_state.
+
+        :param state: the state dict, e.g. from a state file or StateHistory.restore.
+        :return: None"""
+        self._reset_undo()
+        self._name_index = None
         # Load config if present
         if "config" in state:
             config = state["config"]
-            self.number_of_tables = config.get("number_of_tables", self.number_of_tables)
-            self.table_capacity = config.get("table_capacity", self.table_capacity)
+            number_of_tables = config.get("number_of_tables", self.number_of_tables)
+            table_capacity = config.get("table_capacity", self.table_capacity)
             self.input_file = config.get("input_file", self.input_file)
+            if "layout" in config:
+                self.layout = TableLayout.from_dict(config["layout"]) if config["layout"] else None
+            if "constraints" in config:
+                self.constraints = [AttributeConstraint.from_dict(rule) for rule in config["constraints"]]
 
-            # Recreate tables with new configuration
-            self.tables = [Table(self.table_capacity) for _ in range(self.number_of_tables)]
+            # Recreate tables only when the configuration changed, otherwise they are cleared below
+            if number_of_tables != self.number_of_tables or table_capacity != self.table_capacity:
+                self.number_of_tables = number_of_tables
+                self.table_capacity = table_capacity
+                self.tables = [Table(self.table_capacity) for _ in range(self.number_of_tables)]
+                self._owned_tables = None
+
+        self.roster_fingerprint = state.get("roster_fingerprint")
 
         # Clear current seating
         self.unseated = []
 
         # Clear all tables
-        for table in self.tables:
-            table.seats = [Seat() for _ in range(self.table_capacity)]
+        self._clear_tables()
 
         # Load preferences
         if "preferences" in state:
-            self.preferences = state["preferences"]
+            self.preferences = Preferences.from_dict(state["preferences"], self.names)
+            self._shared_preferences = False
+
+        if "attributes" in state:
+            self.attributes = AttributeStore.from_dict(state["attributes"], self.names)
+            self._shared_attributes = False
 
         # Load unseated people
         if "unseated" in state:
@@ -606,34 +2203,162 @@ class Openspace:
                         continue
 
                     if seat_data["occupant"] is not None:
-                        self.tables[table_idx].seats[seat_idx].set_occupant(seat_data["occupant"])
+                        self.tables[table_idx].set_seat(seat_idx, seat_data["occupant"])
+
+        self._rebuild_tracking()
 
+    def store_seat_file(self, filename: str) -> None:
+        """Write the seating to a memory-mapped seat file (see SeatStore), replacing it atomically.
+
+        :param filename: path of the seat file to create.
+        :return: None"""
+        occupants = [(table_idx, seat_idx, seat.occupant)
+                     for table_idx, table in enumerate(self.tables)
+                     for seat_idx, seat in enumerate(table.seats) if not seat.free]
+        # Records are sized for the longest name in the room
+        name_bytes = max([SeatStore.DEFAULT_NAME_BYTES] + [len(name.encode("utf-8")) for _, _, name in occupants])
+        SeatStore.write(filename, self.number_of_tables, self.table_capacity, occupants, name_bytes)
+
+    @staticmethod
+    def open_seat_file(filename: str, writable: bool = False) -> SeatStore:
+        """Open a seat file for random access without loading the room.
+
+        :param filename: path of the seat file.
+        :param writable: open read-write instead of read-only.
+        :return: the opened SeatStore (close it when done)."""
+        return SeatStore(filename, writable)
+
+    def load_seat_file(self, filename: str) -> bool:
+        """Load the seating from a seat file, replacing the current tables.
+
+        Preferences and the unseated list are kept as they are.
+
+        :param filename: path of the seat file.
+        :return: True if loaded successfully, False if the file does not exist."""
+        try:
+            store = SeatStore(filename)
+        except FileNotFoundError:
+            return False
+        self._reset_undo()
+        self._name_index = None
+        with store:
+            self.number_of_tables = store.number_of_tables
+            self.table_capacity = store.table_capacity
+            self.tables = [Table(self.table_capacity) for _ in range(self.number_of_tables)]
+            self._owned_tables = None
+            for table_idx, table in enumerate(self.tables):
+                for seat_idx, occupant in enumerate(store.table_occupants(table_idx)):
+                    if occupant is not None:
+                        table.set_seat(seat_idx, occupant)
+        self._rebuild_tracking()
         return True
 
     def get_people_alone_count(self) -> int:
         """Count the number of people sitting alone at tables.
 
         :return: Number of people alone at tables."""
-        alone_count = 0
-        for table in self.tables:
-            occupied_seats = sum(1 for seat in table.seats if not seat.free)
-            if occupied_seats == 1:
-                alone_count += 1
-        return alone_count
+        return self._occupancy_histogram[1] if self.table_capacity >= 1 else 0
+
+    def _whitelist_table(self, name: str) -> int | None:
+        """Find a table with a free seat next to someone this person has a whitelist edge with.
+
+        :param name: name of the person to seat.
+        :return: table index or None if no such table has room and no blacklist conflict."""
+        person_tables = self._person_tables
+        for other in self.preferences.targets(name, "whitelist") + self.preferences.owners(name, "whitelist"):
+            table_idx = person_tables.get(other)
+            if (table_idx is not None and self.tables[table_idx].has_free_spot()
+                    and self._can_sit_at_table(name, table_idx)):
+                return table_idx
+        return None
 
     def add_colleague(self, name: str) -> bool:
         """Add a new colleague to the room. Tries to find a free seat.
 
+        Prefers a table where someone from their whitelist already sits, and
+        never seats them at a table that breaks a blacklist.
+
         :param name: name of the colleague to add.
-        :return: True if seated successfully, False if no seats available."""
-        for table in self.tables:
-            if table.has_free_spot():
-                table.assign_seat(name)
+        :return: True if seated successfully, False if no seats available or
+            they are already in the room (seated or unseated)."""
+        return not self.add_colleagues([name])
+
+    def add_colleagues(self, names: list[str]) -> list[str]:
+        """Add many colleagues in one pass over the tables.
+
+        Each person joins a whitelisted colleague's table when it has room;
+        otherwise they take the first free seat, at or after the previous one,
+        that does not break a blacklist. People who fit nowhere join the unseated list.
+        Names already in the room, seated or unseated, and repeated names are
+        added only once.
+
+        :param names: names of the colleagues to add.
+        :return: names of the colleagues who could not be seated, followed by
+            those left out because they were already in the room."""
+        if self._name_index is not None:
+            self._name_index.update(names)
+        unseated = set(self.unseated)
+        already_present = []
+        new_names = []
+        for name in dict.fromkeys(names):
+            if name in self._person_tables or name in unseated:
+                already_present.append(name)
+            else:
+                new_names.append(name)
+        with self._undoable("add colleagues"):
+            not_seated = []
+            cursor = 0
+            for name in new_names:
+                table_idx = self._whitelist_table(name)
+                if table_idx is not None:
+                    self._seat_person(table_idx, name)
+                    continue
+
+                # Skip tables that are full for everyone
+                while cursor < len(self.tables) and not self.tables[cursor].has_free_spot():
+                    cursor += 1
+                table_idx = cursor
+                while table_idx < len(self.tables):
+                    if self.tables[table_idx].has_free_spot() and self._can_sit_at_table(name, table_idx):
+                        self._seat_person(table_idx, name)
+                        break
+                    table_idx += 1
+                else:
+                    not_seated.append(name)
+            self.unseated.extend(not_seated)
+            return not_seated + already_present
+
+    def remove_colleague(self, name: str) -> bool:
+        """Remove a colleague from their seat or from the unseated list.
+
+        :param name: name of the colleague to remove.
+        :return: True if they were found and removed, False otherwise."""
+        with self._undoable("remove colleague"):
+            table_idx = self._person_tables.get(name)
+            if table_idx is not None:
+                self._unseat_person(table_idx, self.tables[table_idx].find_seat(name))
                 return True
+            if name in self.unseated:
+                self.unseated.remove(name)
+                return True
+            return False
 
-        # No free spot found
-        self.unseated.append(name)
-        return False
+    def remove_colleagues(self, names: list[str]) -> list[str]:
+        """Remove many colleagues, filtering the unseated list only once.
+
+        :param names: names of the colleagues to remove.
+        :return: names that were not found."""
+        with self._undoable("remove colleagues"):
+            to_remove = set(names)
+            for name in names:
+                table_idx = self._person_tables.get(name)
+                if table_idx is not None:
+                    self._unseat_person(table_idx, self.tables[table_idx].find_seat(name))
+                    to_remove.discard(name)
+            unseated = [name for name in self.unseated if name not in to_remove]
+            found_unseated = set(self.unseated) & to_remove
+            self.unseated = unseated
+            return [name for name in names if name in to_remove and name not in found_unseated]
 
     def add_table(self) -> None:
         """Add a new table to the openspace.
@@ -641,22 +2366,156 @@ class Openspace:
         :return: None"""
         self.tables.append(Table(self.table_capacity))
         self.number_of_tables += 1
+        if self._owned_tables is not None:
+            self._owned_tables.add(len(self.tables) - 1)
+        if not self._deferred_tracking:
+            self._occupancy_histogram[0] += 1
+        for rows in self._attribute_counts.values():
+            rows.append([])
+        if self._journal is not None:
+            self._journal["tables_added"] += 1
+        else:
+            self._push_undo("add table", tables_added=1)
+
+    def remove_tables(self, table_numbers: list[int]) -> list[str]:
+        """Remove tables; the people sitting there join the unseated list.
+
+        Tables after a removed one are renumbered.
+
+        :param table_numbers: 1-based numbers of the tables to remove.
+        :return: names of the people who lost their seat."""
+        to_remove = {number - 1 for number in table_numbers if 1 <= number <= len(self.tables)}
+        if not to_remove:
+            return []
+        self._reset_undo()
+        displaced = []
+        kept = []
+        for table_idx, table in enumerate(self.tables):
+            if table_idx in to_remove:
+                displaced.extend(seat.occupant for seat in table.seats if not seat.free)
+            else:
+                kept.append(table)
+        if self.layout is not None:
+            self.layout = self.layout.without(to_remove, len(self.tables))
+        self.tables = kept
+        self.number_of_tables = len(kept)
+        self.unseated.extend(displaced)
+        if self._owned_tables is not None:
+            # Indices shifted; copy on the next write rather than remap ownership
+            self._owned_tables = set()
+        if self._deferred_tracking:
+            self._person_tables = self._person_table_map()
+            self._recount_attributes()
+        else:
+            self._rebuild_tracking()
+        return displaced
 
-    def set_preference(self, person: str, preference_type: str, target: str) -> None:
-        """Set a seating preference (whitelist or blacklist).
+    def set_preference(self, person: str, preference_type: str, target: str, weight: float | None = None,
+                       hard: bool | None = None) -> None:
+        """Set a seating preference (whitelist or blacklist), or change the strength of an existing one.
 
         :param person: the person who has the preference.
         :param preference_type: either 'whitelist' or 'blacklist'.
         :param target: the person they want to sit with (whitelist) or avoid (blacklist).
+        :param weight: how much it matters, see Preferences.add (default: unchanged or DEFAULT_WEIGHT).
+        :param hard: whether it must hold (default: unchanged or DEFAULT_HARD).
         :return: None"""
-        if preference_type not in ["whitelist", "blacklist"]:
+        old = self.preferences.strength(person, preference_type, target)
+        if not self._preferences_for_write().add(person, preference_type, target, weight, hard):
+            new = self.preferences.strength(person, preference_type, target)
+            if old is not None and new != old:
+                entry = (person, preference_type, target) + new + old
+                if self._journal is not None:
+                    self._journal["preferences"].append(entry)
+                else:
+                    self._push_undo("change preference strength", preferences=[entry])
             return
+        if self._name_index is not None:
+            self._name_index.update((person, target))
+        entry = (person, preference_type, target)
+        if weight is not None or hard is not None:
+            entry += self.preferences.strength(person, preference_type, target)
+        if self._journal is not None:
+            self._journal["preferences"].append(entry)
+        else:
+            self._push_undo("set preference", preferences=[entry])
+
+        # Count the new edge right away if its owner is already seated
+        person_table = self._person_tables.get(person)
+        if person_table is not None and not self._deferred_tracking:
+            together = self._person_tables.get(target) == person_table
+            if together == (preference_type == "whitelist"):
+                self._preference_totals[f"{preference_type}_satisfied"] += 1
+            else:
+                self._preference_totals[f"{preference_type}_violated"] += 1
+                self._violated_edges.add((person, target, preference_type))
 
-        if person not in self.preferences[preference_type]:
-            self.preferences[preference_type][person] = []
+    def _remove_preference(self, person: str, preference_type: str, target: str) -> None:
+        """Remove a preference edge and uncount it if its owner is seated.
 
-        if target not in self.preferences[preference_type][person]:
-            self.preferences[preference_type][person].append(target)
+        :return: None"""
+        if not self._preferences_for_write().remove(person, preference_type, target):
+            return
+        person_table = self._person_tables.get(person)
+        if person_table is not None and not self._deferred_tracking:
+            together = self._person_tables.get(target) == person_table
+            if together == (preference_type == "whitelist"):
+                self._preference_totals[f"{preference_type}_satisfied"] -= 1
+            else:
+                self._preference_totals[f"{preference_type}_violated"] -= 1
+                self._violated_edges.discard((person, target, preference_type))
+
+    def import_preferences(self, filename: str, roster: set[str] | None = None) -> dict:
+        """Bulk import preferences from a CSV or JSON Lines file of (person, type, target) rows.
+
+        :param filename: path to the preference file.
+        :param roster: known names to validate against (default: accept any name).
+        :return: dict with the number of rows added and duplicated, and the rejected rows."""
+        with self._undoable("import preferences"):
+            added_rows = self._journal["preferences"]
+            result = self._preferences_for_write().import_rows(FileUtils.iter_preference_rows(filename), roster,
+                                                               added_rows)
+            if result["added"] and not self._deferred_tracking:
+                self._recount_preferences()
+        if result["added"] and self._name_index is not None:
+            self._name_index.update(self.names.names)
+        return result
+
+    def get_roster(self) -> set[str]:
+        """Returns every known colleague: the input file plus seated and unseated people.
+
+        :return: set of names."""
+        try:
+            roster = set(FileUtils.load_colleagues(self.input_file))
+        except FileNotFoundError:
+            roster = set()
+        roster.update(self._person_tables)
+        roster.update(self.unseated)
+        return roster
+
+    def get_name_index(self) -> NameIndex:
+        """Search index over the roster, the seated and unseated people and every name in a preference.
+
+        Built on first use and kept current as colleagues and preferences are added.
+
+        :return: the NameIndex."""
+        if self._name_index is None:
+            self._name_index = NameIndex(self.get_roster())
+            self._name_index.update(self.names.names)
+        return self._name_index
+
+    def find_person(self, name: str) -> dict:
+        """Where a person is right now.
+
+        :param name: exact name of the person.
+        :return: dict with "name", "status" ("seated", "unseated" or "unknown"), and the
+            1-based "table" and "seat" (None unless seated)."""
+        table_idx = self._person_tables.get(name)
+        if table_idx is not None:
+            return {"name": name, "status": "seated", "table": table_idx + 1,
+                    "seat": self.tables[table_idx].find_seat(name) + 1}
+        status = "unseated" if name in self.unseated else "unknown"
+        return {"name": name, "status": status, "table": None, "seat": None}
 
     def get_total_seats(self) -> int:
         """Get the total number of seats in the room.
@@ -0,0 +1,376 @@
+import math
+from typing import Iterable, Iterator
+
+from utils.interner import NameInterner
+
+
+PREFERENCE_TYPES = ("whitelist", "blacklist")
+
+# Named weights accepted wherever a preference weight is given
+STRENGTHS = {"strong": 3.0, "normal": 1.0, "mild": 0.3}
+
+# Strength of an edge added without one: organize never seats blacklisted
+# people together, but only tries to keep whitelisted people together
+DEFAULT_WEIGHT = 1.0
+DEFAULT_HARD = {"whitelist": False, "blacklist": True}
+
+
+def parse_strength(weight: object = None, hard: object = None) -> tuple[float | None, bool | None]:
+    """Read a preference weight and hard/soft flag as given in a file or typed in.
+
+    :param weight: a positive number, a name from STRENGTHS, or None/"" for the default.
+    :param hard: True/False, "hard"/"soft" (or yes/no, true/false, 1/0), or None/"" for the default.
+    :return: (weight, hard), None for a value left at the default.
+    :raises ValueError: if either value cannot be read."""
+    if weight is None or weight == "":
+        parsed_weight = None
+    elif isinstance(weight, str) and weight.strip().lower() in STRENGTHS:
+        parsed_weight = STRENGTHS[weight.strip().lower()]
+    else:
+        try:
+            parsed_weight = float(weight)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid weight '{weight}'") from None
+        if not math.isfinite(parsed_weight) or parsed_weight <= 0:
+            raise ValueError(f"invalid weight '{weight}', expected a positive number")
+    if hard is None or hard == "":
+        parsed_hard = None
+    elif isinstance(hard, bool):
+        parsed_hard = hard
+    elif str(hard).strip().lower() in ("hard", "true", "yes", "1"):
+        parsed_hard = True
+    elif str(hard).strip().lower() in ("soft", "false", "no", "0"):
+        parsed_hard = False
+    else:
+        raise ValueError(f"invalid constraint '{hard}', expected hard or soft")
+    return parsed_weight, parsed_hard
+
+
+class Preferences:
+    """Whitelist and blacklist preferences stored as sets of interned ids.
+
+    Each preference is a directed edge: person -> target. Edges are indexed in
+    both directions so the owners pointing at someone can be found without a scan.
+
+    Every edge also has a strength: a positive weight (how much it matters,
+    see STRENGTHS) and whether it is hard (must hold) or soft (nice to have).
+    Only edges whose strength differs from the default (DEFAULT_WEIGHT,
+    DEFAULT_HARD) are stored, so plain edges cost nothing extra.
+
+    :attr interner (NameInterner): maps names to the ids used in the sets."""
+
+    def __init__(self, interner: NameInterner | None = None) -> None:
+        self.interner: NameInterner = interner if interner is not None else NameInterner()
+        self._outgoing: dict[str, dict[int, set[int]]] = {"whitelist": {}, "blacklist": {}}
+        self._incoming: dict[str, dict[int, set[int]]] = {"whitelist": {}, "blacklist": {}}
+        self._edge_count: dict[str, int] = {"whitelist": 0, "blacklist": 0}
+        # (person id, target id) -> (weight, hard), for edges without the default strength
+        self._strengths: dict[str, dict[tuple[int, int], tuple[float, bool]]] = {"whitelist": {}, "blacklist": {}}
+
+    def add(self, person: str, preference_type: str, target: str, weight: float | None = None,
+            hard: bool | None = None) -> bool:
+        """Adds a preference edge, or changes the strength of an existing one.
+
+        :param person: the person who has the preference.
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :param target: the person they want to sit with (whitelist) or avoid (blacklist).
+        :param weight: how much the preference matters (default: unchanged, DEFAULT_WEIGHT for a new edge).
+        :param hard: whether it must hold (default: unchanged, DEFAULT_HARD for a new edge).
+        :return: True if the edge is new, False if it existed or the type is unknown."""
+        if preference_type not in PREFERENCE_TYPES:
+            return False
+        person_id = self.interner.intern(person)
+        target_id = self.interner.intern(target)
+        targets = self._outgoing[preference_type].setdefault(person_id, set())
+        if target_id in targets:
+            if weight is not None or hard is not None:
+                self._set_strength(preference_type, person_id, target_id, weight, hard)
+            return False
+        targets.add(target_id)
+        self._incoming[preference_type].setdefault(target_id, set()).add(person_id)
+        self._edge_count[preference_type] += 1
+        if weight is not None or hard is not None:
+            self._set_strength(preference_type, person_id, target_id, weight, hard)
+        return True
+
+    def _set_strength(self, preference_type: str, person_id: int, target_id: int, weight: float | None,
+                      hard: bool | None) -> None:
+        """Change the weight and/or hard flag of an existing edge (None keeps the current value)."""
+        strengths = self._strengths[preference_type]
+        current_weight, current_hard = strengths.get((person_id, target_id),
+                                                     (DEFAULT_WEIGHT, DEFAULT_HARD[preference_type]))
+        strength = (current_weight if weight is None else float(weight),
+                    current_hard if hard is None else bool(hard))
+        if strength == (DEFAULT_WEIGHT, DEFAULT_HARD[preference_type]):
+            strengths.pop((person_id, target_id), None)
+        else:
+            strengths[(person_id, target_id)] = strength
+
+    def strength(self, person: str, preference_type: str, target: str) -> tuple[float, bool] | None:
+        """Returns the weight and hard flag of a preference edge.
+
+        :return: (weight, hard), or None if the edge does not exist."""
+        if not self.has(person, preference_type, target):
+            return None
+        key = (self.interner.get(person), self.interner.get(target))
+        return self._strengths[preference_type].get(key, (DEFAULT_WEIGHT, DEFAULT_HARD[preference_type]))
+
+    def weighted_edges(self, preference_type: str) -> Iterator[tuple[int, int, float, bool]]:
+        """Iterates over every edge of a type with its strength, by interned id.
+
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: iterator of (person id, target id, weight, hard)."""
+        strengths = self._strengths[preference_type]
+        default = (DEFAULT_WEIGHT, DEFAULT_HARD[preference_type])
+        for person_id, targets in self._outgoing[preference_type].items():
+            for target_id in targets:
+                weight, hard = strengths.get((person_id, target_id), default) if strengths else default
+                yield person_id, target_id, weight, hard
+
+    def remove(self, person: str, preference_type: str, target: str) -> bool:
+        """Removes a preference edge.
+
+        :param person: the person who has the preference.
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :param target: the person on their list.
+        :return: True if the edge existed, False otherwise."""
+        person_id = self.interner.get(person)
+        target_id = self.interner.get(target)
+        if person_id is None or target_id is None or preference_type not in PREFERENCE_TYPES:
+            return False
+        targets = self._outgoing[preference_type].get(person_id)
+        if not targets or target_id not in targets:
+            return False
+        targets.discard(target_id)
+        self._incoming[preference_type][target_id].discard(person_id)
+        self._edge_count[preference_type] -= 1
+        self._strengths[preference_type].pop((person_id, target_id), None)
+        return True
+
+    def has(self, person: str, preference_type: str, target: str) -> bool:
+        """Checks whether a preference edge exists.
+
+        :return: True if person has target on the given list."""
+        person_id = self.interner.get(person)
+        target_id = self.interner.get(target)
+        if person_id is None or target_id is None:
+            return False
+        return target_id in self._outgoing[preference_type].get(person_id, ())
+
+    def targets(self, person: str, preference_type: str) -> list[str]:
+        """Returns the people on someone's whitelist or blacklist.
+
+        :param person: the person who has the preferences.
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: list of target names (empty if none)."""
+        person_id = self.interner.get(person)
+        if person_id is None:
+            return []
+        names = self.interner.names
+        return [names[target_id] for target_id in self._outgoing[preference_type].get(person_id, ())]
+
+    def owners(self, target: str, preference_type: str) -> list[str]:
+        """Returns the people who have someone on their whitelist or blacklist.
+
+        :param target: the person the preferences point at.
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: list of owner names (empty if none)."""
+        target_id = self.interner.get(target)
+        if target_id is None:
+            return []
+        names = self.interner.names
+        return [names[owner_id] for owner_id in self._incoming[preference_type].get(target_id, ())]
+
+    def hard_neighbors(self, person: str, preference_type: str) -> list[str]:
+        """Returns everyone a person has a hard edge of a type with, in either direction.
+
+        :param person: the person whose edges are wanted.
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: list of names (empty if none)."""
+        person_id = self.interner.get(person)
+        if person_id is None:
+            return []
+        strengths = self._strengths[preference_type]
+        default = DEFAULT_HARD[preference_type]
+        if not strengths and not default:
+            return []
+        names = self.interner.names
+        neighbors = []
+        for other_id in self._outgoing[preference_type].get(person_id, ()):
+            if strengths.get((person_id, other_id), (None, default))[1]:
+                neighbors.append(names[other_id])
+        for other_id in self._incoming[preference_type].get(person_id, ()):
+            if strengths.get((other_id, person_id), (None, default))[1]:
+                neighbors.append(names[other_id])
+        return neighbors
+
+    def has_conflict(self, person1: str, person2: str) -> bool:
+        """Checks if either person has the other on their blacklist as a hard preference.
+
+        Soft blacklist edges only add to the penalty (see PreferenceScorer).
+
+        :return: True if they must not sit together."""
+        id1 = self.interner.get(person1)
+        id2 = self.interner.get(person2)
+        if id1 is None or id2 is None:
+            return False
+        blacklist = self._outgoing["blacklist"]
+        strengths = self._strengths["blacklist"]
+        default = (None, DEFAULT_HARD["blacklist"])
+        return (id2 in blacklist.get(id1, ()) and strengths.get((id1, id2), default)[1]) or \
+            (id1 in blacklist.get(id2, ()) and strengths.get((id2, id1), default)[1])
+
+    def items(self, preference_type: str) -> Iterator[tuple[str, list[str]]]:
+        """Iterates over everyone with preferences of a type.
+
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: iterator of (person, list of targets), targets in interning order."""
+        names = self.interner.names
+        for person_id, targets in self._outgoing[preference_type].items():
+            if targets:
+                yield names[person_id], [names[target_id] for target_id in sorted(targets)]
+
+    def edge_count(self, preference_type: str | None = None) -> int:
+        """Returns the number of preference edges.
+
+        :param preference_type: count only this type (default: both).
+        :return: number of edges."""
+        if preference_type is None:
+            return sum(self._edge_count.values())
+        return self._edge_count[preference_type]
+
+    def copy(self) -> "Preferences":
+        """Returns an independent copy sharing the same interner.
+
+        :return: the copied preferences."""
+        preferences = Preferences(self.interner)
+        for preference_type in PREFERENCE_TYPES:
+            preferences._outgoing[preference_type] = {
+                person_id: set(targets) for person_id, targets in self._outgoing[preference_type].items()
+            }
+            preferences._incoming[preference_type] = {
+                target_id: set(owners) for target_id, owners in self._incoming[preference_type].items()
+            }
+        preferences._edge_count = self._edge_count.copy()
+        preferences._strengths = {
+            preference_type: strengths.copy() for preference_type, strengths in self._strengths.items()
+        }
+        return preferences
+
+    def state_items(self, preference_type: str) -> Iterator[tuple[str, list]]:
+        """Iterates over everyone with preferences of a type, as stored in the state file.
+
+        Targets with the default strength are plain names; the others are
+        {"name": target, "weight": weight, "hard": hard} objects.
+
+        :param preference_type: either 'whitelist' or 'blacklist'.
+        :return: iterator of (person, list of targets), targets in interning order."""
+        strengths = self._strengths[preference_type]
+        if not strengths:
+            yield from self.items(preference_type)
+            return
+        names = self.interner.names
+        for person_id, targets in self._outgoing[preference_type].items():
+            if targets:
+                entries = []
+                for target_id in sorted(targets):
+                    strength = strengths.get((person_id, target_id))
+                    if strength is None:
+                        entries.append(names[target_id])
+                    else:
+                        entries.append({"name": names[target_id], "weight": strength[0], "hard": strength[1]})
+                yield names[person_id], entries
+
+    def to_dict(self) -> dict:
+        """Converts the preferences to the JSON layout of the state file.
+
+        :return: dict of {"whitelist": {person: [targets]}, "blacklist": {...}}, see state_items."""
+        return {preference_type: dict(self.state_items(preference_type)) for preference_type in PREFERENCE_TYPES}
+
+    @classmethod
+    def from_dict(cls, data: dict, interner: NameInterner | None = None) -> "Preferences":
+        """Builds preferences from the JSON layout of the state file.
+
+        :param data: dict of {"whitelist": {person: [targets]}, "blacklist": {...}}; a target
+            is a name or a {"name", "weight", "hard"} object.
+        :param interner: interner to share (default: a new one).
+        :return: the loaded preferences."""
+        preferences = cls(interner)
+        preferences.import_rows(
+            (person, preference_type, target) if isinstance(target, str) else
+            (person, preference_type, target["name"], target.get("weight"), target.get("hard"))
+            for preference_type in PREFERENCE_TYPES
+            for person, targets in data.get(preference_type, {}).items()
+            for target in targets
+        )
+        return preferences
+
+    def import_rows(self, rows: Iterable[tuple], roster: set[str] | None = None,
+                    added_rows: list | None = None) -> dict:
+        """Adds many (person, type, target) rows at once.
+
+        A row may carry a weight and a hard flag as fourth and fifth items (see
+        parse_strength); a known edge given a strength gets that strength. Rows
+        with an unknown type, an empty name, a name missing from the roster or
+        an unreadable strength are rejected and reported instead of being added.
+
+        :param rows: iterable of (person, preference_type, target[, weight[, hard]]).
+        :param roster: known names to validate against (default: accept any name).
+        :param added_rows: list to append the rows that added a new edge to, as (person, type, target)
+            or (person, type, target, weight, hard); a changed strength is appended as
+            (person, type, target, weight, hard, old weight, old hard) (default: don't collect).
+        :return: dict with the number of rows added and duplicated, and the rejected rows as (row number, reason)."""
+        added = 0
+        duplicates = 0
+        rejected = []
+        intern = self.interner.intern
+        outgoing = self._outgoing
+        incoming = self._incoming
+        for row_number, row in enumerate(rows, start=1):
+            person, preference_type, target = row[0], row[1], row[2]
+            weight = hard = None
+            if len(row) > 3:
+                try:
+                    weight, hard = parse_strength(*row[3:5])
+                except ValueError as e:
+                    rejected.append((row_number, str(e)))
+                    continue
+            if preference_type not in PREFERENCE_TYPES:
+                rejected.append((row_number, f"unknown preference type '{preference_type}'"))
+            elif not person or not target:
+                rejected.append((row_number, "empty name"))
+            elif roster is not None and person not in roster:
+                rejected.append((row_number, f"unknown person '{person}'"))
+            elif roster is not None and target not in roster:
+                rejected.append((row_number, f"unknown person '{target}'"))
+            else:
+                # Inlined version of add() - this loop runs once per imported edge
+                person_id = intern(person)
+                target_id = intern(target)
+                targets = outgoing[preference_type].get(person_id)
+                if targets is None:
+                    targets = outgoing[preference_type][person_id] = set()
+                elif target_id in targets:
+                    duplicates += 1
+                    if weight is not None or hard is not None:
+                        old = self.strength(person, preference_type, target)
+                        self._set_strength(preference_type, person_id, target_id, weight, hard)
+                        new = self.strength(person, preference_type, target)
+                        if added_rows is not None and new != old:
+                            added_rows.append((person, preference_type, target) + new + old)
+                    continue
+                targets.add(target_id)
+                owners = incoming[preference_type].get(target_id)
+                if owners is None:
+                    incoming[preference_type][target_id] = {person_id}
+                else:
+                    owners.add(person_id)
+                added += 1
+                self._edge_count[preference_type] += 1
+                if weight is not None or hard is not None:
+                    self._set_strength(preference_type, person_id, target_id, weight, hard)
+                    if added_rows is not None:
+                        added_rows.append((person, preference_type, target, weight, hard))
+                elif added_rows is not None:
+                    added_rows.append((person, preference_type, target))
+        return {"added": added, "duplicates": duplicates, "rejected": rejected}
@@ -0,0 +1,80 @@
+import time
+
+from utils.file_utils import FileUtils
+from utils.openspace import Openspace
+
+
+class RosterReconciler:
+    """Brings a loaded openspace in line with its roster file.
+
+    The roster and the room are compared through hashed indexes, so the diff is
+    linear in the number of people. A fingerprint of the roster (path, size,
+    mtime and content hash) is kept in the openspace state: when the file did
+    not change since the last reconciliation it is not even read.
+
+    :attr openspace (Openspace): the room to reconcile."""
+
+    def __init__(self, openspace: Openspace) -> None:
+        self.openspace: Openspace = openspace
+
+    def diff(self, roster: list[str]) -> dict:
+        """Compares a roster with the people known to the room.
+
+        :param roster: names from the roster file.
+        :return: dict with the roster names missing from the room ("added"), the
+            people in the room missing from the roster ("removed") and the number
+            of people in both ("present")."""
+        openspace = self.openspace
+        roster_names = dict.fromkeys(roster)  # Ordered set, drops duplicate rows
+        seated = openspace._person_tables
+        unseated = set(openspace.unseated)
+
+        added = [name for name in roster_names if name not in seated and name not in unseated]
+        removed = [name for name in seated if name not in roster_names]
+        removed.extend(name for name in unseated if name not in roster_names and name not in seated)
+        return {
+            "added": added,
+            "removed": removed,
+            "present": len(roster_names) - len(added)
+        }
+
+    def reconcile(self, filename: str | None = None) -> dict:
+        """Adds roster people who are not in the room yet to the unseated list.
+
+        People who left the roster stay where they are; they are only reported.
+
+        :param filename: roster file (default: the openspace input file).
+        :return: dict with "skipped" (True if the roster was unchanged), the
+            "added" and "removed" names, the "present" count and the "elapsed" seconds.
+        :raises FileNotFoundError: if the roster file does not exist."""
+        start = time.perf_counter()
+        openspace = self.openspace
+        if filename is None:
+            filename = openspace.input_file
+
+        fingerprint = {"file": filename, **FileUtils.file_stat(filename)}
+        previous = openspace.roster_fingerprint or {}
+        unchanged = {key: previous.get(key) for key in fingerprint} == fingerprint
+        if not unchanged:
+            # Touched but identical files only cost a hash, not a diff
+            fingerprint["hash"] = FileUtils.file_hash(filename)
+            unchanged = previous.get("file") == filename and previous.get("hash") == fingerprint["hash"]
+        else:
+            fingerprint["hash"] = previous.get("hash")
+
+        if unchanged:
+            openspace.roster_fingerprint = fingerprint
+            return {
+                "skipped": True,
+                "added": [],
+                "removed": [],
+                "present": None,
+                "elapsed": time.perf_counter() - start
+            }
+
+        result = self.diff(FileUtils.load_colleagues(filename))
+        openspace.unseated.extend(result["added"])
+        openspace.roster_fingerprint = fingerprint
+        result["skipped"] = False
+        result["elapsed"] = time.perf_counter() - start
+        return result
@@ -0,0 +1,104 @@
+from itertools import islice
+from typing import Iterator
+
+from utils.openspace import Openspace
+
+
+class ArrangementRenderer:
+    """Formats a window of tables from an openspace into a single string.
+
+    Only the tables on the requested page are formatted, so the cost of a render
+    depends on the page size and not on the size of the room.
+
+    :attr openspace (Openspace): the openspace to render.
+    :attr page_size (int): number of tables shown per page."""
+
+    def __init__(self, openspace: Openspace, page_size: int = 10) -> None:
+        self.openspace: Openspace = openspace
+        self.page_size: int = max(1, page_size)
+
+    def _table_indices(self, table: int | None, person: str | None, free_only: bool) -> Iterator[int]:
+        """Lazily yield the indices of the tables matching a filter.
+
+        :param table: only this table number (1-based).
+        :param person: only the table this person sits at.
+        :param free_only: only tables with at least one free seat.
+        :return: iterator of table indices."""
+        if table is not None:
+            if 1 <= table <= len(self.openspace.tables):
+                yield table - 1
+            return
+        if person is not None:
+            table_idx = self.openspace.get_person_table(person)
+            if table_idx is not None:
+                yield table_idx
+            return
+        for table_idx, current in enumerate(self.openspace.tables):
+            if not free_only or current.has_free_spot():
+                yield table_idx
+
+    def count_tables(self, table: int | None = None, person: str | None = None, free_only: bool = False) -> int:
+        """Count the tables matching a filter without visiting them.
+
+        :param table: only this table number (1-based).
+        :param person: only the table this person sits at.
+        :param free_only: only tables with at least one free seat.
+        :return: number of matching tables."""
+        if table is not None:
+            return 1 if 1 <= table <= len(self.openspace.tables) else 0
+        if person is not None:
+            return 0 if self.openspace.get_person_table(person) is None else 1
+        total = len(self.openspace.tables)
+        if free_only:
+            # Tables without a free seat are exactly the full ones in the histogram
+            return total - self.openspace.get_occupancy_histogram()[-1]
+        return total
+
+    def page_count(self, table: int | None = None, person: str | None = None, free_only: bool = False) -> int:
+        """Number of pages needed to show every matching table.
+
+        :return: number of pages (at least 1)."""
+        matching = self.count_tables(table, person, free_only)
+        return max(1, (matching + self.page_size - 1) // self.page_size)
+
+    def render(self, start: int = 0, count: int | None = None, table: int | None = None,
+               person: str | None = None, free_only: bool = False) -> str:
+        """Format a window of matching tables into one string.
+
+        :param start: number of matching tables to skip.
+        :param count: number of tables to format (default: page_size).
+        :param table: only this table number (1-based).
+        :param person: only the table this person sits at, with them highlighted.
+        :param free_only: only tables with free seats, and only their free seats.
+        :return: the formatted window, or a short message if nothing matches."""
+        if count is None:
+            count = self.page_size
+        lines = []
+        if table is None and person is None and not free_only:
+            # Every table matches, so the window is indexed directly
+            window = range(max(0, start), min(start + count, len(self.openspace.tables)))
+        else:
+            window = islice(self._table_indices(table, person, free_only), start, start + count)
+        for table_idx in window:
+            lines.append(f"Table {table_idx + 1}:")
+            for seat_idx, seat in enumerate(self.openspace.tables[table_idx].seats):
+                if seat.free:
+                    lines.append(f"Seat {seat_idx + 1}: Free")
+                elif not free_only:
+                    marker = "  <--" if seat.occupant == person else ""
+                    lines.append(f"Seat {seat_idx + 1}: {seat.occupant}{marker}")
+            lines.append("-" * 20)
+
+        if not lines:
+            if person is not None:
+                return f"{person} is not seated."
+            return "No tables to show."
+        return "\n".join(lines)
+
+    def render_page(self, page: int = 0, table: int | None = None, person: str | None = None,
+                    free_only: bool = False) -> str:
+        """Format one page of matching tables.
+
+        :param page: 0-based page number.
+        :return: the formatted page."""
+        return self.render(page * self.page_size, self.page_size, table, person, free_only)
@@ -0,0 +1,210 @@
+import random
+
+from utils.interner import NameInterner
+from utils.openspace import Openspace
+
+
+class PairHistory:
+    """Sparse co-seating count matrix keyed by interned ids.
+
+    Only pairs that actually sat together are stored, one int key per unordered pair.
+
+    :attr interner (NameInterner): maps names to the ids used in the keys."""
+
+    def __init__(self, interner: NameInterner) -> None:
+        self.interner: NameInterner = interner
+        self._counts: dict[int, int] = {}
+
+    @staticmethod
+    def _key(id1: int, id2: int) -> int:
+        """Pack an unordered pair of ids into one int."""
+        if id1 > id2:
+            id1, id2 = id2, id1
+        return (id1 << 32) | id2
+
+    def count(self, person1: str, person2: str) -> int:
+        """Returns how many times two people sat at the same table.
+
+        :return: number of shared days."""
+        id1 = self.interner.get(person1)
+        id2 = self.interner.get(person2)
+        if id1 is None or id2 is None:
+            return 0
+        return self._counts.get(self._key(id1, id2), 0)
+
+    def count_ids(self, id1: int, id2: int) -> int:
+        """Returns how many times two interned ids sat at the same table.
+
+        :return: number of shared days."""
+        return self._counts.get(self._key(id1, id2), 0)
+
+    def record(self, openspace: Openspace) -> None:
+        """Adds the current arrangement of an openspace to the history.
+
+        :param openspace: the openspace to record.
+        :return: None"""
+        intern = self.interner.intern
+        counts = self._counts
+        for table in openspace.tables:
+            ids = [intern(seat.occupant) for seat in table.seats if not seat.free]
+            for i, id1 in enumerate(ids):
+                for id2 in ids[i + 1:]:
+                    key = self._key(id1, id2)
+                    counts[key] = counts.get(key, 0) + 1
+
+    def __len__(self) -> int:
+        """Number of distinct pairs that have sat together."""
+        return len(self._counts)
+
+    def to_dict(self) -> dict:
+        """Converts the history to a JSON-friendly dict.
+
+        :return: dict of {"pairs": [[name1, name2, count], ...]}."""
+        names = self.interner.names
+        return {
+            "pairs": [
+                [names[key >> 32], names[key & 0xFFFFFFFF], count]
+                for key, count in self._counts.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, interner: NameInterner) -> "PairHistory":
+        """Builds a history from the output of to_dict.
+
+        :param data: dict of {"pairs": [[name1, name2, count], ...]}.
+        :param interner: interner to key the pairs with.
+        :return: the loaded history."""
+        history = cls(interner)
+        for name1, name2, count in data.get("pairs", []):
+            key = cls._key(interner.intern(name1), interner.intern(name2))
+            history._counts[key] = history._counts.get(key, 0) + count
+        return history
+
+
+class RotationPlanner:
+    """Plans a sequence of arrangements that keep introducing people to new colleagues.
+
+    Each day starts from organize(), so whitelist groups and blacklist rules are
+    applied as usual. People who are not tied to their table by a whitelist are
+    then swapped between tables whenever that lowers the number of repeat
+    pairings and breaks no hard preference or table composition rule. A
+    day's work depends on the roster size only, so a K-day plan takes time
+    linear in K.
+
+    :attr openspace (Openspace): the room to plan for; it holds the last planned day afterwards.
+    :attr history (PairHistory): co-seating counts of all days recorded so far.
+    :attr swap_candidates (int): number of random tables tried for each swap."""
+
+    def __init__(self, openspace: Openspace, history: PairHistory | None = None,
+                 swap_candidates: int = 8, seed: int | None = None) -> None:
+        self.openspace: Openspace = openspace
+        self.history: PairHistory = history if history is not None else PairHistory(openspace.names)
+        self.swap_candidates: int = swap_candidates
+        self._random = random.Random(seed)
+
+    def _repeat_cost(self, person_id: int, table_ids: list[int], skip_id: int) -> int:
+        """Sum of past co-seatings between a person and a table, ignoring one occupant."""
+        count_ids = self.history.count_ids
+        return sum(count_ids(person_id, other) for other in table_ids if other != person_id and other != skip_id)
+
+    def _reduce_repeats(self) -> None:
+        """Swap people between tables while it lowers the repeat pairings."""
+        openspace = self.openspace
+        intern = openspace.names.intern
+        tables = openspace.tables
+        occupied_tables = [idx for idx, table in enumerate(tables) if table.occupied]
+        if len(occupied_tables) < 2:
+            return
+
+        table_ids = {
+            idx: [intern(seat.occupant) if not seat.free else -1 for seat in tables[idx].seats]
+            for idx in occupied_tables
+        }
+
+        for table_idx in occupied_tables:
+            for seat_idx in range(len(tables[table_idx].seats)):
+                person_id = table_ids[table_idx][seat_idx]
+                if person_id < 0:
+                    continue
+                here = self._repeat_cost(person_id, table_ids[table_idx], person_id)
+                if here == 0:
+                    continue
+                person = openspace.names.name(person_id)
+                if openspace._is_anchored(person):
+                    continue
+
+                for other_idx in self._random.sample(occupied_tables, min(self.swap_candidates, len(occupied_tables))):
+                    if other_idx == table_idx:
+                        continue
+                    if self._try_swap(table_idx, seat_idx, other_idx, table_ids, here):
+                        break
+
+    def _try_swap(self, table_idx: int, seat_idx: int, other_idx: int, table_ids: dict, here: int) -> bool:
+        """Swap a person with the best partner at another table if it lowers the repeat count.
+
+        :return: True if a swap was made."""
+        openspace = self.openspace
+        names = openspace.names.names
+        person_id = table_ids[table_idx][seat_idx]
+        best = None
+        best_gain = 0
+        for other_seat, other_id in enumerate(table_ids[other_idx]):
+            if other_id < 0:
+                continue
+            there = self._repeat_cost(other_id, table_ids[other_idx], other_id)
+            before = here + there
+            after = (self._repeat_cost(person_id, table_ids[other_idx], other_id)
+                     + self._repeat_cost(other_id, table_ids[table_idx], person_id))
+            if before - after > best_gain and not openspace._is_anchored(names[other_id]):
+                best = other_seat
+                best_gain = before - after
+        if best is None:
+            return False
+
+        other_id = table_ids[other_idx][best]
+        person, other = names[person_id], names[other_id]
+        # Hard preferences and table composition rules, minimums included
+        if not openspace._swap_allowed(person, table_idx, other, other_idx):
+            return False
+        openspace._swap_people(person, table_idx, other, other_idx)
+        table_ids[table_idx][seat_idx] = other_id
+        table_ids[other_idx][best] = person_id
+        return True
+
+    def plan_day(self, names: list[str]) -> dict:
+        """Organize one day, lower its repeat pairings and record it in the history.
+
+        :param names: the roster to seat.
+        :return: dict with the arrangement (list of occupant lists per table), the
+            unseated people, the number of repeated pairs and the preference stats."""
+        self.openspace.organize(names)
+        if len(self.history):
+            self._reduce_repeats()
+
+        arrangement = [
+            [seat.occupant for seat in table.seats if not seat.free]
+            for table in self.openspace.tables
+        ]
+        repeat_pairs = 0
+        for occupants in arrangement:
+            for i, person in enumerate(occupants):
+                for other in occupants[i + 1:]:
+                    if self.history.count(person, other):
+                        repeat_pairs += 1
+
+        self.history.record(self.openspace)
+        return {
+            "arrangement": arrangement,
+            "unseated": self.openspace.unseated.copy(),
+            "repeat_pairs": repeat_pairs,
+            "stats": self.openspace.get_preference_stats()
+        }
+
+    def plan(self, names: list[str], days: int) -> list[dict]:
+        """Plan a sequence of daily arrangements.
+
+        :param names: the roster to seat every day.
+        :param days: number of arrangements to produce.
+        :return: list of day results as returned by plan_day."""
+        return [self.plan_day(names) for _ in range(days)]
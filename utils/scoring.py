@@ -0,0 +1,165 @@
+from array import array
+from itertools import compress, repeat
+from math import fsum
+from operator import and_, eq, ge, itemgetter, ne
+
+from utils.preferences import PREFERENCE_TYPES, Preferences
+
+
+# Added to the penalty for every broken hard preference, so that no amount of
+# soft preferences outweighs one hard preference
+HARD_PENALTY = 1000.0
+
+
+def _gather(ids: array):
+    """A function that picks the entries at ids out of a table array, as a tuple, in one C call."""
+    if len(ids) == 1:
+        only = ids[0]
+        return lambda tables: (tables[only],)
+    return itemgetter(*ids) if ids else lambda tables: ()
+
+
+class PreferenceScorer:
+    """Scores whole seating arrangements against weighted preferences.
+
+    The preferences are copied once into flat arrays: one edge list per type
+    (owner id, target id, cost), where the cost of an edge is its weight, plus
+    HARD_PENALTY if it is hard. An arrangement is an array giving the table of
+    every interned person id (-1 when not seated), so scoring it is a few
+    C-level passes (itemgetter to look up the tables of all owners and
+    targets at once, then map/compress) without a Python loop per edge.
+    Like the preference statistics, an edge only counts when its owner is
+    seated.
+
+    The scorer is a snapshot: build a new one after preferences change.
+
+    :attr size (int): number of interned names when the scorer was built; table arrays have this length.
+    :attr hard_penalty (float): extra cost of a broken hard preference."""
+
+    def __init__(self, preferences: Preferences, hard_penalty: float = HARD_PENALTY) -> None:
+        self.interner = preferences.interner
+        self.size: int = len(self.interner.names)
+        self.hard_penalty: float = hard_penalty
+        self._owners: dict[str, array] = {}
+        self._targets: dict[str, array] = {}
+        self._costs: dict[str, array] = {}
+        self._weights: dict[str, array] = {}
+        self._hard: dict[str, array] = {}
+        self._owner_tables: dict = {}
+        self._target_tables: dict = {}
+        degree = [0] * (self.size + 1)
+        for preference_type in PREFERENCE_TYPES:
+            owners, targets, costs, weights, hard = array("l"), array("l"), array("d"), array("d"), array("b")
+            for person_id, target_id, weight, is_hard in preferences.weighted_edges(preference_type):
+                owners.append(person_id)
+                targets.append(target_id)
+                costs.append(weight + hard_penalty if is_hard else weight)
+                weights.append(weight)
+                hard.append(is_hard)
+                degree[person_id] += 1
+                degree[target_id] += 1
+            self._owners[preference_type] = owners
+            self._targets[preference_type] = targets
+            self._costs[preference_type] = costs
+            self._weights[preference_type] = weights
+            self._hard[preference_type] = hard
+            self._owner_tables[preference_type] = _gather(owners)
+            self._target_tables[preference_type] = _gather(targets)
+
+        # Edges by person (both ends), for scoring a single move: person i's edges
+        # are at positions _offsets[i] to _offsets[i + 1] of the arrays below
+        self._offsets = array("l", [0]) * (self.size + 1)
+        total = 0
+        for person_id in range(self.size):
+            self._offsets[person_id] = total
+            total += degree[person_id]
+        self._offsets[self.size] = total
+        self._others = array("l", [0]) * total
+        self._edge_costs = array("d", [0.0]) * total
+        # 1 if the edge is a whitelist, plus 2 if the person is its owner
+        self._edge_kinds = array("b", [0]) * total
+        fill = list(self._offsets[:self.size])
+        for preference_type in PREFERENCE_TYPES:
+            kind = 1 if preference_type == "whitelist" else 0
+            for owner, target, cost in zip(self._owners[preference_type], self._targets[preference_type],
+                                           self._costs[preference_type]):
+                for person_id, other, edge_kind in ((owner, target, kind | 2), (target, owner, kind)):
+                    position = fill[person_id]
+                    self._others[position] = other
+                    self._edge_costs[position] = cost
+                    self._edge_kinds[position] = edge_kind
+                    fill[person_id] += 1
+
+    def table_array(self, person_tables: dict[str, int]) -> array:
+        """Builds the arrangement array from a person -> table index map.
+
+        :param person_tables: table index of every seated person (e.g. Openspace._person_tables).
+        :return: array of table indices by interned id, -1 for people not seated."""
+        tables = array("l", [-1]) * self.size
+        get_id = self.interner.get
+        for name, table_idx in person_tables.items():
+            person_id = get_id(name)
+            if person_id is not None and person_id < self.size:
+                tables[person_id] = table_idx
+        return tables
+
+    def _violated(self, tables: array, preference_type: str):
+        """For every edge of a type: is its owner seated and the preference broken? (an iterator)"""
+        owner_tables = self._owner_tables[preference_type](tables)
+        target_tables = self._target_tables[preference_type](tables)
+        broken = map(ne if preference_type == "whitelist" else eq, owner_tables, target_tables)
+        if owner_tables and min(owner_tables) < 0:
+            # Some owners are not seated: their edges do not count
+            broken = map(and_, broken, map(ge, owner_tables, repeat(0)))
+        return broken
+
+    def penalty(self, tables: array) -> float:
+        """Total cost of the broken preferences of an arrangement (lower is better).
+
+        :param tables: arrangement array, see table_array.
+        :return: sum of the weights of the broken preferences, plus hard_penalty per broken hard one."""
+        total = 0.0
+        for preference_type in PREFERENCE_TYPES:
+            total += sum(compress(self._costs[preference_type], self._violated(tables, preference_type)))
+        return total
+
+    def evaluate(self, tables: array) -> dict:
+        """Scores an arrangement in detail.
+
+        :param tables: arrangement array, see table_array.
+        :return: dict with the satisfied and violated count per type (as in
+            Openspace.get_preference_stats), "hard_violated", "weighted_violations"
+            (sum of the weights of the broken preferences) and "penalty" (see penalty)."""
+        result = {"hard_violated": 0, "weighted_violations": 0.0, "penalty": 0.0}
+        for preference_type in PREFERENCE_TYPES:
+            violated = list(self._violated(tables, preference_type))
+            counted = sum(map(ge, self._owner_tables[preference_type](tables), repeat(0)))
+            broken = sum(violated)
+            result[f"{preference_type}_satisfied"] = counted - broken
+            result[f"{preference_type}_violated"] = broken
+            result["hard_violated"] += sum(compress(self._hard[preference_type], violated))
+            result["weighted_violations"] += fsum(compress(self._weights[preference_type], violated))
+            result["penalty"] += fsum(compress(self._costs[preference_type], violated))
+        return result
+
+    def person_penalty(self, tables: array, person_id: int) -> float:
+        """Cost of the broken preferences a person is part of, as owner or target.
+
+        Moving or swapping people changes the penalty by the change in their
+        person penalties (an edge between two swapped people counts the same
+        before and after), so a move is scored from the person's own edges only.
+
+        :param tables: arrangement array, see table_array.
+        :param person_id: interned id of the person.
+        :return: sum of the costs of those broken preferences."""
+        table_idx = tables[person_id]
+        others, costs, kinds = self._others, self._edge_costs, self._edge_kinds
+        total = 0.0
+        for position in range(self._offsets[person_id], self._offsets[person_id + 1]):
+            other_table = tables[others[position]]
+            kind = kinds[position]
+            if (table_idx if kind & 2 else other_table) < 0:
+                continue  # The owner is not seated
+            if (other_table == table_idx) != (kind & 1):
+                total += costs[position]
+        return total
@@ -0,0 +1,249 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from typing import Iterable
+
+
+class SeatStore:
+    """Fixed-record, memory-mapped seat file for random access to large rooms.
+
+    Layout: a 32-byte header, one fixed-size record per seat (table-major), then an
+    open-addressing hash index mapping names to records. Reading or updating one
+    seat, or finding one person, only touches the pages holding that record and
+    its index slot, so many processes can share a room without parsing it.
+
+    :attr filename (str): path to the seat file.
+    :attr writable (bool): whether the file was opened read-write.
+    :attr number_of_tables (int): number of tables in the room.
+    :attr table_capacity (int): number of seats per table.
+    :attr name_bytes (int): maximum UTF-8 length of a name."""
+
+    MAGIC = b"OSSEATS1"
+    HEADER = struct.Struct("<8sIIIII4x")  # magic, version, tables, capacity, name bytes, index slots
+    SLOT = struct.Struct("<QI")  # name hash, record number + 1 (0 = empty)
+    LENGTH = struct.Struct("<H")
+    VERSION = 1
+    TOMBSTONE = 0xFFFFFFFF
+    DEFAULT_NAME_BYTES = 62
+
+    def __init__(self, filename: str, writable: bool = False) -> None:
+        self.filename: str = filename
+        self.writable: bool = writable
+        self._file = open(filename, mode="r+b" if writable else "rb")
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+
+        magic, version, tables, capacity, name_bytes, slots = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"{filename} is not a seat file")
+        self.number_of_tables: int = tables
+        self.table_capacity: int = capacity
+        self.name_bytes: int = name_bytes
+        self._slots: int = slots
+        self._record_size: int = self.LENGTH.size + name_bytes
+        self._index_offset: int = self.HEADER.size + tables * capacity * self._record_size
+
+    @classmethod
+    def _create_file(cls, filename: str, number_of_tables: int, table_capacity: int, name_bytes: int) -> None:
+        """Write an empty seat file of the right size."""
+        records = number_of_tables * table_capacity
+        slots = 8
+        while slots < 2 * records:
+            slots *= 2
+        size = cls.HEADER.size + records * (cls.LENGTH.size + name_bytes) + slots * cls.SLOT.size
+        with open(filename, mode="wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, number_of_tables, table_capacity, name_bytes, slots))
+            file.truncate(size)
+
+    @staticmethod
+    def _temporary_path(filename: str) -> str:
+        """A new empty file next to filename, with the permissions filename has (or 0644)."""
+        directory = os.path.dirname(os.path.abspath(filename))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + ".", suffix=".tmp")
+        os.close(descriptor)
+        os.chmod(temporary, os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644)
+        return temporary
+
+    @classmethod
+    def create(cls, filename: str, number_of_tables: int, table_capacity: int,
+               name_bytes: int = DEFAULT_NAME_BYTES) -> "SeatStore":
+        """Create an empty seat file and open it read-write.
+
+        An existing file is replaced by renaming the new one over it, so
+        processes that still have the old file mapped keep reading it intact.
+
+        :param filename: path of the file to create (replaced if present).
+        :param number_of_tables: number of tables in the room.
+        :param table_capacity: number of seats per table.
+        :param name_bytes: maximum UTF-8 length of a name.
+        :return: the opened store."""
+        temporary = cls._temporary_path(filename)
+        try:
+            cls._create_file(temporary, number_of_tables, table_capacity, name_bytes)
+            os.replace(temporary, filename)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return cls(filename, writable=True)
+
+    @classmethod
+    def write(cls, filename: str, number_of_tables: int, table_capacity: int,
+              occupants: Iterable[tuple[int, int, str]], name_bytes: int = DEFAULT_NAME_BYTES) -> None:
+        """Write a whole room to a seat file, replacing any previous file atomically.
+
+        The file is filled at a temporary path and renamed into place only once
+        every seat is written; if a seat cannot be written, the previous file
+        is left untouched.
+
+        :param filename: path of the seat file.
+        :param number_of_tables: number of tables in the room.
+        :param table_capacity: number of seats per table.
+        :param occupants: (table index, seat index, name) of every occupied seat.
+        :param name_bytes: maximum UTF-8 length of a name; must fit the longest occupant.
+        :return: None"""
+        temporary = cls._temporary_path(filename)
+        try:
+            cls._create_file(temporary, number_of_tables, table_capacity, name_bytes)
+            with cls(temporary, writable=True) as store:
+                for table_idx, seat_idx, name in occupants:
+                    store.set_occupant(table_idx, seat_idx, name)
+            os.replace(temporary, filename)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @staticmethod
+    def _hash(name: str) -> int:
+        """Stable 64-bit hash of a name, identical across processes."""
+        return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def _record_offset(self, table_idx: int, seat_idx: int) -> int:
+        """Byte offset of a seat record."""
+        if not (0 <= table_idx < self.number_of_tables and 0 <= seat_idx < self.table_capacity):
+            raise IndexError(f"no seat {seat_idx + 1} at table {table_idx + 1}")
+        return self.HEADER.size + (table_idx * self.table_capacity + seat_idx) * self._record_size
+
+    def _read_record(self, record: int) -> str | None:
+        """Name stored in a record, or None if the seat is free."""
+        offset = self.HEADER.size + record * self._record_size
+        (length,) = self.LENGTH.unpack_from(self._map, offset)
+        if length == 0:
+            return None
+        start = offset + self.LENGTH.size
+        return self._map[start:start + length].decode("utf-8")
+
+    def _probe(self, name: str):
+        """Walk the index slots of a name.
+
+        :return: generator of (slot offset, hash matches, stored record + 1), ending at the first empty slot."""
+        name_hash = self._hash(name)
+        mask = self._slots - 1
+        slot = name_hash & mask
+        for _ in range(self._slots):
+            offset = self._index_offset + slot * self.SLOT.size
+            stored_hash, stored = self.SLOT.unpack_from(self._map, offset)
+            yield offset, stored_hash == name_hash, stored
+            if stored == 0:
+                return
+            slot = (slot + 1) & mask
+
+    def occupant(self, table_idx: int, seat_idx: int) -> str | None:
+        """Returns who sits at a seat.
+
+        :param table_idx: index of the table.
+        :param seat_idx: index of the seat at the table.
+        :return: the occupant's name or None if the seat is free."""
+        self._record_offset(table_idx, seat_idx)
+        return self._read_record(table_idx * self.table_capacity + seat_idx)
+
+    def table_occupants(self, table_idx: int) -> list[str | None]:
+        """Returns every seat of one table.
+
+        :param table_idx: index of the table.
+        :return: list of occupant names, None for free seats."""
+        return [self.occupant(table_idx, seat_idx) for seat_idx in range(self.table_capacity)]
+
+    def find(self, name: str) -> tuple[int, int] | None:
+        """Finds where a person sits through the name index.
+
+        :param name: name of the person.
+        :return: (table index, seat index) or None if they are not seated."""
+        for _, same_hash, stored in self._probe(name):
+            if stored == 0:
+                return None
+            if same_hash and stored != self.TOMBSTONE and self._read_record(stored - 1) == name:
+                return divmod(stored - 1, self.table_capacity)
+        return None
+
+    def set_occupant(self, table_idx: int, seat_idx: int, name: str) -> bool:
+        """Seats a person at a free seat and indexes their name.
+
+        :param table_idx: index of the table.
+        :param seat_idx: index of the seat at the table.
+        :param name: name of the person.
+        :return: True if seated, False if the seat was occupied or the person is already seated."""
+        if not self.writable:
+            raise PermissionError(f"{self.filename} is opened read-only")
+        offset = self._record_offset(table_idx, seat_idx)
+        encoded = name.encode("utf-8")
+        if not encoded or len(encoded) > self.name_bytes:
+            raise ValueError(f"name must be 1 to {self.name_bytes} bytes long")
+        if self.LENGTH.unpack_from(self._map, offset)[0] != 0 or self.find(name) is not None:
+            return False
+
+        start = offset + self.LENGTH.size
+        self._map[start:start + len(encoded)] = encoded
+        self.LENGTH.pack_into(self._map, offset, len(encoded))
+
+        record = table_idx * self.table_capacity + seat_idx
+        for slot_offset, _, stored in self._probe(name):
+            if stored == 0 or stored == self.TOMBSTONE:
+                self.SLOT.pack_into(self._map, slot_offset, self._hash(name), record + 1)
+                break
+        return True
+
+    def remove_occupant(self, table_idx: int, seat_idx: int) -> str | None:
+        """Frees a seat and drops the name from the index.
+
+        :param table_idx: index of the table.
+        :param seat_idx: index of the seat at the table.
+        :return: name of the removed occupant or None if the seat was already free."""
+        if not self.writable:
+            raise PermissionError(f"{self.filename} is opened read-only")
+        offset = self._record_offset(table_idx, seat_idx)
+        record = table_idx * self.table_capacity + seat_idx
+        name = self._read_record(record)
+        if name is None:
+            return None
+        for slot_offset, _, stored in self._probe(name):
+            if stored == record + 1:
+                # Tombstone keeps later entries of the probe chain reachable
+                self.SLOT.pack_into(self._map, slot_offset, 0, self.TOMBSTONE)
+                break
+        self.LENGTH.pack_into(self._map, offset, 0)
+        return name
+
+    def flush(self) -> None:
+        """Write dirty pages back to disk.
+
+        :return: None"""
+        if self.writable:
+            self._map.flush()
+
+    def close(self) -> None:
+        """Flush and release the mapping.
+
+        :return: None"""
+        if not self._map.closed:
+            self.flush()
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SeatStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,246 @@
+import heapq
+import math
+
+
+class KDTree:
+    """2-d tree over fixed points, for nearest-neighbor and radius queries.
+
+    Points can be taken out of the tree and put back (e.g. positions that are
+    already used); every node counts the points left in its subtree, so empty
+    subtrees are skipped and a nearest query stays O(log n) on average.
+
+    :attr points (list[tuple[float, float]]): the points, queried by their index."""
+
+    def __init__(self, points: list[tuple[float, float]]) -> None:
+        self.points: list[tuple[float, float]] = [(float(x), float(y)) for x, y in points]
+        self._node_point: list[int] = []
+        self._axis: list[int] = []
+        self._left: list[int] = []
+        self._right: list[int] = []
+        self._parent: list[int] = []
+        self._count: list[int] = []
+        self._node_of: list[int] = [0] * len(self.points)
+        self._present: list[bool] = [True] * len(self.points)
+        self._root: int = self._build(list(range(len(self.points))), 0, -1)
+
+    def _build(self, ids: list[int], depth: int, parent: int) -> int:
+        """Build the subtree over some point indices; returns its node or -1."""
+        if not ids:
+            return -1
+        axis = depth % 2
+        ids.sort(key=lambda i: self.points[i][axis])
+        middle = len(ids) // 2
+        node = len(self._node_point)
+        self._node_point.append(ids[middle])
+        self._axis.append(axis)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._parent.append(parent)
+        self._count.append(len(ids))
+        self._node_of[ids[middle]] = node
+        self._left[node] = self._build(ids[:middle], depth + 1, node)
+        self._right[node] = self._build(ids[middle + 1:], depth + 1, node)
+        return node
+
+    def copy(self) -> "KDTree":
+        """A tree over the same points that can remove points independently.
+
+        The tree structure is shared; only the presence flags and counts are copied.
+
+        :return: the copy."""
+        tree = KDTree.__new__(KDTree)
+        tree.__dict__.update(self.__dict__)
+        tree._count = self._count.copy()
+        tree._present = self._present.copy()
+        return tree
+
+    def __len__(self) -> int:
+        """Number of points still in the tree."""
+        return self._count[self._root] if self._root != -1 else 0
+
+    def __contains__(self, point_idx: int) -> bool:
+        return self._present[point_idx]
+
+    def _update_counts(self, point_idx: int, change: int) -> None:
+        """Add change to the counts of every node from the point's node up to the root."""
+        node = self._node_of[point_idx]
+        while node != -1:
+            self._count[node] += change
+            node = self._parent[node]
+
+    def remove(self, point_idx: int) -> None:
+        """Take a point out of the tree; it is no longer returned by queries.
+
+        :param point_idx: index of the point.
+        :return: None"""
+        if self._present[point_idx]:
+            self._present[point_idx] = False
+            self._update_counts(point_idx, -1)
+
+    def restore(self, point_idx: int) -> None:
+        """Put a removed point back.
+
+        :param point_idx: index of the point.
+        :return: None"""
+        if not self._present[point_idx]:
+            self._present[point_idx] = True
+            self._update_counts(point_idx, 1)
+
+    def nearest(self, point: tuple[float, float], k: int = 1) -> list[int]:
+        """The k points closest to a location.
+
+        :param point: (x, y) to search around.
+        :param k: number of points to return.
+        :return: point indices, closest first (ties by index)."""
+        if k <= 0:
+            return []
+        x, y = point
+        # Max-heap of the best k so far, as (-squared distance, -index)
+        best = []
+        # Nodes to visit, with the squared distance to their side of the splitting line
+        stack = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if node == -1 or not self._count[node] or (len(best) == k and bound > -best[0][0]):
+                continue
+            point_idx = self._node_point[node]
+            px, py = self.points[point_idx]
+            if self._present[point_idx]:
+                distance = (px - x) ** 2 + (py - y) ** 2
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, -point_idx))
+                elif (-distance, -point_idx) > best[0]:
+                    heapq.heapreplace(best, (-distance, -point_idx))
+            difference = (x - px) if self._axis[node] == 0 else (y - py)
+            near, far = (self._left[node], self._right[node]) if difference < 0 else \
+                (self._right[node], self._left[node])
+            # Visit the near side first (pushed last); the far side only if it can still hold a closer point
+            stack.append((far, max(bound, difference * difference)))
+            stack.append((near, bound))
+        return [-point_idx for _, point_idx in sorted(best, reverse=True)]
+
+    def within(self, point: tuple[float, float], radius: float) -> list[int]:
+        """Every point at most radius away from a location.
+
+        :param point: (x, y) to search around.
+        :param radius: maximum distance.
+        :return: point indices in no particular order."""
+        x, y = point
+        limit = radius * radius
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node == -1 or not self._count[node]:
+                continue
+            point_idx = self._node_point[node]
+            px, py = self.points[point_idx]
+            if self._present[point_idx] and (px - x) ** 2 + (py - y) ** 2 <= limit:
+                found.append(point_idx)
+            difference = (x - px) if self._axis[node] == 0 else (y - py)
+            if difference < 0 or difference * difference <= limit:
+                stack.append(self._left[node])
+            if difference >= 0 or difference * difference <= limit:
+                stack.append(self._right[node])
+        return found
+
+
+class TableLayout:
+    """Where the tables stand on the floor.
+
+    Tables are placed on a grid of a given number of columns, or at explicit
+    (x, y) positions; tables beyond the explicit positions continue on a grid
+    below them. Two tables are adjacent when they are at most 1.5 grid spacings
+    apart, so diagonal grid neighbors count as adjacent.
+
+    :attr positions (list[tuple[float, float]]): explicit positions of the first tables.
+    :attr columns (int): tables per grid row.
+    :attr spacing (float): distance between neighboring grid positions."""
+
+    def __init__(self, positions: list[tuple[float, float]] | None = None, columns: int = 4,
+                 spacing: float = 1.0) -> None:
+        if spacing <= 0:
+            raise ValueError("spacing must be positive")
+        self.positions: list[tuple[float, float]] = [(float(x), float(y)) for x, y in positions or []]
+        self.columns: int = max(1, columns)
+        self.spacing: float = spacing
+        # The grid continues one row below the explicit positions
+        self._grid_top: float = max((y for _, y in self.positions), default=-spacing) + spacing
+        self._trees: dict[int, KDTree] = {}
+
+    @property
+    def adjacency(self) -> float:
+        """Largest distance at which two tables count as neighbors."""
+        return 1.5 * self.spacing
+
+    def position(self, table_idx: int) -> tuple[float, float]:
+        """Location of a table.
+
+        :param table_idx: 0-based table index.
+        :return: (x, y)."""
+        if table_idx < len(self.positions):
+            return self.positions[table_idx]
+        grid_idx = table_idx - len(self.positions)
+        return (grid_idx % self.columns) * self.spacing, self._grid_top + (grid_idx // self.columns) * self.spacing
+
+    def positions_for(self, number_of_tables: int) -> list[tuple[float, float]]:
+        """Locations of the first number_of_tables tables.
+
+        :return: list of (x, y), indexed like the tables."""
+        return [self.position(table_idx) for table_idx in range(number_of_tables)]
+
+    def tree(self, number_of_tables: int) -> KDTree:
+        """A fresh KD-tree over the table positions (the layout keeps a cached copy per room size).
+
+        :param number_of_tables: number of tables in the room.
+        :return: KDTree whose point indices are table indices."""
+        if number_of_tables not in self._trees:
+            self._trees = {number_of_tables: KDTree(self.positions_for(number_of_tables))}
+        # Hand out a copy, so callers may remove points
+        return self._trees[number_of_tables].copy()
+
+    def distance(self, table_a: int, table_b: int) -> float:
+        """Distance between two tables.
+
+        :return: Euclidean distance between their positions."""
+        (ax, ay), (bx, by) = self.position(table_a), self.position(table_b)
+        return math.hypot(ax - bx, ay - by)
+
+    def neighbors(self, table_idx: int, number_of_tables: int, k: int | None = None) -> list[int]:
+        """Tables next to a table.
+
+        :param table_idx: 0-based table index.
+        :param number_of_tables: number of tables in the room.
+        :param k: return the k closest tables instead of the adjacent ones.
+        :return: table indices, without the table itself."""
+        tree = self.tree(number_of_tables)
+        if k is not None:
+            return [other for other in tree.nearest(self.position(table_idx), k + 1) if other != table_idx][:k]
+        return sorted(other for other in tree.within(self.position(table_idx), self.adjacency) if other != table_idx)
+
+    def without(self, table_indices: set[int], number_of_tables: int) -> "TableLayout":
+        """The layout after some tables were removed and the rest renumbered.
+
+        The remaining tables keep their place on the floor, so the result lists
+        their positions explicitly.
+
+        :param table_indices: 0-based indices of the removed tables.
+        :param number_of_tables: number of tables before the removal.
+        :return: a new TableLayout."""
+        kept = [self.position(table_idx) for table_idx in range(number_of_tables) if table_idx not in table_indices]
+        return TableLayout(kept, self.columns, self.spacing)
+
+    def to_dict(self) -> dict:
+        """Layout as stored in the state file config."""
+        layout = {"columns": self.columns, "spacing": self.spacing}
+        if self.positions:
+            layout["positions"] = [list(position) for position in self.positions]
+        return layout
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TableLayout":
+        """Layout from a state file or config.json "layout" entry.
+
+        :param data: dict with "columns" and "spacing", and optionally "positions" as [x, y] pairs.
+        :return: the TableLayout."""
+        return cls(data.get("positions"), data.get("columns", 4), data.get("spacing", 1.0))
@@ -5,6 +5,8 @@ class Seat:
     :attr free (bool): if the seat is free or not
     :attr occupant (str): who is occupying the seat"""
 
+    __slots__ = ("free", "occupant")
+
     def __init__(self) -> None:
         self.free: bool = True
         self.occupant: str = ""
@@ -20,6 +22,17 @@ class Seat:
         else:
             print("Seat is already occupied.")
 
+    def claim(self, name: str) -> bool:
+        """Takes the seat for a person if it is free, without printing.
+
+        :param name: name of the occupant.
+        :return: True if the seat was taken, False if it was already occupied."""
+        if not self.free:
+            return False
+        self.occupant = name
+        self.free = False
+        return True
+
     def remove_occupant(self) -> str | None:
         """Removes the occupant from the seat and returns their name.
 
@@ -42,34 +55,106 @@ class Table:
     Class to represent a table with multiple seats.
 
     :attr seats (list[Seat]): a list of Seat objects at the table.
-    :attr capacity (int): representing the number of seats at the table."""
+    :attr capacity (int): representing the number of seats at the table.
+    :attr occupied (int): number of occupied seats."""
+
+    __slots__ = ("capacity", "seats", "occupied")
 
     def __init__(self, capacity: int) -> None:
         self.capacity: int = capacity
         self.seats: list[Seat] = [Seat() for _ in range(capacity)]
+        self.occupied: int = 0
 
     def has_free_spot(self) -> bool:
         """Checks if there is at least one free seat at the table.
 
         :return: True if there is a free seat, False otherwise."""
-        return any(seat.free for seat in self.seats)
+        return self.occupied < self.capacity
 
-    def assign_seat(self, name: str) -> None:
+    def assign_seat(self, name: str) -> int | None:
         """Assigns a seat to a person if there is a free spot.
 
         :param name: name of the person to assign to a seat.
+        :return: index of the assigned seat, or None if the table is full."""
+        seat_idx = self.claim_seat(name)
+        if seat_idx is None:
+            print("No free seats available.")
+        return seat_idx
+
+    def claim_seat(self, name: str) -> int | None:
+        """Takes the first free seat for a person, without printing.
+
+        :param name: name of the person to seat.
+        :return: index of the claimed seat, or None if the table is full."""
+        if self.occupied < self.capacity:
+            for seat_idx, seat in enumerate(self.seats):
+                if seat.claim(name):
+                    self.occupied += 1
+                    return seat_idx
+        return None
+
+    def set_seat(self, seat_idx: int, name: str) -> bool:
+        """Assigns a specific seat to a person if that seat is free.
+
+        :param seat_idx: index of the seat to assign.
+        :param name: name of the person to assign to the seat.
+        :return: True if the seat was assigned, False if it was already occupied."""
+        if not self.seats[seat_idx].claim(name):
+            return False
+        self.occupied += 1
+        return True
+
+    def remove_seat(self, seat_idx: int) -> str | None:
+        """Frees a specific seat.
+
+        :param seat_idx: index of the seat to free.
+        :return: name of the removed occupant or None if the seat was already free."""
+        seat = self.seats[seat_idx]
+        if seat.free:
+            return None
+        self.occupied -= 1
+        return seat.remove_occupant()
+
+    def find_seat(self, name: str) -> int | None:
+        """Finds the seat a person occupies at this table.
+
+        :param name: name of the person to look for.
+        :return: index of their seat or None if they are not at this table."""
+        for seat_idx, seat in enumerate(self.seats):
+            if not seat.free and seat.occupant == name:
+                return seat_idx
+        return None
+
+    def clear(self) -> None:
+        """Frees every seat at the table, reusing the Seat objects.
+
         :return: None"""
+        if self.occupied:
+            for seat in self.seats:
+                seat.free = True
+                seat.occupant = ""
+            self.occupied = 0
+
+    def copy(self) -> "Table":
+        """Returns an independent copy of the table and its seats.
+
+        :return: the copied table."""
+        table = Table.__new__(Table)
+        table.capacity = self.capacity
+        table.seats = []
         for seat in self.seats:
-            if seat.free:
-                seat.set_occupant(name)
-                return
-        print("No free seats available.")
+            copied = Seat()
+            if not seat.free:
+                copied.set_occupant(seat.occupant)
+            table.seats.append(copied)
+        table.occupied = self.occupied
+        return table
 
     def left_capacity(self) -> int:
         """Returns the number of free seats left at the table.
 
         :return: number of free seats."""
-        return sum(1 for seat in self.seats if seat.free)
+        return self.capacity - self.occupied
 
     def __str__(self) -> str:
         """Returns a string representation of the table and its seats."""
@@ -0,0 +1,212 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from utils.openspace import Openspace
+
+
+class ReadWriteLock:
+    """Lock shared by many readers or held by a single writer.
+
+    Waiting writers block new readers, so a room-wide operation is not starved
+    by a steady stream of seat claims."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._readers: int = 0
+        self._writer: bool = False
+        self._waiting_writers: int = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared for the duration of a with-block."""
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively for the duration of a with-block."""
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class ThreadSafeOpenspace:
+    """Wraps an openspace so several threads can seat and remove people at once.
+
+    Locking, from outermost to innermost:
+    - a read-write room lock: seat operations share it, room-wide operations
+      (organize, add_table, remove_tables, store) hold it exclusively;
+    - striped table locks: table i is guarded by stripe i % stripes, so a
+      claim and the blacklist check for that table are one atomic step;
+    - a counters lock around the room statistics and the person -> table map.
+
+    Every operation returns its outcome instead of printing it. Only use the
+    wrapped openspace through this object while threads are running.
+
+    :attr openspace (Openspace): the wrapped room.
+    :attr stripes (int): number of table locks."""
+
+    def __init__(self, openspace: Openspace, stripes: int = 64) -> None:
+        self.openspace: Openspace = openspace
+        self.stripes: int = stripes
+        self._room_lock = ReadWriteLock()
+        self._table_locks = [threading.Lock() for _ in range(stripes)]
+        self._counters_lock = threading.Lock()
+        # People being seated right now, so the same name cannot be claimed twice
+        self._claiming: set[str] = set()
+        # Every table before this index is full
+        self._cursor: int = 0
+
+    def _table_lock(self, table_idx: int) -> threading.Lock:
+        """The stripe guarding a table."""
+        return self._table_locks[table_idx % self.stripes]
+
+    def _try_table(self, table_idx: int, name: str) -> int | None:
+        """Claim a seat at one table if it has room and no blacklist conflict.
+
+        :return: index of the claimed seat, or None."""
+        openspace = self.openspace
+        with self._table_lock(table_idx):
+            table = openspace.tables[table_idx]
+            if not table.has_free_spot():
+                with self._counters_lock:
+                    # Move the cursor only when every table before this one is known to be full
+                    if self._cursor == table_idx:
+                        self._cursor = table_idx + 1
+                return None
+            if not openspace._can_sit_at_table(name, table_idx):
+                return None
+            table = openspace._table_for_write(table_idx)
+            seat_idx = table.claim_seat(name)
+            with self._counters_lock:
+                openspace._record_seated(table_idx, name, table.occupied - 1)
+            return seat_idx
+
+    def claim_seat(self, name: str) -> dict:
+        """Atomically seat a person at the first free seat that breaks no blacklist.
+
+        A table where someone from their whitelist sits is tried first.
+
+        :param name: name of the person to seat.
+        :return: dict with "status" ("seated", "already_seated" or "no_seat"),
+            and the 0-based "table" and "seat" (None unless seated)."""
+        openspace = self.openspace
+        with self._room_lock.read():
+            with self._counters_lock:
+                if name in self._claiming or name in openspace._person_tables:
+                    return {"status": "already_seated", "table": openspace._person_tables.get(name), "seat": None}
+                self._claiming.add(name)
+            try:
+                table_idx = openspace._whitelist_table(name)
+                seat_idx = None if table_idx is None else self._try_table(table_idx, name)
+                if seat_idx is None:
+                    table_idx = self._cursor
+                    while table_idx < len(openspace.tables):
+                        seat_idx = self._try_table(table_idx, name)
+                        if seat_idx is not None:
+                            break
+                        table_idx += 1
+            finally:
+                with self._counters_lock:
+                    self._claiming.discard(name)
+
+        if seat_idx is None:
+            return {"status": "no_seat", "table": None, "seat": None}
+        return {"status": "seated", "table": table_idx, "seat": seat_idx}
+
+    def add_colleague(self, name: str) -> dict:
+        """Seat a person, or put them on the unseated list if no seat fits.
+
+        :param name: name of the colleague to add.
+        :return: the result of claim_seat."""
+        result = self.claim_seat(name)
+        if result["status"] == "no_seat":
+            with self._counters_lock:
+                if name not in self.openspace.unseated:
+                    self.openspace.unseated.append(name)
+        return result
+
+    def release_seat(self, name: str) -> int | None:
+        """Atomically free the seat of a person.
+
+        :param name: name of the person.
+        :return: index of the table they left, or None if they were not seated."""
+        openspace = self.openspace
+        with self._room_lock.read():
+            table_idx = openspace._person_tables.get(name)
+            if table_idx is None:
+                return None
+            with self._table_lock(table_idx):
+                # They may have been removed by another thread while we waited
+                if openspace._person_tables.get(name) != table_idx:
+                    return None
+                table = openspace._table_for_write(table_idx)
+                table.remove_seat(table.find_seat(name))
+                with self._counters_lock:
+                    openspace._record_unseated(table_idx, name, table.occupied + 1)
+                    self._cursor = min(self._cursor, table_idx)
+            return table_idx
+
+    def organize(self, names: list[str]) -> dict:
+        """Run Openspace.organize with the room locked.
+
+        :return: preference statistics as returned by organize."""
+        with self._room_lock.write():
+            self._cursor = 0
+            return self.openspace.organize(names)
+
+    def add_table(self) -> None:
+        """Add a table with the room locked.
+
+        :return: None"""
+        with self._room_lock.write():
+            self.openspace.add_table()
+
+    def remove_tables(self, table_numbers: list[int]) -> list[str]:
+        """Remove tables (1-based numbers) with the room locked.
+
+        :return: names of the people displaced to the unseated list."""
+        with self._room_lock.write():
+            self._cursor = 0
+            return self.openspace.remove_tables(table_numbers)
+
+    def store(self, filename: str) -> None:
+        """Save a consistent snapshot of the room.
+
+        :return: None"""
+        with self._room_lock.write():
+            self.openspace.store(filename)
+
+    def get_statistics(self) -> dict:
+        """Consistent snapshot of the room counters.
+
+        :return: dict with the seated count, remaining seats, people alone,
+            unseated count and occupancy histogram."""
+        openspace = self.openspace
+        with self._counters_lock:
+            return {
+                "seated": openspace.get_seated_count(),
+                "remaining_seats": openspace.get_remaining_seats(),
+                "alone": openspace.get_people_alone_count(),
+                "unseated": len(openspace.unseated),
+                "occupancy_histogram": openspace.get_occupancy_histogram()
+            }
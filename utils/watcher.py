@@ -0,0 +1,170 @@
+import csv
+import os
+import time
+from typing import Callable
+
+from utils.batch import SeatingBatch
+from utils.file_utils import FileUtils
+from utils.openspace import Openspace
+from utils.reconcile import RosterReconciler
+
+
+class RosterWatcher:
+    """Seats colleagues as they are appended to the roster file.
+
+    The file is polled with os.stat only; nothing is read until it grows, and
+    then only the bytes after the last offset. A partial last line is kept until
+    its newline arrives. New rows are read like load_roster reads the file, so
+    their extra columns (team, role, ...) are set as attributes before they are
+    seated and the table composition rules apply to them. Every poll that finds
+    new names seats them in one SeatingBatch, so the state is saved once per
+    batch however many rows came in. When nothing changes, the poll interval
+    doubles up to max_interval.
+
+    If the file is rewritten (replaced by another file, truncated, changed in
+    place without growing, or changed before the last offset), the room is
+    reconciled with the whole file and watching resumes from its new end.
+
+    :attr openspace (Openspace): the room to seat new colleagues in.
+    :attr state_file (str | None): where to save the state after each batch (default: don't save).
+    :attr filename (str): the roster file to watch.
+    :attr min_interval (float): seconds between polls while rows are arriving.
+    :attr max_interval (float): longest pause between polls while idle.
+    :attr offset (int): number of bytes of the file already processed."""
+
+    # Bytes before the offset compared on every read, to notice a file rewritten while growing
+    TAIL_BYTES = 64
+
+    def __init__(self, openspace: Openspace, state_file: str | None = None, filename: str | None = None,
+                 min_interval: float = 0.05, max_interval: float = 2.0) -> None:
+        self.openspace: Openspace = openspace
+        self.state_file: str | None = state_file
+        self.filename: str = filename if filename is not None else openspace.input_file
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self.offset: int = 0
+        self._partial: bytes = b""
+        self._inode: int | None = None
+        self._mtime_ns: int | None = None
+        self._tail: bytes = b""
+        # Attribute names from the header, and whether the first row has been seen
+        self._columns: list[str] = []
+        self._started: bool = False
+
+    def start(self) -> dict:
+        """Reconcile the room with the whole file and start watching from its end.
+
+        :return: the reconciliation result (see RosterReconciler.reconcile)."""
+        result = RosterReconciler(self.openspace).reconcile(self.filename)
+        if not result["skipped"]:
+            self.openspace.load_attributes(self.filename)
+        stat = os.stat(self.filename)
+        self.offset = stat.st_size
+        self._inode = stat.st_ino
+        self._mtime_ns = stat.st_mtime_ns
+        self._partial = b""
+        with open(self.filename, mode="rb") as file:
+            first = next((row for row in csv.reader(line.decode("utf-8") for line in file) if row), None)
+            file.seek(max(0, self.offset - self.TAIL_BYTES))
+            self._tail = file.read(self.offset - file.tell())
+        self._started = first is not None
+        self._columns = FileUtils.roster_header(first or []) or []
+        if not result["skipped"] and self.state_file is not None:
+            self.openspace.store(self.state_file)
+        return result
+
+    def _read_new_rows(self) -> list[list[str]] | None:
+        """Read the complete lines appended since the last offset.
+
+        :return: the rows found (name first), or None if the file was rewritten and reconciled instead."""
+        stat = os.stat(self.filename)
+        size = stat.st_size
+        rewritten = stat.st_ino != self._inode or size < self.offset or \
+            (size == self.offset and stat.st_mtime_ns != self._mtime_ns)
+        if not rewritten and size == self.offset:
+            return []
+
+        tail = b""
+        if not rewritten:
+            with open(self.filename, mode="rb") as file:
+                file.seek(self.offset - len(self._tail))
+                tail = file.read(len(self._tail))
+                data = file.read(size - self.offset)
+            # Appending leaves the processed bytes alone
+            rewritten = tail != self._tail
+        if rewritten:
+            self.start()
+            return None
+        self.offset += len(data)
+        self._mtime_ns = stat.st_mtime_ns
+        self._tail = (tail + data)[-self.TAIL_BYTES:]
+
+        data = self._partial + data
+        end = data.rfind(b"\n") + 1
+        data, self._partial = data[:end], data[end:]
+        rows = []
+        for row in csv.reader(data.decode("utf-8").splitlines()):
+            if not row or not row[0].strip():  # Skip empty rows
+                continue
+            if not self._started:
+                self._started = True
+                header = FileUtils.roster_header(row)
+                if header is not None:
+                    self._columns = header
+                    continue
+            rows.append([row[0].strip()] + row[1:])
+        return rows
+
+    def poll(self) -> dict | None:
+        """Check the file once and seat any new colleagues.
+
+        :return: None if nothing new was found, otherwise dict with the names "seated",
+            the names "not_seated" (added to the unseated list) and "reconciled"
+            (True if the whole file was reconciled because it was rewritten)."""
+        rows = self._read_new_rows()
+        if rows is None:
+            return {"seated": [], "not_seated": [], "reconciled": True}
+
+        # Rows already in the room (added through the menu, or repeated) are ignored
+        openspace = self.openspace
+        unseated = set(openspace.unseated) if rows else set()
+        new_rows = {}
+        for row in rows:
+            if row[0] not in openspace._person_tables and row[0] not in unseated:
+                new_rows.setdefault(row[0], row[1:])
+        if not new_rows:
+            return None
+        new_names = list(new_rows)
+
+        width = max(map(len, new_rows.values()))
+        if width or self._columns:
+            columns = FileUtils.roster_columns(self._columns, width)
+            openspace.update_attributes(columns, (
+                (name, values + [""] * (len(columns) - len(values))) for name, values in new_rows.items()
+            ))
+
+        result = SeatingBatch(openspace, self.state_file).add_colleagues(new_names).commit()
+        not_seated = set(result["not_seated"])
+        return {
+            "seated": [name for name in new_names if name not in not_seated],
+            "not_seated": result["not_seated"],
+            "reconciled": False
+        }
+
+    def run(self, on_batch: Callable[[dict], None] | None = None,
+            should_stop: Callable[[], bool] | None = None) -> None:
+        """Poll the file until should_stop returns True (or forever, until interrupted).
+
+        :param on_batch: called with the result of every poll that changed the room.
+        :param should_stop: checked before every poll.
+        :return: None"""
+        interval = self.min_interval
+        while should_stop is None or not should_stop():
+            result = self.poll()
+            if result is None:
+                interval = min(interval * 2, self.max_interval)
+            else:
+                interval = self.min_interval
+                if on_batch is not None:
+                    on_batch(result)
+            time.sleep(interval)
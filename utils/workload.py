@@ -0,0 +1,195 @@
+import random
+
+from utils.openspace import Openspace
+
+
+class WorkloadGenerator:
+    """Deterministic synthetic rosters, preferences and rooms for scale checks.
+
+    The same seed always produces the same workload, so a failing size can be
+    reproduced exactly.
+
+    :attr seed (int): seed of the random generator."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed: int = seed
+        self._random = random.Random(seed)
+
+    def roster(self, size: int, prefix: str = "Colleague") -> list[str]:
+        """Unique names in a stable order.
+
+        :param size: number of people.
+        :param prefix: text in front of each number.
+        :return: list of names."""
+        return [f"{prefix} {i}" for i in range(size)]
+
+    def room(self, people: int, table_capacity: int = 4, slack: float = 1.1) -> tuple[int, int]:
+        """Room dimensions with some spare seats.
+
+        :param people: number of people to seat.
+        :param table_capacity: seats per table.
+        :param slack: total seats as a multiple of the number of people (below 1 leaves people unseated).
+        :return: (number_of_tables, table_capacity)."""
+        seats = int(people * slack)
+        return max(1, -(-seats // table_capacity)), table_capacity
+
+    def clustered_whitelists(self, names: list[str], cluster_size: int, fraction: float) -> list[tuple[str, str, str]]:
+        """Small friend groups whose members whitelist each other in a chain.
+
+        :param names: roster to draw from.
+        :param cluster_size: people per group (keep it at or below the table capacity).
+        :param fraction: share of the roster that belongs to a group.
+        :return: list of (person, "whitelist", target) rows."""
+        members = self._random.sample(names, int(len(names) * fraction))
+        rows = []
+        for start in range(0, len(members) - 1, cluster_size):
+            cluster = members[start:start + cluster_size]
+            for person, target in zip(cluster, cluster[1:]):
+                rows.append((person, "whitelist", target))
+        return rows
+
+    def random_blacklists(self, names: list[str], count: int) -> list[tuple[str, str, str]]:
+        """Blacklist edges between random pairs.
+
+        :param names: roster to draw from.
+        :param count: number of edges.
+        :return: list of (person, "blacklist", target) rows."""
+        rows = []
+        for _ in range(count):
+            person, target = self._random.sample(names, 2)
+            rows.append((person, "blacklist", target))
+        return rows
+
+    def adversarial_blacklists(self, names: list[str], hubs: int, hub_degree: int,
+                               clique_size: int = 0, cliques: int = 0) -> list[tuple[str, str, str]]:
+        """Blacklists that defeat greedy seating.
+
+        Hubs avoid many people, so they fit at few tables; cliques are groups in
+        which everyone avoids everyone else, so each member needs its own table.
+
+        :param names: roster to draw from.
+        :param hubs: number of people with a large blacklist.
+        :param hub_degree: blacklist size of each hub.
+        :param clique_size: members per mutually-avoiding group.
+        :param cliques: number of such groups.
+        :return: list of (person, "blacklist", target) rows."""
+        rows = []
+        for hub in self._random.sample(names, min(hubs, len(names))):
+            for target in self._random.sample(names, min(hub_degree, len(names))):
+                if target != hub:
+                    rows.append((hub, "blacklist", target))
+        for _ in range(cliques):
+            clique = self._random.sample(names, min(clique_size, len(names)))
+            for i, person in enumerate(clique):
+                for target in clique[i + 1:]:
+                    rows.append((person, "blacklist", target))
+        return rows
+
+    def generate(self, people: int, table_capacity: int = 4, slack: float = 1.1,
+                 whitelist_fraction: float = 0.2, random_blacklists: int = 0,
+                 hubs: int = 0, hub_degree: int = 0, clique_size: int = 0, cliques: int = 0) -> dict:
+        """A complete workload.
+
+        :return: dict with "names", "number_of_tables", "table_capacity" and "preferences" rows."""
+        names = self.roster(people)
+        number_of_tables, table_capacity = self.room(people, table_capacity, slack)
+        rows = self.clustered_whitelists(names, max(2, table_capacity // 2), whitelist_fraction)
+        rows += self.random_blacklists(names, random_blacklists)
+        rows += self.adversarial_blacklists(names, hubs, hub_degree, clique_size, cliques)
+        return {
+            "names": names,
+            "number_of_tables": number_of_tables,
+            "table_capacity": table_capacity,
+            "preferences": rows
+        }
+
+    @staticmethod
+    def build(workload: dict) -> Openspace:
+        """Create an empty room with the preferences of a workload.
+
+        :param workload: output of generate.
+        :return: the openspace, ready for organize(workload["names"])."""
+        openspace = Openspace(workload["number_of_tables"], workload["table_capacity"])
+        openspace.preferences.import_rows(workload["preferences"])
+        return openspace
+
+
+def check_invariants(openspace: Openspace, names: list[str]) -> list[str]:
+    """Check an arrangement produced by organize(names).
+
+    Checks that nobody is seated twice or both seated and unseated, that every
+    name is accounted for, that tables respect their capacity, that the
+    incremental statistics match a recount, that no blacklist is broken, that
+    nobody is left out while a compatible seat is free, and that nobody sits
+    alone when it can be avoided.
+
+    :param openspace: the organized room.
+    :param names: the names given to organize.
+    :return: list of broken invariants (empty if all hold)."""
+    problems = []
+    seated = {}
+    for table_idx, table in enumerate(openspace.tables):
+        occupants = [seat.occupant for seat in table.seats if not seat.free]
+        if len(table.seats) != table.capacity or len(occupants) > table.capacity:
+            problems.append(f"table {table_idx + 1} holds {len(occupants)} of {table.capacity} seats")
+        if len(occupants) != table.occupied:
+            problems.append(f"table {table_idx + 1} counts {table.occupied} occupants, has {len(occupants)}")
+        for person in occupants:
+            if person in seated:
+                problems.append(f"{person} is seated at tables {seated[person] + 1} and {table_idx + 1}")
+            seated[person] = table_idx
+
+    unseated = set(openspace.unseated)
+    if len(unseated) != len(openspace.unseated):
+        problems.append("someone is on the unseated list twice")
+    both = unseated.intersection(seated)
+    if both:
+        problems.append(f"{len(both)} people are both seated and unseated")
+    expected = set(names)
+    missing = expected - unseated - seated.keys()
+    extra = (unseated | seated.keys()) - expected
+    if missing:
+        problems.append(f"{len(missing)} people are neither seated nor unseated")
+    if extra:
+        problems.append(f"{len(extra)} unknown people in the room")
+
+    try:
+        openspace.verify_statistics()
+    except RuntimeError as error:
+        problems.append(str(error))
+
+    # organize() leaves people unseated rather than seating them next to someone they avoid
+    violated = openspace.get_preference_stats()["blacklist_violated"]
+    if violated:
+        problems.append(f"{violated} blacklist preferences are violated")
+
+    free_tables = [idx for idx, table in enumerate(openspace.tables) if table.has_free_spot()]
+    for person in openspace.unseated:
+        if any(openspace._can_sit_at_table(person, idx) for idx in free_tables):
+            problems.append(f"{person} is unseated although a compatible seat is free")
+            break
+
+    # A table with a single person is avoidable when someone else has a free compatible seat to join
+    if len(expected) > 1 and openspace.get_people_alone_count():
+        for idx, table in enumerate(openspace.tables):
+            if table.occupied != 1:
+                continue
+            person = next(seat.occupant for seat in table.seats if not seat.free)
+            if any(other != idx and openspace.tables[other].occupied > 1 and openspace._can_sit_at_table(person, other)
+                   for other in free_tables):
+                problems.append(f"{person} sits alone at table {idx + 1} although another table has room")
+                break
+    return problems
+
+
+def people_off_target(openspace: Openspace, number_of_people: int) -> int:
+    """How far the table sizes are from calculate_table_distribution.
+
+    Tables are compared largest to largest, so it does not matter which table got which size.
+
+    :param openspace: the organized room.
+    :param number_of_people: number of names given to organize.
+    :return: number of people who would have to move to reach the target sizes."""
+    target = sorted(openspace.calculate_table_distribution(number_of_people), reverse=True)
+    actual = sorted((table.occupied for table in openspace.tables), reverse=True)
+    return sum(abs(a - t) for a, t in zip(actual, target)) // 2